@@ -1,13 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from datetime import timedelta
+from fastapi.security import OAuth2PasswordRequestForm
+from datetime import datetime, timedelta
+from ...core.auth import get_current_user, user_cache
 from ...core.config import settings
-from ...core.security import create_access_token, verify_password, get_password_hash
-from ...models.user import User, UserCreate
+from ...core.security import PasswordHasherBusy, create_access_token, password_hasher
+from ...models.user import User, UserCreate, UserPublic, UserUpdate
 from ...database.mongodb import MongoDB
 
 router = APIRouter()
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+
+def hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many password checks in progress, try again shortly",
+        headers={"Retry-After": "1"},
+    )
 
 @router.post("/token")
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
@@ -19,20 +26,34 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    if not verify_password(form_data.password, user_doc["hashed_password"]):
+    try:
+        valid, new_hash = await password_hasher.verify_and_update(
+            form_data.password, user_doc["hashed_password"]
+        )
+    except PasswordHasherBusy:
+        raise hasher_busy()
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    if new_hash:
+        # Stored with a different BCRYPT_ROUNDS; upgrade while we have the password
+        await MongoDB.db.users.update_one(
+            {"_id": user_doc["_id"]},
+            {"$set": {"hashed_password": new_hash, "updated_at": datetime.utcnow()}}
+        )
+        user_cache.invalidate(user_doc["email"])
+    
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user_doc["email"]}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
-@router.post("/register", response_model=User)
+@router.post("/register", response_model=UserPublic)
 async def register_user(user: UserCreate):
     existing_user = await MongoDB.db.users.find_one({"email": user.email})
     if existing_user:
@@ -42,10 +63,34 @@ async def register_user(user: UserCreate):
         )
     
     user_doc = user.model_dump()
-    user_doc["hashed_password"] = get_password_hash(user.password)
+    try:
+        user_doc["hashed_password"] = await password_hasher.hash(user.password)
+    except PasswordHasherBusy:
+        raise hasher_busy()
     del user_doc["password"]
     
     result = await MongoDB.db.users.insert_one(user_doc)
     user_doc["id"] = str(result.inserted_id)
     
     return User(**user_doc)
+
+@router.get("/me", response_model=UserPublic)
+async def read_current_user(current_user: User = Depends(get_current_user)):
+    return current_user
+
+@router.put("/me", response_model=UserPublic)
+async def update_current_user(
+    update: UserUpdate,
+    current_user: User = Depends(get_current_user)
+):
+    changes = update.model_dump(exclude_unset=True, exclude={"password"})
+    if update.password:
+        try:
+            changes["hashed_password"] = await password_hasher.hash(update.password)
+        except PasswordHasherBusy:
+            raise hasher_busy()
+    changes["updated_at"] = datetime.utcnow()
+
+    await MongoDB.db.users.update_one({"email": current_user.email}, {"$set": changes})
+    user_cache.invalidate(current_user.email)
+    return await user_cache.get_user(current_user.email)
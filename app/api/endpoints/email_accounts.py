@@ -1,20 +1,31 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List
-from datetime import datetime
-from ...models.email_account import EmailAccount, EmailMetrics, WarmupStatus
-from ...core.warmup_engine import WarmupEngine
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, status
+from typing import List, Optional
+from datetime import datetime, timedelta
+from ...models.email_account import EmailAccount, EmailMetrics, WarmupStatus, DailySummary, AccountValidation, ImportReport, DomainDiagnostics
+from ...models.job import JobAccepted
+from ...core.scheduler import JobScheduler
+from ...core.sharding import shard_of
+from ...core.validation import AccountValidator
+from ...core.account_import import AccountImporter, iter_lines
+from ...core.dns_cache import dns_cache, DNSLookupError
+from ...core.utils import get_email_domain, start_of_today
 from ...database.mongodb import MongoDB
 from ...core.auth import get_current_user
 
 router = APIRouter()
-warmup_engine = WarmupEngine()
 
-@router.post("/accounts/", response_model=EmailAccount)
+# Statuses /resume refuses: the account must pass validation first
+UNVALIDATED = {
+    WarmupStatus.PENDING: "Email account is still being validated",
+    WarmupStatus.FAILED: "Email account failed validation; fix its credentials and add it again",
+}
+
+@router.post("/accounts/", response_model=JobAccepted, status_code=status.HTTP_202_ACCEPTED)
 async def add_email_account(
     account: EmailAccount,
     current_user = Depends(get_current_user)
 ):
-    """Add a new email account to the warmup system"""
+    """Add a new email account; its SMTP/IMAP validation runs on a worker"""
     # Check if account already exists
     existing = await MongoDB.db.email_accounts.find_one({"email": account.email})
     if existing:
@@ -23,33 +34,42 @@ async def add_email_account(
             detail="Email account already exists"
         )
     
-    # Validate SMTP/IMAP connections
-    try:
-        # Test SMTP connection
-        await warmup_engine.send_warmup_email(account, account)  # Send test email to self
-        
-        # Test IMAP connection
-        await warmup_engine.check_inbox_placement(account)
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Failed to validate email account: {str(e)}"
-        )
-    
     # Save account to database
     account_dict = account.model_dump()
     account_dict["user_id"] = str(current_user.id)
-    result = await MongoDB.db.email_accounts.insert_one(account_dict)
+    account_dict["status"] = WarmupStatus.PENDING
+    account_dict["created_at"] = account_dict["updated_at"] = datetime.utcnow()
+    await MongoDB.db.email_accounts.insert_one(account_dict)
+    
+    # Initialize metrics; an upsert so leftovers of a deleted account can't fail the request
+    await MongoDB.db.email_metrics.update_one(
+        {"email": account.email},
+        {"$setOnInsert": {"created_at": datetime.utcnow()}},
+        upsert=True
+    )
     
-    # Initialize metrics
-    await MongoDB.db.email_metrics.insert_one({
-        "email": account.email,
-        "created_at": datetime.utcnow()
-    })
+    job_ids = await AccountValidator.enqueue([account.email], str(current_user.id))
+    return JobAccepted(job_id=job_ids[0], kind="account.validate")
+
+@router.post("/accounts/import", response_model=ImportReport)
+async def import_email_accounts(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    current_user = Depends(get_current_user)
+):
+    """Bulk add accounts from a streamed CSV (with header) or NDJSON body"""
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "csv" if "csv" in content_type else "ndjson"
     
-    account_dict["id"] = str(result.inserted_id)
-    return EmailAccount(**account_dict)
+    importer = AccountImporter(str(current_user.id))
+    try:
+        return await importer.run(iter_lines(request.stream()), format)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Body must be UTF-8; {importer.report.imported} accounts were imported before the error"
+        )
 
 @router.get("/accounts/", response_model=List[EmailAccount])
 async def get_email_accounts(current_user = Depends(get_current_user)):
@@ -73,6 +93,106 @@ async def get_account_metrics(
         )
     return EmailMetrics(**metrics)
 
+@router.get("/accounts/{email}/validation", response_model=AccountValidation)
+async def get_account_validation(
+    email: str,
+    current_user = Depends(get_current_user)
+):
+    """Get the outcome of an account's SMTP/IMAP validation"""
+    account = await MongoDB.db.email_accounts.find_one(
+        {"email": email, "user_id": str(current_user.id)},
+        {"status": 1, "validation": 1}
+    )
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Email account not found"
+        )
+    validation = account.get("validation")
+    if validation is None:
+        return AccountValidation(email=email, status=account["status"])
+    return AccountValidation(email=email, status=account["status"], pending=False, **validation)
+
+@router.get("/accounts/{email}/dns", response_model=DomainDiagnostics)
+async def get_account_dns(
+    email: str,
+    current_user = Depends(get_current_user)
+):
+    """MX, SPF, DKIM and DMARC records of an account's sending domain"""
+    account = await MongoDB.db.email_accounts.find_one(
+        {"email": email, "user_id": str(current_user.id)},
+        {"_id": 1}
+    )
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Email account not found"
+        )
+    try:
+        return DomainDiagnostics(**await dns_cache.diagnose(get_email_domain(email)))
+    except DNSLookupError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+
+@router.get("/accounts/{email}/history", response_model=List[DailySummary])
+async def get_account_history(
+    email: str,
+    days: int = Query(90, ge=1, le=730),
+    current_user = Depends(get_current_user)
+):
+    """Get daily warmup summaries for an email account, newest first"""
+    account = await MongoDB.db.email_accounts.find_one(
+        {"email": email, "user_id": str(current_user.id)},
+        {"_id": 1}
+    )
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Email account not found"
+        )
+    summaries = await MongoDB.db.daily_summaries.find(
+        {"email": email, "day": {"$gte": datetime.utcnow() - timedelta(days=days)}},
+        {"_id": 0}
+    ).sort("day", -1).to_list(days)
+    return [DailySummary(**summary) for summary in summaries]
+
+@router.post("/accounts/{email}/warmup", response_model=JobAccepted, status_code=status.HTTP_202_ACCEPTED)
+async def start_warmup_cycle(
+    email: str,
+    current_user = Depends(get_current_user)
+):
+    """Queue today's warmup cycle for an active email account, if it hasn't run yet"""
+    account = await MongoDB.db.email_accounts.find_one(
+        {"email": email, "user_id": str(current_user.id)},
+        {"status": 1, "last_warmup": 1}
+    )
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Email account not found"
+        )
+    if account.get("status") != WarmupStatus.ACTIVE:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Email account is not active"
+        )
+    # The worker re-checks this when it claims the cycle, so racing requests still run it once
+    last_warmup = account.get("last_warmup")
+    if last_warmup is not None and last_warmup >= start_of_today():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Today's warmup cycle has already been started"
+        )
+    
+    job_id = await JobScheduler.schedule(
+        "warmup.cycle",
+        {"email": email, "user_id": str(current_user.id)},
+        shard=shard_of(email)
+    )
+    return JobAccepted(job_id=job_id, kind="warmup.cycle")
+
 @router.post("/accounts/{email}/pause")
 async def pause_warmup(
     email: str,
@@ -81,7 +201,7 @@ async def pause_warmup(
     """Pause warmup for an email account"""
     result = await MongoDB.db.email_accounts.update_one(
         {"email": email, "user_id": str(current_user.id)},
-        {"$set": {"status": WarmupStatus.PAUSED}}
+        {"$set": {"status": WarmupStatus.PAUSED, "updated_at": datetime.utcnow()}}
     )
     
     if result.modified_count == 0:
@@ -97,18 +217,28 @@ async def resume_warmup(
     email: str,
     current_user = Depends(get_current_user)
 ):
-    """Resume warmup for an email account"""
-    result = await MongoDB.db.email_accounts.update_one(
+    """Resume warmup for an email account that has passed validation"""
+    account = await MongoDB.db.email_accounts.find_one(
         {"email": email, "user_id": str(current_user.id)},
-        {"$set": {"status": WarmupStatus.ACTIVE}}
+        {"status": 1}
     )
-    
-    if result.modified_count == 0:
+    if not account:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Email account not found"
         )
-    
+    if account.get("status") in UNVALIDATED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=UNVALIDATED[account["status"]]
+        )
+
+    # Scoped to the status so a validation failure recorded meanwhile isn't undone
+    await MongoDB.db.email_accounts.update_one(
+        {"email": email, "user_id": str(current_user.id), "status": {"$nin": list(UNVALIDATED)}},
+        {"$set": {"status": WarmupStatus.ACTIVE, "updated_at": datetime.utcnow()}}
+    )
+
     return {"message": "Warmup resumed successfully"}
 
 @router.delete("/accounts/{email}")
@@ -121,4 +251,12 @@ async def delete_account(
         {"email": email, "user_id": str(current_user.id)}
     )
     
-    if result.deleted_count == 
+    if result.deleted_count == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Email account not found"
+        )
+    # Metrics are keyed by the unique address; a re-added account starts fresh
+    await MongoDB.db.email_metrics.delete_one({"email": email})
+    
+    return {"message": "Email account deleted successfully"}
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from ...models.job import JobStatus
+from ...core.scheduler import JobScheduler
+from ...core.auth import get_current_user
+
+router = APIRouter()
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(
+    job_id: str,
+    current_user = Depends(get_current_user)
+):
+    """Poll the state of a queued job"""
+    job = await JobScheduler.get_job(job_id)
+    if not job or job["payload"].get("user_id") != str(current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    job["id"] = str(job["_id"])
+    return JobStatus(**job)
@@ -0,0 +1,198 @@
+import csv
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import logging
+from pydantic import ValidationError
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from .config import settings
+from .utils import validate_email_format
+from .validation import AccountValidator
+from ..database.mongodb import MongoDB
+from ..models.email_account import EmailAccount, ImportReport, ImportRowError, WarmupStatus
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into decoded lines without buffering all of it"""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8").rstrip("\r")
+
+
+def _error_message(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(p) for p in e['loc']) or 'row'}: {e['msg']}" for e in error.errors()
+        )
+    return str(error)
+
+
+class AccountImporter:
+    """Stream accounts from CSV or NDJSON into ``email_accounts``.
+
+    Rows are parsed as they arrive and collected into batches of
+    ``batch_size``. Each batch costs one ``$in`` query to find emails that
+    already exist, one unordered ``bulk_write`` for the accounts and one
+    ``insert_many`` for their metrics, instead of three round trips per
+    account. Imported accounts are queued for batched validation. Rows that
+    fail parsing, validation or insertion are reported by row number
+    (header is row 1 for CSV); only the first ``max_reported_errors`` are
+    kept in the report.
+    """
+
+    def __init__(
+        self,
+        user_id: str,
+        batch_size: int = settings.IMPORT_BATCH_SIZE,
+        max_reported_errors: int = settings.IMPORT_MAX_REPORTED_ERRORS,
+    ):
+        self.user_id = user_id
+        self.batch_size = batch_size
+        self.report = ImportReport()
+        self.max_reported_errors = max_reported_errors
+        self._seen: set = set()
+
+    def _error(self, row: int, error: str, email: Optional[str] = None):
+        self.report.failed += 1
+        if len(self.report.errors) < self.max_reported_errors:
+            self.report.errors.append(ImportRowError(row=row, email=email, error=error))
+
+    @staticmethod
+    async def _csv_rows(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, dict]]:
+        header: Optional[List[str]] = None
+        row = 0
+        async for line in lines:
+            row += 1
+            if not line.strip():
+                continue
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            yield row, dict(zip(header, values))
+
+    @staticmethod
+    async def _ndjson_rows(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, dict]]:
+        row = 0
+        async for line in lines:
+            row += 1
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                record = e
+            yield row, record
+
+    def _parse(self, row: int, record) -> Optional[EmailAccount]:
+        if isinstance(record, Exception):
+            self._error(row, f"Invalid JSON: {str(record)}")
+            return None
+        if not isinstance(record, dict):
+            self._error(row, "Expected an object")
+            return None
+
+        email = record.get("email")
+        if not email or not validate_email_format(email):
+            self._error(row, "Invalid email address", email)
+            return None
+        try:
+            account = EmailAccount(**{k: v for k, v in record.items() if v not in ("", None)})
+        except ValidationError as e:
+            self._error(row, _error_message(e), email)
+            return None
+        if account.email in self._seen:
+            self.report.duplicates += 1
+            self._error(row, "Duplicate email in import", email)
+            return None
+        self._seen.add(account.email)
+        return account
+
+    async def _write(self, batch: List[Tuple[int, EmailAccount]]):
+        emails = [account.email for _, account in batch]
+        existing = {
+            document["email"] async for document in MongoDB.db.email_accounts.find(
+                {"email": {"$in": emails}}, {"email": 1}
+            )
+        }
+
+        now = datetime.utcnow()
+        rows: List[int] = []
+        pending: List[str] = []
+        operations = []
+        for row, account in batch:
+            if account.email in existing:
+                self.report.duplicates += 1
+                self._error(row, "Email account already exists", account.email)
+                continue
+            document = account.model_dump()
+            document.update({
+                "user_id": self.user_id,
+                "status": WarmupStatus.PENDING,
+                "created_at": now,
+                "updated_at": now
+            })
+            rows.append(row)
+            pending.append(account.email)
+            operations.append(InsertOne(document))
+        if not operations:
+            return
+
+        # Index of operation -> reason it was rejected (lost a race on the unique email index)
+        rejected: Dict[int, str] = {}
+        try:
+            await MongoDB.db.email_accounts.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                duplicate = error.get("code") == DUPLICATE_KEY
+                rejected[error["index"]] = "Email account already exists" if duplicate else error.get("errmsg", "Write failed")
+                if duplicate:
+                    self.report.duplicates += 1
+
+        inserted = []
+        for index, email in enumerate(pending):
+            if index in rejected:
+                self._error(rows[index], rejected[index], email)
+            else:
+                inserted.append(email)
+        if not inserted:
+            return
+
+        # Upsert: metrics of a previously deleted account with the same address may still exist
+        await MongoDB.db.email_metrics.bulk_write([
+            UpdateOne({"email": email}, {"$setOnInsert": {"created_at": now}}, upsert=True)
+            for email in inserted
+        ], ordered=False)
+        self.report.imported += len(inserted)
+        self.report.validation_job_ids.extend(await AccountValidator.enqueue(inserted, self.user_id))
+
+    async def run(self, lines: AsyncIterator[str], format: str) -> ImportReport:
+        rows = self._csv_rows(lines) if format == "csv" else self._ndjson_rows(lines)
+        batch: List[Tuple[int, EmailAccount]] = []
+        async for row, record in rows:
+            self.report.received += 1
+            account = self._parse(row, record)
+            if account is None:
+                continue
+            batch.append((row, account))
+            if len(batch) >= self.batch_size:
+                await self._write(batch)
+                batch = []
+        if batch:
+            await self._write(batch)
+
+        logger.info(
+            f"Imported {self.report.imported}/{self.report.received} accounts for user "
+            f"{self.user_id} ({self.report.failed} rejected)"
+        )
+        return self.report
@@ -0,0 +1,130 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Generic, Hashable, Optional, Tuple, TypeVar
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from jose import JWTError, jwt
+import logging
+from .config import settings
+from ..database.mongodb import MongoDB
+from ..models.user import User
+
+logger = logging.getLogger(__name__)
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/token")
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """LRU map whose entries also expire at a per-entry deadline"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: K) -> Optional[V]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: K, value: V, expires_at: float):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: K):
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class UserCache:
+    """Resolve bearer tokens to users without a decode and a lookup per request.
+
+    Decoded tokens are kept until their ``exp`` claim, user documents for
+    ``ttl`` seconds. ``invalidate`` drops a user as soon as it changes in
+    this process; other API processes see the change within ``ttl``.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = settings.AUTH_CACHE_SIZE,
+        ttl: float = settings.AUTH_CACHE_TTL,
+    ):
+        self.ttl = ttl
+        self.tokens: TTLCache[str, str] = TTLCache(max_entries)
+        self.users: TTLCache[str, User] = TTLCache(max_entries)
+
+    def decode(self, token: str) -> Optional[str]:
+        """Email (``sub``) of a valid token, or None"""
+        email = self.tokens.get(token)
+        if email is not None:
+            return email
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+        except JWTError:
+            return None
+        email = payload.get("sub")
+        if email is None:
+            return None
+        self.tokens.set(token, email, float(payload.get("exp", time.time() + self.ttl)))
+        return email
+
+    async def get_user(self, email: str) -> Optional[User]:
+        user = self.users.get(email)
+        if user is not None:
+            return user
+        user_doc = await MongoDB.db.users.find_one({"email": email})
+        if user_doc is None:
+            return None
+        user_doc["id"] = str(user_doc["_id"])
+        user = User(**user_doc)
+        self.users.set(email, user, time.time() + self.ttl)
+        return user
+
+    def invalidate(self, email: str):
+        self.users.pop(email)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "tokens": len(self.tokens),
+            "users": len(self.users),
+            "token_hits": self.tokens.hits,
+            "user_hits": self.users.hits,
+            "user_misses": self.users.misses,
+        }
+
+
+user_cache = UserCache()
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    email = user_cache.decode(token)
+    if email is None:
+        raise credentials_exception
+    user = await user_cache.get_user(email)
+    if user is None:
+        raise credentials_exception
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user"
+        )
+    return user
@@ -0,0 +1,57 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class KeyedBatcher(Generic[T, R]):
+    """Collect items per key and hand each key's batch to ``process`` at once.
+
+    A batch is processed ``delay`` seconds after its first item arrives, or
+    as soon as it holds ``size`` items. ``process(context, items)`` returns
+    one result per item, in order; ``submit`` resolves with the item's
+    result, or raises what ``process`` raised.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[Any, List[T]], Awaitable[List[R]]],
+        size: int,
+        delay: float,
+    ):
+        self.process = process
+        self.size = size
+        self.delay = delay
+        self._pending: Dict[str, Tuple[Any, List[T], List[asyncio.Future]]] = {}
+
+    async def submit(self, key: str, context: Any, item: T) -> R:
+        future = asyncio.get_running_loop().create_future()
+        _, items, futures = self._pending.setdefault(key, (context, [], []))
+        items.append(item)
+        futures.append(future)
+        if len(items) == 1:
+            asyncio.create_task(self._flush_later(key))
+        elif len(items) >= self.size:
+            asyncio.create_task(self._flush(key))
+        return await future
+
+    async def _flush_later(self, key: str):
+        await asyncio.sleep(self.delay)
+        await self._flush(key)
+
+    async def _flush(self, key: str):
+        pending = self._pending.pop(key, None)
+        if pending is None:
+            return
+        context, items, futures = pending
+        try:
+            results = await self.process(context, items)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result(result)
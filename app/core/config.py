@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 class Settings(BaseSettings):
     # Base Settings
@@ -10,10 +10,18 @@ class Settings(BaseSettings):
     # MongoDB Settings
     MONGODB_URL: str
     DATABASE_NAME: str
+    ENSURE_INDEXES_ON_STARTUP: bool = True
     
     # JWT Settings
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_CACHE_SIZE: int = 10000  # decoded tokens and users kept per API process
+    AUTH_CACHE_TTL: int = 60  # seconds a cached user may be stale in other processes
+
+    # Password Hashing Settings
+    BCRYPT_ROUNDS: int = 12  # changing it rehashes each password at its next login
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64  # waiting hash/verify calls before rejecting with 503
     
     # Email Settings
     SMTP_TLS: bool = True
@@ -22,6 +30,120 @@ class Settings(BaseSettings):
     SMTP_USER: Optional[str] = None
     SMTP_PASSWORD: Optional[str] = None
     
+    # SMTP Pool Settings
+    SMTP_POOL_MAX_CONNECTIONS: int = 2
+    SMTP_POOL_IDLE_TIMEOUT: int = 300  # seconds
+    SMTP_POOL_HEALTH_CHECK_INTERVAL: int = 30  # seconds
+    
+    # IMAP Settings
+    IMAP_TIMEOUT: float = 30.0  # seconds
+    IMAP_SESSION_IDLE_TIMEOUT: int = 600  # seconds
+    IMAP_SESSION_HEALTH_CHECK_INTERVAL: int = 60  # seconds
+    IMAP_CHECK_CONCURRENCY: int = 20
+    IMAP_SPAM_FOLDER: str = "[Gmail]/Spam"
+    IMAP_INITIAL_LOOKBACK_DAYS: int = 2
+    IMAP_IDLE_ENABLED: bool = False
+    IMAP_IDLE_RENEW_INTERVAL: int = 1500  # seconds, below the 29 minute server limit
+    IMAP_IDLE_MAX_QUEUED_EVENTS: int = 10000
+    IMAP_SPAM_SCAN_INTERVAL: int = 900  # seconds
+    IMAP_POLL_INTERVAL: int = 300  # seconds, for servers without IDLE
+    
+    # Campaign Dispatch Settings
+    DISPATCH_MAX_CONCURRENCY: int = 50
+    DISPATCH_PER_ACCOUNT_CONCURRENCY: int = 2
+    DISPATCH_PER_PROVIDER_CONCURRENCY: int = 20
+    DISPATCH_MAX_PENDING: int = 500
+    
+    # Email Pool Settings
+    EMAIL_POOL_LEASE_SECONDS: int = 900
+    EMAIL_POOL_CLAIM_ATTEMPTS: int = 3
+    
+    # Log Sink Settings
+    LOG_SINK_BATCH_SIZE: int = 500
+    LOG_SINK_FLUSH_INTERVAL: float = 2.0  # seconds
+    LOG_SINK_MAX_BUFFERED: int = 10000
+    
+    # Retention Settings
+    LOG_RETENTION_DAYS: int = 30
+    LOG_ROLLUP_INTERVAL: int = 3600  # seconds
+    
+    # Warmup Network Settings
+    WARMUP_DAILY_RECEIVE_CAP: int = 40
+    WARMUP_PAIRING_COOLDOWN: int = 3 * 24 * 60 * 60  # seconds
+    WARMUP_PROVIDER_DIVERSITY: float = 0.5
+    WARMUP_SELECTION_ATTEMPTS_PER_PICK: int = 10
+    NETWORK_LOAD_BATCH_SIZE: int = 1000
+    NETWORK_POLL_INTERVAL: float = 5.0  # seconds
+    NETWORK_RECONCILE_INTERVAL: int = 600  # seconds
+    NETWORK_REPUTATION_WINDOW_DAYS: int = 7
+    NETWORK_REPUTATION_REFRESH_INTERVAL: int = 3600  # seconds
+    CREDENTIAL_CACHE_SIZE: int = 5000
+    
+    # Scheduler Settings
+    SCHEDULER_CONCURRENCY: int = 100
+    SCHEDULER_BATCH_SIZE: int = 200
+    SCHEDULER_LOOKAHEAD: float = 5.0  # seconds
+    SCHEDULER_POLL_INTERVAL: float = 1.0  # seconds
+    SCHEDULER_LEASE_SECONDS: int = 300
+    SCHEDULER_MAX_ATTEMPTS: int = 5
+    SCHEDULER_JOB_RETENTION_DAYS: int = 7
+    
+    # Validation Settings
+    VALIDATION_TIMEOUT: float = 15.0  # seconds, per protocol
+    VALIDATION_CONCURRENCY: int = 20
+    VALIDATION_BATCH_SIZE: int = 100
+    
+    # Import Settings
+    IMPORT_BATCH_SIZE: int = 500
+    IMPORT_MAX_REPORTED_ERRORS: int = 1000
+    
+    # DNS Settings
+    DNS_CACHE_SIZE: int = 10000
+    DNS_MIN_TTL: int = 60  # seconds
+    DNS_MAX_TTL: int = 3600  # seconds
+    DNS_NEGATIVE_TTL: int = 300  # seconds
+    DNS_CONCURRENCY: int = 50
+    DNS_TIMEOUT: float = 5.0  # seconds
+    DNS_DKIM_SELECTORS: List[str] = ["default", "google", "selector1", "selector2", "k1", "dkim"]
+    
+    # Rate Limit Settings (messages per second)
+    RATE_LIMIT_PROVIDER_RATE: float = 5.0
+    RATE_LIMIT_PROVIDER_MAX_RATE: float = 50.0
+    RATE_LIMIT_ACCOUNT_RATE: float = 0.5
+    RATE_LIMIT_ACCOUNT_MAX_RATE: float = 2.0
+    RATE_LIMIT_MIN_RATE: float = 0.05
+    RATE_LIMIT_INCREASE: float = 0.1
+    RATE_LIMIT_DECREASE: float = 0.5
+    RATE_LIMIT_MAX_RETRIES: int = 3
+    RATE_LIMIT_RETRY_BASE: float = 2.0  # seconds
+
+    # Retry Settings
+    RETRY_BASE_DELAY: float = 300.0  # seconds before the first retry
+    RETRY_MAX_DELAY: float = 6 * 60 * 60  # seconds
+    RETRY_MAX_ATTEMPTS: int = 5
+    
+    # Content Settings
+    CONTENT_VARIANTS: int = 4000  # precomputed subjects, sentences and replies
+    CONTENT_DEDUP_WINDOW: int = 100  # recent messages per account checked for near-duplicates
+    CONTENT_DEDUP_ACCOUNTS: int = 5000
+    CONTENT_SIMHASH_DISTANCE: int = 6  # bits; closer fingerprints count as near-duplicates
+    CONTENT_MAX_ATTEMPTS: int = 8
+
+    # Reply Settings
+    REPLY_BATCH_SIZE: int = 20  # replies per account handled in one IMAP/SMTP session
+    REPLY_BATCH_DELAY: float = 2.0  # seconds to collect a batch
+
+    # Engagement Settings
+    ENGAGEMENT_BATCH_SIZE: int = 50  # messages per account handled in one IMAP session
+    ENGAGEMENT_BATCH_DELAY: float = 5.0  # seconds to collect a batch
+
+    # Sharding Settings
+    SHARD_COUNT: int = 256
+    SHARD_VNODES: int = 64
+    SHARD_LEASE_SECONDS: int = 30
+    SHARD_HEARTBEAT_INTERVAL: float = 10.0  # seconds, well inside the lease
+    WARMUP_CYCLE_INTERVAL: int = 300  # seconds between sweeps of owned accounts
+    
     class Config:
         env_file = ".env"
 
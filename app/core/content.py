@@ -0,0 +1,281 @@
+import hashlib
+import random
+import re
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import logging
+from . import content_corpus
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+SLOT = re.compile(r"\{(\w+)\}")
+WORD = re.compile(r"[a-z0-9']+")
+BITS = 64
+
+Weights = Tuple[int, ...]
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def simhash(weights: Sequence[Weights]) -> int:
+    """Fingerprint of a message from the weight vectors of its parts"""
+    fingerprint = 0
+    for bit, total in enumerate(map(sum, zip(*weights))):
+        if total > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+class Variant:
+    """A precomputed piece of text and its SimHash weight vector"""
+
+    __slots__ = ("text", "weights")
+
+    def __init__(self, text: str, weights: Weights):
+        self.text = text
+        self.weights = weights
+
+
+class GeneratedContent(NamedTuple):
+    subject: str
+    body: str
+    signature: int
+
+
+class GeneratedReply(NamedTuple):
+    subject: str
+    body: str
+    headers: Dict[str, str]
+
+
+class MarkovChain:
+    """Order-2 word chain over whole sentences"""
+
+    def __init__(self, sentences: Sequence[str]):
+        self.starts: List[Tuple[str, str]] = []
+        self.transitions: Dict[Tuple[str, str], List[Optional[str]]] = {}
+        for sentence in sentences:
+            words = sentence.split()
+            if len(words) < 3:
+                continue
+            self.starts.append((words[0], words[1]))
+            for i in range(len(words) - 2):
+                self.transitions.setdefault((words[i], words[i + 1]), []).append(words[i + 2])
+            self.transitions.setdefault((words[-2], words[-1]), []).append(None)
+
+    def walk(self, rng: random.Random, max_words: int = 30) -> Optional[str]:
+        first, second = rng.choice(self.starts)
+        words = [first, second]
+        while len(words) < max_words:
+            following = rng.choice(self.transitions[(first, second)])
+            if following is None:
+                return " ".join(words)
+            words.append(following)
+            first, second = second, following
+        return None
+
+
+class SignatureWindow:
+    """The last ``size`` fingerprints sent by one account.
+
+    Fingerprints are split into ``distance + 1`` bands; two fingerprints
+    within ``distance`` bits of each other must agree on at least one band,
+    so only the signatures sharing a band are compared.
+    """
+
+    __slots__ = ("size", "distance", "band_bits", "signatures", "_bands")
+
+    def __init__(self, size: int, distance: int):
+        self.size = size
+        self.distance = distance
+        self.band_bits = BITS // (distance + 1)
+        self.signatures: Deque[int] = deque()
+        self._bands: Dict[Tuple[int, int], List[int]] = {}
+
+    def _keys(self, signature: int) -> List[Tuple[int, int]]:
+        mask = (1 << self.band_bits) - 1
+        return [
+            (band, signature >> (band * self.band_bits) & mask)
+            for band in range(self.distance + 1)
+        ]
+
+    def near(self, signature: int) -> bool:
+        for key in self._keys(signature):
+            for other in self._bands.get(key, ()):
+                if hamming(signature, other) <= self.distance:
+                    return True
+        return False
+
+    def add(self, signature: int):
+        if len(self.signatures) >= self.size:
+            oldest = self.signatures.popleft()
+            for key in self._keys(oldest):
+                bucket = self._bands[key]
+                bucket.remove(oldest)
+                if not bucket:
+                    del self._bands[key]
+        self.signatures.append(signature)
+        for key in self._keys(signature):
+            self._bands.setdefault(key, []).append(signature)
+
+
+class ContentGenerator:
+    """Varied warmup subjects, bodies and replies from a local corpus.
+
+    On first use the corpus is expanded once: an order-2 Markov chain over
+    the body sentences adds recombined ones, slot placeholders are filled
+    in, and every variant gets its SimHash weight vector.
+    Generating a message is then only picking variants and summing their
+    vectors. Each sending account keeps a window of its recent
+    fingerprints; a candidate within ``distance`` bits of one of them is
+    regenerated, up to ``attempts`` times.
+    """
+
+    def __init__(
+        self,
+        corpus=content_corpus,
+        variants: int = settings.CONTENT_VARIANTS,
+        window: int = settings.CONTENT_DEDUP_WINDOW,
+        max_accounts: int = settings.CONTENT_DEDUP_ACCOUNTS,
+        distance: int = settings.CONTENT_SIMHASH_DISTANCE,
+        attempts: int = settings.CONTENT_MAX_ATTEMPTS,
+        seed: Optional[int] = None
+    ):
+        self.corpus = corpus
+        self.variants = variants
+        self.window = window
+        self.max_accounts = max_accounts
+        self.distance = distance
+        self.attempts = attempts
+        self.rng = random.Random(seed)
+        self.regenerated = 0
+        self.near_duplicates = 0
+        self._loaded = False
+        self._shingles: Dict[str, Weights] = {}
+        self._windows: "OrderedDict[str, SignatureWindow]" = OrderedDict()
+
+    def _fill(self, pattern: str) -> str:
+        text = SLOT.sub(lambda m: self.rng.choice(self.corpus.SLOTS[m.group(1)]), pattern)
+        return text[:1].upper() + text[1:]
+
+    def _weights(self, text: str) -> Weights:
+        words = WORD.findall(text.lower())
+        vectors = []
+        for shingle in (" ".join(words[i:i + 2]) for i in range(max(1, len(words) - 1))):
+            vector = self._shingles.get(shingle)
+            if vector is None:
+                value = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+                vector = self._shingles[shingle] = tuple(
+                    1 if value >> bit & 1 else -1 for bit in range(BITS)
+                )
+            vectors.append(vector)
+        return tuple(map(sum, zip(*vectors)))
+
+    def _expand(self, patterns: Sequence[str], count: int, markov: bool = False) -> List[Variant]:
+        """Up to ``count`` distinct texts from ``patterns``.
+
+        The Markov chain is trained on the patterns themselves, with slots
+        as words, so recombined sentences only join at real phrases and
+        get their slots filled afterwards like any other pattern.
+        """
+        if markov:
+            chain = MarkovChain(patterns)
+            walks = {chain.walk(self.rng, max_words=24) for _ in range(len(patterns) * 20)}
+            patterns = sorted(set(patterns) | {w for w in walks if w and len(w.split()) >= 6})
+
+        texts = set()
+        for _ in range(count * 3):
+            if len(texts) >= count:
+                break
+            texts.add(self._fill(self.rng.choice(patterns)))
+        return [Variant(text, self._weights(text)) for text in sorted(texts)]
+
+    def load(self):
+        """Precompute every variant; called on first use"""
+        share = max(1, self.variants // 8)
+        self.subjects = self._expand(self.corpus.SUBJECTS, share)
+        self.openers = self._expand(self.corpus.OPENERS, share)
+        self.closers = self._expand(self.corpus.CLOSERS, share)
+        self.replies = self._expand(self.corpus.REPLIES, share)
+        self.body = self._expand(self.corpus.BODY, self.variants - 4 * share, markov=True)
+        self._loaded = True
+        logger.info(
+            f"Content generator ready: {len(self.subjects)} subjects, {len(self.body)} body sentences, "
+            f"{len(self.replies)} replies"
+        )
+
+    def _window_for(self, sender: str) -> SignatureWindow:
+        window = self._windows.get(sender)
+        if window is None:
+            window = self._windows[sender] = SignatureWindow(self.window, self.distance)
+            if len(self._windows) > self.max_accounts:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(sender)
+        return window
+
+    def _pick(self, sender: str, compose) -> Tuple[List[Variant], int]:
+        """Compose candidates until one isn't close to the sender's recent mail"""
+        if not self._loaded:
+            self.load()
+        window = self._window_for(sender)
+        for _ in range(self.attempts):
+            parts = compose()
+            signature = simhash([part.weights for part in parts])
+            if not window.near(signature):
+                break
+            self.regenerated += 1
+        else:
+            self.near_duplicates += 1
+            logger.debug(f"No distinct content for {sender} after {self.attempts} attempts")
+        window.add(signature)
+        return parts, signature
+
+    def generate(self, sender: str) -> GeneratedContent:
+        def compose():
+            return [
+                self.rng.choice(self.subjects),
+                self.rng.choice(self.openers),
+                *self.rng.sample(self.body, self.rng.randint(1, 3)),
+                self.rng.choice(self.closers),
+            ]
+
+        parts, signature = self._pick(sender, compose)
+        subject, opener, *body, closer = parts
+        paragraph = " ".join([opener.text] + [sentence.text for sentence in body])
+        return GeneratedContent(subject.text, f"{paragraph}\n\n{closer.text}", signature)
+
+    def reply(
+        self,
+        sender: str,
+        subject: str,
+        message_id: Optional[str] = None,
+        references: Sequence[str] = ()
+    ) -> GeneratedReply:
+        """A short reply to ``subject``, threaded under ``message_id``"""
+        parts, _ = self._pick(sender, lambda: self.rng.sample(self.replies, self.rng.randint(1, 2)))
+        if not subject.lower().startswith("re:"):
+            subject = f"Re: {subject}"
+        headers = {}
+        if message_id:
+            headers["In-Reply-To"] = message_id
+            headers["References"] = " ".join([*references, message_id])
+        return GeneratedReply(subject, " ".join(part.text for part in parts), headers)
+
+    def response_text(self) -> str:
+        if not self._loaded:
+            self.load()
+        return " ".join(part.text for part in self.rng.sample(self.replies, self.rng.randint(1, 2)))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "accounts": len(self._windows),
+            "regenerated": self.regenerated,
+            "near_duplicates_sent": self.near_duplicates,
+        }
+
+
+content_generator = ContentGenerator()
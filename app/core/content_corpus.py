@@ -0,0 +1,114 @@
+"""Built-in text the content generator is trained on.
+
+Sentences may contain ``{slot}`` placeholders, filled from ``SLOTS`` when
+variants are precomputed.
+"""
+
+SLOTS = {
+    "topic": [
+        "the Q3 roadmap", "the onboarding flow", "the vendor contract", "the budget review",
+        "the website refresh", "the hiring plan", "the customer survey", "the pricing update",
+        "the migration", "the launch checklist", "the partner proposal", "the quarterly report",
+        "the support backlog", "the training sessions", "the office move", "the analytics dashboard",
+        "the newsletter", "the release notes", "the security review", "the team offsite",
+    ],
+    "day": [
+        "Monday", "Tuesday", "Wednesday", "Thursday", "Friday",
+        "tomorrow", "later this week", "early next week",
+    ],
+    "doc": [
+        "the draft", "the spreadsheet", "the slides", "the notes from the call", "the proposal",
+        "the summary", "the latest figures", "the timeline", "the outline", "the checklist",
+    ],
+    "team": [
+        "design", "finance", "marketing", "the product team", "engineering",
+        "sales", "operations", "legal",
+    ],
+}
+
+SUBJECTS = [
+    "Quick question about {topic}",
+    "Following up on {topic}",
+    "Update on {topic}",
+    "Thoughts on {topic}?",
+    "Checking in on {topic}",
+    "{doc} for {topic}",
+    "Next steps for {topic}",
+    "Catching up before {day}",
+    "Notes from {team}",
+    "A few ideas on {topic}",
+    "Can we talk about {topic}?",
+    "Small change to {topic}",
+    "Re-sharing {doc}",
+    "Plan for {day}",
+    "Feedback from {team}",
+]
+
+OPENERS = [
+    "I hope this email finds you well.",
+    "Hope your week is going well.",
+    "Thanks again for your time on the last call.",
+    "I wanted to follow up on our previous discussion about {topic}.",
+    "Just checking in to see how things are progressing on your end.",
+    "I've been reviewing the latest updates on {topic} and had a few thoughts to share.",
+    "Quick note before {day}.",
+    "I came across something that might be relevant to {topic}.",
+    "Following up on what {team} mentioned earlier.",
+    "Hope you had a good start to the week.",
+]
+
+BODY = [
+    "I put together {doc} and would love your feedback when you get a chance.",
+    "The main open question is whether we can wrap up {topic} before {day}.",
+    "{team} is on board with the plan but asked for a bit more detail on the timeline.",
+    "I think we should keep the scope small for now and revisit it after {topic} is done.",
+    "Could you take a look at {doc} and let me know if anything is missing?",
+    "We made good progress on {topic} this week and most of the blockers are cleared.",
+    "I added a few comments to {doc} that we can go through together.",
+    "It would help to get a quick sign-off from {team} before we move forward.",
+    "The numbers look better than expected, so I think we are in good shape.",
+    "Let me know if {day} still works for a short call to go over the details.",
+    "I'm happy to take the first pass at {doc} if that makes things easier for you.",
+    "One thing I noticed is that {topic} depends on a couple of items from {team}.",
+    "We can probably simplify the process by merging the two review steps.",
+    "I shared {doc} with {team} so they have the same context as we do.",
+    "There are still a few rough edges, but nothing that should hold us up.",
+    "If we agree on the approach, I can start on {topic} right away.",
+    "I'd like to get your take on the priorities before we commit to anything.",
+    "The feedback so far has been positive, especially from {team}.",
+    "I moved the remaining items for {topic} to {day} to give everyone more time.",
+    "Happy to adjust the plan if you see a better way to handle it.",
+    "I think the biggest risk is the timeline, so let's keep an eye on it.",
+    "We should have the final version of {doc} ready by {day}.",
+    "Most of the work is done and the rest should be quick to finish.",
+    "I'll send over {doc} once I've cleaned it up a little.",
+    "It might be worth looping in {team} since they worked on something similar.",
+]
+
+CLOSERS = [
+    "Let me know what you think.",
+    "Looking forward to hearing your thoughts.",
+    "Thanks in advance for taking a look.",
+    "Talk soon.",
+    "Let me know if you have any questions.",
+    "Happy to discuss whenever suits you.",
+    "Thanks for your help with this.",
+    "Let me know if {day} works for you.",
+]
+
+REPLIES = [
+    "Thanks for the update, this looks good to me.",
+    "Thanks for sending this over, I'll take a closer look {day}.",
+    "Sounds good, let's go with that plan.",
+    "Appreciate the quick follow-up.",
+    "Great, thanks for pulling {doc} together.",
+    "That works for me, and I'll let {team} know as well.",
+    "Thanks, I had a quick look and it all makes sense.",
+    "Good catch, I agree we should keep the scope small.",
+    "Thanks for the heads up about {topic}.",
+    "I'll review {doc} and get back to you by {day}.",
+    "Makes sense to me, happy to move forward.",
+    "Thanks, I'll share this with {team}.",
+    "Perfect, {day} works for a quick call.",
+    "Thanks for checking in, everything is on track here.",
+]
@@ -0,0 +1,198 @@
+import asyncio
+import random
+from datetime import datetime
+from enum import Enum
+from typing import NamedTuple, Optional
+import aiosmtplib
+import logging
+from .config import settings
+from .rate_limiter import enhanced_status, is_auth_failure, is_temporary, reply_code
+from .scheduler import JobScheduler
+from ..database.mongodb import MongoDB
+from ..database.counters import AccountCounters
+from ..models.email_account import WarmupStatus
+
+logger = logging.getLogger(__name__)
+
+CONNECTION_ERRORS = (
+    aiosmtplib.SMTPConnectError,
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPTimeoutError,
+    asyncio.TimeoutError,
+    OSError,
+)
+
+# Anything else escaping a send is a bug, not a delivery failure worth retrying
+DELIVERY_ERRORS = (aiosmtplib.SMTPException, *CONNECTION_ERRORS)
+
+
+class FailureKind(str, Enum):
+    TRANSIENT = "transient"
+    PERMANENT = "permanent"
+    AUTH = "auth"
+    CONNECTION = "connection"
+
+
+class SendResult(NamedTuple):
+    """Outcome of one send; truthy when the message was accepted"""
+    ok: bool
+    kind: Optional[FailureKind] = None
+    code: Optional[int] = None
+    status: Optional[str] = None
+    message: Optional[str] = None
+    message_id: Optional[str] = None
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+    @property
+    def retryable(self) -> bool:
+        return self.kind in (FailureKind.TRANSIENT, FailureKind.CONNECTION)
+
+    @property
+    def bounced(self) -> bool:
+        # A permanent failure without a reply is our own error, not the recipient's
+        return self.kind == FailureKind.PERMANENT and self.code is not None
+
+    @classmethod
+    def sent(cls, message_id: Optional[str] = None) -> "SendResult":
+        return cls(ok=True, message_id=message_id)
+
+    @classmethod
+    def from_error(cls, error: Exception, message_id: Optional[str] = None) -> "SendResult":
+        code = reply_code(error)
+        if is_auth_failure(error) and not is_temporary(error):
+            kind = FailureKind.AUTH
+        elif code is not None:
+            kind = FailureKind.TRANSIENT if code < 500 else FailureKind.PERMANENT
+        elif isinstance(error, CONNECTION_ERRORS):
+            kind = FailureKind.CONNECTION
+        elif isinstance(error, DELIVERY_ERRORS):
+            kind = FailureKind.TRANSIENT
+        else:
+            logger.error(f"Unexpected {type(error).__name__} while sending, not retrying: {str(error)}")
+            kind = FailureKind.PERMANENT
+        return cls(
+            ok=False,
+            kind=kind,
+            code=code,
+            status=enhanced_status(error),
+            message=str(error) or type(error).__name__,
+            message_id=message_id
+        )
+
+    def to_document(self) -> dict:
+        return {
+            "ok": self.ok,
+            "kind": self.kind.value if self.kind else None,
+            "code": self.code,
+            "status": self.status,
+            "message": self.message
+        }
+
+
+class RetryQueue:
+    """Persistent retries for failed sends, with dead-lettering.
+
+    Transient and connection failures are re-queued as scheduler jobs
+    after an exponential, jittered backoff, with the attempt number in the
+    payload; they survive restarts like any other job. Permanent bounces,
+    auth failures and sends that exhaust ``RETRY_MAX_ATTEMPTS`` go to
+    ``dead_letters`` instead of being tried again on the next cycle.
+    Bounces are counted against the sender, and an auth failure takes the
+    sending account out of rotation until its credentials are fixed.
+    """
+
+    @staticmethod
+    def backoff(attempt: int) -> float:
+        delay = min(settings.RETRY_BASE_DELAY * 2 ** (attempt - 1), settings.RETRY_MAX_DELAY)
+        return delay * random.uniform(0.8, 1.2)
+
+    @staticmethod
+    def should_retry(result: SendResult, attempt: int) -> bool:
+        return result.retryable and attempt < settings.RETRY_MAX_ATTEMPTS
+
+    @staticmethod
+    async def settle(
+        kind: str,
+        payload: dict,
+        result: SendResult,
+        sender: str,
+        recipient: str,
+        attempt: int
+    ) -> bool:
+        """Bookkeeping for failed attempt number ``attempt``; True if it should be retried"""
+        if result.bounced:
+            await RetryQueue.record_bounce(sender, recipient, result)
+        elif result.kind == FailureKind.AUTH:
+            await RetryQueue.suspend_sender(sender, result)
+
+        if RetryQueue.should_retry(result, attempt):
+            return True
+        await RetryQueue.dead_letter(kind, payload, result, sender, recipient, attempt)
+        return False
+
+    @staticmethod
+    async def handle_failure(
+        kind: str,
+        payload: dict,
+        result: SendResult,
+        sender: str,
+        recipient: str,
+        shard: Optional[int] = None
+    ) -> Optional[str]:
+        """Re-queue a failed send job or dead-letter it; returns the retry job id"""
+        attempt = payload.get("attempt", 0) + 1
+        if not await RetryQueue.settle(kind, payload, result, sender, recipient, attempt):
+            return None
+        return await JobScheduler.schedule(
+            kind,
+            {**payload, "attempt": attempt},
+            delay=RetryQueue.backoff(attempt),
+            shard=shard
+        )
+
+    @staticmethod
+    async def dead_letter(
+        kind: str,
+        payload: dict,
+        result: SendResult,
+        sender: str,
+        recipient: str,
+        attempts: int
+    ):
+        await MongoDB.db.dead_letters.insert_one({
+            "kind": kind,
+            "payload": payload,
+            "from_email": sender,
+            "to_email": recipient,
+            "attempts": attempts,
+            "result": result.to_document(),
+            "created_at": datetime.utcnow()
+        })
+        logger.info(f"Dead-lettered {kind} {sender} -> {recipient} after {attempts} attempts: {result.message}")
+
+    @staticmethod
+    async def record_bounce(sender: str, recipient: str, result: SendResult):
+        await MongoDB.db.email_metrics.update_one(
+            {"email": sender},
+            {"$inc": {"bounce_count": 1}, "$set": {"last_updated": datetime.utcnow()}},
+            upsert=True
+        )
+        await AccountCounters.record(sender, bounced=1)
+
+    @staticmethod
+    async def suspend_sender(sender: str, result: SendResult):
+        await MongoDB.db.email_accounts.update_one(
+            {"email": sender, "status": WarmupStatus.ACTIVE},
+            {
+                "$set": {
+                    "status": WarmupStatus.FAILED,
+                    "validation.valid": False,
+                    "validation.smtp_error": f"Authentication failed: {result.message}",
+                    "validation.checked_at": datetime.utcnow(),
+                    "updated_at": datetime.utcnow()
+                }
+            }
+        )
+        logger.error(f"Suspended {sender} after SMTP authentication failure")
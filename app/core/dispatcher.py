@@ -0,0 +1,96 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Set
+import logging
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CampaignDispatcher:
+    """Fan send jobs out across accounts with bounded concurrency.
+
+    A job holds its account slot, then its provider slot, then a global slot
+    while it runs, so one slow SMTP server only ever ties up its own slots.
+    ``submit`` blocks once ``max_pending`` jobs are queued or running, which
+    keeps a large campaign from materialising every job up front. Leaving the
+    ``async with`` block waits for all jobs; an error or cancellation in the
+    block cancels whatever is still outstanding.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = settings.DISPATCH_MAX_CONCURRENCY,
+        per_account_concurrency: int = settings.DISPATCH_PER_ACCOUNT_CONCURRENCY,
+        per_provider_concurrency: int = settings.DISPATCH_PER_PROVIDER_CONCURRENCY,
+        max_pending: int = settings.DISPATCH_MAX_PENDING,
+    ):
+        self.per_account_concurrency = per_account_concurrency
+        self.per_provider_concurrency = per_provider_concurrency
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._pending = asyncio.Semaphore(max_pending)
+        self._accounts: Dict[str, asyncio.Semaphore] = {}
+        self._providers: Dict[str, asyncio.Semaphore] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._results: List[Any] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.cancel()
+        await self.join()
+
+    @staticmethod
+    def _slot(slots: Dict[str, asyncio.Semaphore], key: str, size: int) -> asyncio.Semaphore:
+        slot = slots.get(key)
+        if slot is None:
+            slot = asyncio.Semaphore(size)
+            slots[key] = slot
+        return slot
+
+    async def submit(
+        self,
+        account_key: str,
+        provider_key: str,
+        job: Callable[[], Awaitable[Any]]
+    ) -> asyncio.Task:
+        """Schedule ``job``, waiting first if too many jobs are outstanding"""
+        await self._pending.acquire()
+        task = asyncio.create_task(self._run(account_key, provider_key, job))
+        self._tasks.add(task)
+        task.add_done_callback(self._finished)
+        return task
+
+    def _finished(self, task: asyncio.Task):
+        # Runs however the task ends, including a cancel before its first step
+        self._tasks.discard(task)
+        self._pending.release()
+
+    async def _run(self, account_key: str, provider_key: str, job: Callable[[], Awaitable[Any]]):
+        account_slot = self._slot(self._accounts, account_key, self.per_account_concurrency)
+        provider_slot = self._slot(self._providers, provider_key, self.per_provider_concurrency)
+        try:
+            async with account_slot, provider_slot, self._global:
+                result = await job()
+            self._results.append(result)
+            return result
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Dispatch job for {account_key} failed: {str(e)}")
+            self._results.append(e)
+
+    @property
+    def outstanding(self) -> int:
+        return len(self._tasks)
+
+    async def join(self) -> List[Any]:
+        """Wait for every submitted job and return their results"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        return self._results
+
+    def cancel(self):
+        for task in list(self._tasks):
+            task.cancel()
@@ -0,0 +1,181 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str]
+
+# Answers that say the record doesn't exist; these are cached negatively
+NEGATIVE_ANSWERS = (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer)
+
+
+class DNSLookupError(Exception):
+    """The lookup failed (timeout, no reachable nameserver), not a negative answer"""
+
+
+class CachedResolver:
+    """Async DNS lookups with a TTL-respecting LRU cache.
+
+    Answers are cached for their record TTL, clamped to
+    ``[min_ttl, max_ttl]``; NXDOMAIN and empty answers are cached as empty
+    for ``negative_ttl``. Failures such as timeouts are raised as
+    ``DNSLookupError`` and never cached. Concurrent lookups of the same
+    name share one query, and at most ``concurrency`` queries are in
+    flight. ``resolver`` defaults to dnspython's async resolver; anything
+    with the same ``resolve(name, rdtype, lifetime=...)`` coroutine works,
+    e.g. one pointed at a local stub nameserver.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = settings.DNS_CACHE_SIZE,
+        min_ttl: int = settings.DNS_MIN_TTL,
+        max_ttl: int = settings.DNS_MAX_TTL,
+        negative_ttl: int = settings.DNS_NEGATIVE_TTL,
+        concurrency: int = settings.DNS_CONCURRENCY,
+        timeout: float = settings.DNS_TIMEOUT,
+        resolver=None,
+    ):
+        self.max_entries = max_entries
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.timeout = timeout
+        self._resolver = resolver
+        self._limit = asyncio.Semaphore(concurrency)
+        self._cache: "OrderedDict[CacheKey, Tuple[float, List[str]]]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def resolver(self):
+        # Created lazily: reading resolv.conf at import time breaks hosts without one
+        if self._resolver is None:
+            self._resolver = dns.asyncresolver.Resolver()
+        return self._resolver
+
+    def _cached(self, key: CacheKey) -> Optional[List[str]]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires, records = entry
+        if expires <= time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return records
+
+    def _store(self, key: CacheKey, records: List[str], ttl: float):
+        self._cache[key] = (time.monotonic() + ttl, records)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    async def _query(self, key: CacheKey) -> List[str]:
+        name, rdtype = key
+        async with self._limit:
+            try:
+                answer = await self.resolver.resolve(name, rdtype, lifetime=self.timeout)
+            except NEGATIVE_ANSWERS:
+                self._store(key, [], self.negative_ttl)
+                return []
+            except dns.exception.DNSException as e:
+                raise DNSLookupError(f"{rdtype} lookup for {name} failed: {str(e) or type(e).__name__}") from e
+        records = [record.to_text() for record in answer]
+        ttl = min(max(answer.rrset.ttl, self.min_ttl), self.max_ttl)
+        self._store(key, records, ttl)
+        return records
+
+    async def resolve(self, name: str, rdtype: str = "A") -> List[str]:
+        """Record texts for ``name``; empty if the name or record doesn't exist"""
+        key = (name.lower().rstrip("."), rdtype.upper())
+        records = self._cached(key)
+        if records is not None:
+            self.hits += 1
+            return records
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        future = asyncio.ensure_future(self._query(key))
+        self._inflight[key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def resolve_many(
+        self,
+        queries: Iterable[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], Optional[List[str]]]:
+        """Resolve many (name, rdtype) pairs; failed lookups map to None"""
+        queries = list(dict.fromkeys(queries))
+
+        async def resolve_one(name, rdtype):
+            try:
+                return await self.resolve(name, rdtype)
+            except DNSLookupError as e:
+                logger.error(f"DNS lookup failed: {str(e)}")
+                return None
+
+        results = await asyncio.gather(*(resolve_one(name, rdtype) for name, rdtype in queries))
+        return dict(zip(queries, results))
+
+    async def host_exists(self, host: str) -> bool:
+        if await self.resolve(host, "A"):
+            return True
+        return bool(await self.resolve(host, "AAAA"))
+
+    async def mx(self, domain: str) -> List[Tuple[int, str]]:
+        records = []
+        for text in await self.resolve(domain, "MX"):
+            preference, exchange = text.split(None, 1)
+            records.append((int(preference), exchange.rstrip(".")))
+        return sorted(records)
+
+    async def _txt(self, name: str) -> List[str]:
+        # TXT records come back quoted and possibly split into several strings
+        return ["".join(part.strip('"') for part in text.split('" "')) for text in await self.resolve(name, "TXT")]
+
+    async def spf(self, domain: str) -> Optional[str]:
+        return next((t for t in await self._txt(domain) if t.lower().startswith("v=spf1")), None)
+
+    async def dmarc(self, domain: str) -> Optional[str]:
+        return next((t for t in await self._txt(f"_dmarc.{domain}") if t.lower().startswith("v=dmarc1")), None)
+
+    async def dkim(self, domain: str, selectors: Iterable[str] = settings.DNS_DKIM_SELECTORS) -> Dict[str, str]:
+        """DKIM keys published under the given selectors, by selector"""
+        selectors = list(selectors)
+        found = await asyncio.gather(*(self._txt(f"{s}._domainkey.{domain}") for s in selectors))
+        return {
+            selector: next(t for t in texts if "p=" in t)
+            for selector, texts in zip(selectors, found)
+            if any("p=" in t for t in texts)
+        }
+
+    async def diagnose(self, domain: str, selectors: Iterable[str] = settings.DNS_DKIM_SELECTORS) -> dict:
+        """MX, SPF, DKIM and DMARC for a sending domain, looked up concurrently"""
+        mx, spf, dkim, dmarc = await asyncio.gather(
+            self.mx(domain), self.spf(domain), self.dkim(domain, selectors), self.dmarc(domain)
+        )
+        return {
+            "domain": domain,
+            "mx": [{"preference": p, "exchange": e} for p, e in mx],
+            "spf": spf,
+            "dkim": dkim,
+            "dmarc": dmarc
+        }
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+dns_cache = CachedResolver()
@@ -0,0 +1,163 @@
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+from uuid import uuid4
+import logging
+from pymongo import UpdateOne
+from .config import settings
+from ..database.mongodb import MongoDB
+
+logger = logging.getLogger(__name__)
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+LEASE_FIELDS = {"lease_id": "", "leased_by": "", "lease_expires_at": ""}
+
+
+class EmailPool:
+    """Lease-based access to campaign targets in ``email_pool``.
+
+    Pending targets are leased in batches: the candidates are read in one
+    query and flipped to ``leased`` with a per-batch lease id in one
+    ``update_many`` whose filter re-checks ``status``, so a target can only
+    ever end up in one worker's batch. Claimed targets carry their
+    ``lease_id`` and every later update is scoped to it, so a worker whose
+    lease expired (and was reclaimed by ``reclaim_expired`` and handed to
+    someone else) can no longer touch the target. Holders settle each
+    target as soon as its send finishes and call ``renew`` right before
+    sending, which both extends the lease and confirms it is still theirs.
+    Targets whose send failed transiently go back to ``pending`` with a
+    ``retry_at`` before which they aren't claimed again.
+    """
+
+    @staticmethod
+    async def claim_batch(
+        campaign_id: str,
+        limit: int,
+        lease_seconds: int = settings.EMAIL_POOL_LEASE_SECONDS
+    ) -> List[dict]:
+        claimed: List[dict] = []
+        for _ in range(settings.EMAIL_POOL_CLAIM_ATTEMPTS):
+            wanted = limit - len(claimed)
+            if wanted <= 0:
+                break
+
+            candidates = await MongoDB.db.email_pool.find({
+                "campaign_id": campaign_id,
+                "status": "pending",
+                "retry_at": {"$not": {"$gt": datetime.utcnow()}}
+            }).limit(wanted).to_list(wanted)
+            if not candidates:
+                break
+
+            lease_id = uuid4().hex
+            result = await MongoDB.db.email_pool.update_many(
+                {"_id": {"$in": [c["_id"] for c in candidates]}, "status": "pending"},
+                {
+                    "$set": {
+                        "status": "leased",
+                        "lease_id": lease_id,
+                        "leased_by": WORKER_ID,
+                        "lease_expires_at": datetime.utcnow() + timedelta(seconds=lease_seconds)
+                    }
+                }
+            )
+
+            if result.modified_count == len(candidates):
+                claimed.extend({**c, "status": "leased", "lease_id": lease_id} for c in candidates)
+                continue
+
+            # Another worker won some of the candidates; keep only ours
+            if result.modified_count:
+                claimed.extend(
+                    await MongoDB.db.email_pool.find({"lease_id": lease_id}).to_list(wanted)
+                )
+        return claimed
+
+    @staticmethod
+    def _held(targets: List[dict]) -> dict:
+        """Filter matching ``targets`` only while they're under the lease they were claimed with"""
+        by_lease: Dict[str, List] = {}
+        for target in targets:
+            by_lease.setdefault(target["lease_id"], []).append(target["_id"])
+        leases = [{"_id": {"$in": ids}, "lease_id": lease_id} for lease_id, ids in by_lease.items()]
+        if len(leases) == 1:
+            return {**leases[0], "status": "leased"}
+        return {"$or": leases, "status": "leased"}
+
+    @staticmethod
+    async def renew(
+        targets: List[dict],
+        lease_seconds: int = settings.EMAIL_POOL_LEASE_SECONDS
+    ) -> int:
+        """Extend the leases on ``targets``; returns how many are still held"""
+        if not targets:
+            return 0
+        result = await MongoDB.db.email_pool.update_many(
+            EmailPool._held(targets),
+            {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=lease_seconds)}}
+        )
+        return result.matched_count
+
+    @staticmethod
+    async def mark_sent(targets: List[dict]) -> int:
+        if not targets:
+            return 0
+        result = await MongoDB.db.email_pool.update_many(
+            EmailPool._held(targets),
+            {"$set": {"status": "sent", "sent_at": datetime.utcnow()}, "$unset": LEASE_FIELDS}
+        )
+        return result.modified_count
+
+    @staticmethod
+    async def release(targets: List[dict]) -> int:
+        """Hand leased targets back to the pool without sending"""
+        if not targets:
+            return 0
+        result = await MongoDB.db.email_pool.update_many(
+            EmailPool._held(targets),
+            {"$set": {"status": "pending"}, "$unset": LEASE_FIELDS}
+        )
+        return result.modified_count
+
+    @staticmethod
+    async def retry_later(entries: List[Tuple[dict, float]]) -> int:
+        """Put leased targets back as ``pending`` after a per-target delay in seconds"""
+        if not entries:
+            return 0
+        now = datetime.utcnow()
+        result = await MongoDB.db.email_pool.bulk_write([
+            UpdateOne(
+                EmailPool._held([target]),
+                {
+                    "$set": {"status": "pending", "retry_at": now + timedelta(seconds=delay)},
+                    "$inc": {"attempts": 1},
+                    "$unset": LEASE_FIELDS
+                }
+            )
+            for target, delay in entries
+        ], ordered=False)
+        return result.modified_count
+
+    @staticmethod
+    async def mark_dead(targets: List[dict]) -> int:
+        """Retire leased targets that bounced or ran out of retries"""
+        if not targets:
+            return 0
+        result = await MongoDB.db.email_pool.update_many(
+            EmailPool._held(targets),
+            {"$set": {"status": "dead", "failed_at": datetime.utcnow()}, "$unset": LEASE_FIELDS}
+        )
+        return result.modified_count
+
+    @staticmethod
+    async def reclaim_expired() -> int:
+        """Return leases whose holder never completed them to ``pending``"""
+        result = await MongoDB.db.email_pool.update_many(
+            {"status": "leased", "lease_expires_at": {"$lt": datetime.utcnow()}},
+            {"$set": {"status": "pending"}, "$unset": LEASE_FIELDS}
+        )
+        if result.modified_count:
+            logger.info(f"Reclaimed {result.modified_count} expired email pool leases")
+        return result.modified_count
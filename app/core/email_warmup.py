@@ -1,11 +1,17 @@
 import asyncio
 from datetime import datetime, timedelta
-from typing import List
-import aiosmtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from functools import partial
+from typing import List, Optional
 from ..models.email import EmailAccount, EmailCampaign, EmailLog
 from ..database.mongodb import MongoDB
+from ..database.log_sink import log_sink
+from ..database.counters import AccountCounters
+from .smtp_pool import smtp_pool
+from .rate_limiter import send_limiter, reply_code
+from .delivery import RetryQueue, SendResult
+from .templates import compile_text
+from .dispatcher import CampaignDispatcher
+from .email_pool import EmailPool
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,26 +19,21 @@ logger = logging.getLogger(__name__)
 class EmailWarmupManager:
     @staticmethod
     async def send_email(email_account: EmailAccount, to_email: str, subject: str, content: str) -> bool:
+        return bool(await EmailWarmupManager.deliver(email_account, to_email, subject, content))
+
+    @staticmethod
+    async def deliver(email_account: EmailAccount, to_email: str, subject: str, content: str) -> SendResult:
+        """Send one message and classify the outcome"""
+        message = compile_text(subject, content).render(email_account.email, to_email)
         try:
-            message = MIMEMultipart()
-            message["From"] = email_account.email
-            message["To"] = to_email
-            message["Subject"] = subject
-            
-            message.attach(MIMEText(content, "plain"))
-            
-            async with aiosmtplib.SMTP(
-                hostname=email_account.smtp_server,
-                port=email_account.smtp_port,
-                use_tls=True
-            ) as smtp:
-                await smtp.login(email_account.username, email_account.password)
-                await smtp.send_message(message)
-            
-            return True
+            await send_limiter.send(
+                email_account,
+                lambda: smtp_pool.sendmail(email_account, message.sender, [message.recipient], message.data)
+            )
         except Exception as e:
-            logger.error(f"Error sending email: {str(e)}")
-            return False
+            logger.error(f"Error sending email ({reply_code(e) or 'no reply'}): {str(e)}")
+            return SendResult.from_error(e, message.message_id)
+        return SendResult.sent(message.message_id)
 
     @staticmethod
     async def process_campaign(campaign_id: str):
@@ -47,54 +48,77 @@ class EmailWarmupManager:
         if not email_accounts:
             return
         
-        for account in email_accounts:
-            emails_sent_today = await MongoDB.db.email_logs.count_documents({
-                "from_email": account["email"],
-                "sent_at": {"$gte": datetime.utcnow() - timedelta(days=1)}
-            })
-            
-            if emails_sent_today >= account["daily_limit"]:
-                continue
-                
-            emails_to_send = min(
-                account["daily_limit"] - emails_sent_today,
-                campaign["target_daily_emails"] - campaign["current_daily_emails"]
-            )
-            
-            for _ in range(emails_to_send):
-                # Get target email from pool
-                target_email = await MongoDB.db.email_pool.find_one({
-                    "campaign_id": campaign_id,
-                    "status": "pending"
-                })
+        await EmailPool.reclaim_expired()
+        sent_today = await AccountCounters.sent_in_last_day(
+            account["email"] for account in email_accounts
+        )
+        
+        async with CampaignDispatcher() as dispatcher:
+            for account in email_accounts:
+                emails_sent_today = sent_today[account["email"]]
                 
-                if not target_email:
+                if emails_sent_today >= account["daily_limit"]:
                     continue
-                
-                success = await EmailWarmupManager.send_email(
-                    EmailAccount(**account),
-                    target_email["email"],
-                    "Test Email for Warmup",
-                    "This is a test email for warming up the email account."
+                    
+                emails_to_send = min(
+                    account["daily_limit"] - emails_sent_today,
+                    campaign["target_daily_emails"] - campaign["current_daily_emails"]
                 )
                 
-                if success:
-                    await MongoDB.db.email_logs.insert_one({
-                        "campaign_id": campaign_id,
-                        "from_email": account["email"],
-                        "to_email": target_email["email"],
-                        "subject": "Test Email for Warmup",
-                        "sent_at": datetime.utcnow(),
-                        "delivered": True,
-                        "opened": False,
-                        "replied": False
-                    })
-                    
-                    await MongoDB.db.email_pool.update_one(
-                        {"_id": target_email["_id"]},
-                        {"$set": {"status": "sent"}}
+                targets = await EmailPool.claim_batch(campaign_id, emails_to_send)
+                sender = EmailAccount(**account)
+                for target in targets:
+                    await dispatcher.submit(
+                        sender.email,
+                        sender.smtp_server.lower(),
+                        partial(EmailWarmupManager._send_campaign_email, campaign_id, sender, target)
                     )
 
+    @staticmethod
+    async def _send_campaign_email(campaign_id: str, sender: EmailAccount, target: dict) -> Optional[SendResult]:
+        # Paced sends can sit in the dispatcher for a while; only send while the lease is still ours
+        if not await EmailPool.renew([target]):
+            logger.warning(f"Lease on campaign target {target['_id']} expired before sending; skipping")
+            return None
+
+        result = await EmailWarmupManager.deliver(
+            sender,
+            target["email"],
+            "Test Email for Warmup",
+            "This is a test email for warming up the email account."
+        )
+        
+        if result:
+            await log_sink.write("email_logs", {
+                "campaign_id": campaign_id,
+                "from_email": sender.email,
+                "to_email": target["email"],
+                "subject": "Test Email for Warmup",
+                "message_id": result.message_id,
+                "sent_at": datetime.utcnow(),
+                "delivered": True,
+                "opened": False,
+                "replied": False
+            })
+            await AccountCounters.record(sender.email, sent=1, delivered=1)
+            await EmailPool.mark_sent([target])
+            return result
+        
+        attempt = target.get("attempts", 0) + 1
+        retry = await RetryQueue.settle(
+            "campaign.send",
+            {"campaign_id": campaign_id, "target_id": target["_id"]},
+            result,
+            sender.email,
+            target["email"],
+            attempt
+        )
+        if retry:
+            await EmailPool.retry_later([(target, RetryQueue.backoff(attempt))])
+        else:
+            await EmailPool.mark_dead([target])
+        return result
+
     @staticmethod
     async def update_warmup_stage(email_account_id: str):
         account = await MongoDB.db.email_accounts.find_one({"_id": email_account_id})
@@ -110,24 +134,16 @@ class EmailWarmupManager:
                     "$inc": {
                         "warmup_stage": 1,
                         "daily_limit": 10
-                    }
+                    },
+                    "$set": {"updated_at": datetime.utcnow()}
                 }
             )
 
     @staticmethod
     async def calculate_success_rate(email: str) -> float:
-        total_logs = await MongoDB.db.email_logs.count_documents({
-            "from_email": email,
-            "sent_at": {"$gte": datetime.utcnow() - timedelta(days=7)}
-        })
+        totals = await AccountCounters.daily_totals(email, days=7)
         
-        if total_logs == 0:
+        if totals["sent"] == 0:
             return 0.0
-            
-        successful_deliveries = await MongoDB.db.email_logs.count_documents({
-            "from_email": email,
-            "sent_at": {"$gte": datetime.utcnow() - timedelta(days=7)},
-            "delivered": True
-        })
         
-        return successful_deliveries / total_logs
+        return totals["delivered"] / totals["sent"]
@@ -0,0 +1,133 @@
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional
+import logging
+from .batching import KeyedBatcher
+from .config import settings
+from .imap_sessions import IMAPSessionPool, imap_pool
+from .placement import HEADER_FETCH, parse_message_ids, search_message_ids, uid_set
+
+logger = logging.getLogger(__name__)
+
+# Engagement actions that are a flag on the message
+ACTION_FLAGS = {
+    "read": "\\Seen",
+    "mark_important": "\\Flagged",
+}
+MOVE_TO_INBOX = "move_to_primary"
+
+
+class PendingAction(NamedTuple):
+    message_id: str
+    actions: FrozenSet[str]
+
+
+class EngagementExecutor:
+    """Perform engagement actions on received warmup mail over IMAP.
+
+    Actions are collected per account for up to ``batch_delay`` seconds
+    (or ``batch_size`` messages) and carried out in one pooled IMAP
+    session. In each folder the messages are found with one UID SEARCH on
+    their Message-IDs, then every action type is a single command over a
+    UID set: ``UID STORE +FLAGS.SILENT (\\Seen)`` for reads,
+    ``(\\Flagged)`` for important marks, and ``UID MOVE`` to INBOX for
+    messages that landed in spam. Servers without MOVE get COPY, a
+    \\Deleted flag and an expunge instead.
+    """
+
+    def __init__(
+        self,
+        pool: IMAPSessionPool = imap_pool,
+        batch_size: int = settings.ENGAGEMENT_BATCH_SIZE,
+        batch_delay: float = settings.ENGAGEMENT_BATCH_DELAY,
+        folders: Optional[Dict[str, str]] = None,
+    ):
+        self.pool = pool
+        self.folders = folders or {"inbox": "INBOX", "spam": settings.IMAP_SPAM_FOLDER}
+        self._batcher = KeyedBatcher(self.process_batch, batch_size, batch_delay)
+        self.sessions = 0
+        self.commands = 0
+        self.performed: Dict[str, int] = {}
+
+    async def perform(self, account, message_id: str, actions: Iterable[str]) -> Optional[str]:
+        """Apply ``actions`` to ``message_id`` in ``account``'s mailbox.
+
+        Returns where the message was found ("inbox" or "spam"), or None if
+        it isn't in any of the folders.
+        """
+        return await self._batcher.submit(
+            account.email, account, PendingAction(message_id, frozenset(actions))
+        )
+
+    async def process_batch(self, account, batch: List[PendingAction]) -> List[Optional[str]]:
+        actions_of: Dict[str, FrozenSet[str]] = {}
+        for request in batch:
+            actions_of[request.message_id] = actions_of.get(request.message_id, frozenset()) | request.actions
+
+        found: Dict[str, str] = {}
+        self.sessions += 1
+        async with self.pool.session(account) as client:
+            for placement, folder in self.folders.items():
+                wanted = [message_id for message_id in actions_of if message_id not in found]
+                if not wanted:
+                    break
+                uids = await self._locate(client, folder, wanted)
+                for message_id in uids:
+                    found[message_id] = placement
+                await self._apply(client, placement, uids, actions_of)
+        return [found.get(request.message_id) for request in batch]
+
+    async def _locate(self, client, folder: str, message_ids: List[str]) -> Dict[str, int]:
+        """Message-ID -> UID for the given messages in ``folder``"""
+        response = await client.select(folder)
+        if response.result != "OK":
+            return {}
+        response = await client.uid_search(*search_message_ids(message_ids), charset=None)
+        uids = bytes(response.lines[0]).split() if response.lines else []
+        if not uids:
+            return {}
+        response = await client.uid("fetch", b",".join(uids).decode(), HEADER_FETCH)
+        wanted = set(message_ids)
+        return {
+            message_id: uid
+            for uid, message_id in parse_message_ids(response.lines).items()
+            if message_id in wanted
+        }
+
+    async def _apply(self, client, placement: str, uids: Dict[str, int], actions_of: Dict[str, FrozenSet[str]]):
+        by_action: Dict[str, List[int]] = {}
+        for message_id, uid in uids.items():
+            for action in actions_of[message_id]:
+                by_action.setdefault(action, []).append(uid)
+
+        # Flags first: they travel with the message when it is moved
+        for action, flag in ACTION_FLAGS.items():
+            if action in by_action:
+                await self._command(client.uid("store", uid_set(by_action[action]), "+FLAGS.SILENT", f"({flag})"))
+                self._count(action, len(by_action[action]))
+
+        if placement == "spam" and MOVE_TO_INBOX in by_action:
+            await self._move(client, uid_set(by_action[MOVE_TO_INBOX]), self.folders["inbox"])
+            self._count(MOVE_TO_INBOX, len(by_action[MOVE_TO_INBOX]))
+
+    async def _move(self, client, uids: str, mailbox: str):
+        if client.has_capability("MOVE"):
+            await self._command(client.uid("move", uids, mailbox))
+            return
+        await self._command(client.uid("copy", uids, mailbox))
+        await self._command(client.uid("store", uids, "+FLAGS.SILENT", "(\\Deleted)"))
+        if client.has_capability("UIDPLUS"):
+            await self._command(client.uid("expunge", uids))
+        else:
+            await self._command(client.expunge())
+
+    async def _command(self, pending):
+        self.commands += 1
+        response = await pending
+        if response.result != "OK":
+            raise RuntimeError(f"IMAP command failed: {response.lines[-1:]}")
+        return response
+
+    def _count(self, action: str, messages: int):
+        self.performed[action] = self.performed.get(action, 0) + messages
+
+    def stats(self) -> dict:
+        return {"sessions": self.sessions, "commands": self.commands, "performed": dict(self.performed)}
@@ -0,0 +1,122 @@
+import asyncio
+from typing import Dict, Iterable, List, Optional
+import aioimaplib
+import logging
+from .config import settings
+from .imap_sessions import IMAPSessionPool, imap_pool
+from .placement import PlacementChecker, PlacementMatch, placement_checker
+
+logger = logging.getLogger(__name__)
+
+
+class IdleListener:
+    """Hold an IMAP IDLE connection per account and push new warmup arrivals.
+
+    Each watched account gets its own connection parked in IDLE on INBOX.
+    When the server announces new mail the listener leaves IDLE, runs the
+    incremental placement scan on that same connection and puts every
+    matched warmup message on ``events``. IDLE is renewed before the
+    server's 30 minute cutoff, and the spam folder, which can't be watched
+    on the same connection, is scanned through the session pool every
+    ``spam_scan_interval`` seconds. Servers without IDLE are polled.
+    """
+
+    def __init__(
+        self,
+        checker: PlacementChecker = placement_checker,
+        pool: IMAPSessionPool = imap_pool,
+        idle_renew: float = settings.IMAP_IDLE_RENEW_INTERVAL,
+        spam_scan_interval: float = settings.IMAP_SPAM_SCAN_INTERVAL,
+        max_queued_events: int = settings.IMAP_IDLE_MAX_QUEUED_EVENTS,
+    ):
+        self.checker = checker
+        self.pool = pool
+        self.idle_renew = idle_renew
+        self.spam_scan_interval = spam_scan_interval
+        self.events: asyncio.Queue = asyncio.Queue(maxsize=max_queued_events)
+        self._watchers: Dict[str, asyncio.Task] = {}
+
+    @property
+    def watching(self) -> int:
+        return len(self._watchers)
+
+    def watch(self, account):
+        if account.email not in self._watchers:
+            self._watchers[account.email] = asyncio.create_task(self._watch(account))
+
+    def watch_many(self, accounts: Iterable):
+        for account in accounts:
+            self.watch(account)
+
+    def unwatch(self, email: str):
+        task = self._watchers.pop(email, None)
+        if task is not None:
+            task.cancel()
+
+    async def stop(self):
+        tasks = list(self._watchers.values())
+        self._watchers.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _publish(self, matches: List[PlacementMatch]):
+        for match in matches:
+            await self.events.put(match)
+
+    async def _scan(self, client, account, placement: str):
+        folder = self.checker.folders[placement]
+        found = await self.checker.scan_folder(client, account.email, folder)
+        await self._publish(await self.checker.record(account.email, {placement: list(found.values())}))
+
+    async def _scan_spam(self, account):
+        async with self.pool.session(account) as client:
+            await self._scan(client, account, "spam")
+
+    async def _watch(self, account):
+        backoff = 1
+        while True:
+            client: Optional[aioimaplib.IMAP4_SSL] = None
+            try:
+                client = await self.pool.open_dedicated(account)
+                backoff = 1
+                await self._listen(client, account)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"IDLE listener for {account.email} failed: {str(e)}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 300)
+            finally:
+                if client is not None:
+                    try:
+                        await client.logout()
+                    except Exception:
+                        pass
+
+    async def _listen(self, client, account):
+        loop = asyncio.get_running_loop()
+        supports_idle = client.has_capability("IDLE")
+        last_spam_scan = loop.time()
+
+        # Catch up on anything that arrived while we weren't listening
+        await self._scan(client, account, "inbox")
+        await self._scan_spam(account)
+
+        while True:
+            if supports_idle:
+                idle = await client.idle_start(timeout=self.idle_renew)
+                push = await client.wait_server_push(timeout=self.idle_renew + 60)
+                client.idle_done()
+                await asyncio.wait_for(idle, timeout=client.timeout)
+                has_new_mail = isinstance(push, list) and any(b"EXISTS" in bytes(line) for line in push)
+            else:
+                await asyncio.sleep(settings.IMAP_POLL_INTERVAL)
+                has_new_mail = True
+
+            if has_new_mail:
+                await self._scan(client, account, "inbox")
+
+            if loop.time() - last_spam_scan >= self.spam_scan_interval:
+                await self._scan_spam(account)
+                last_spam_scan = loop.time()
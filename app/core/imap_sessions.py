@@ -0,0 +1,121 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Tuple
+import aioimaplib
+import logging
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+SessionKey = Tuple[str, int, str]
+
+
+class IMAPSession:
+    """A logged-in IMAP connection kept open between checks"""
+
+    def __init__(self, key: SessionKey, client: aioimaplib.IMAP4_SSL):
+        self.key = key
+        self.client = client
+        self.last_used = time.monotonic()
+
+    @property
+    def idle_for(self) -> float:
+        return time.monotonic() - self.last_used
+
+    @property
+    def is_open(self) -> bool:
+        return self.client.get_state() in ("AUTH", "SELECTED")
+
+    async def close(self):
+        try:
+            await self.client.logout()
+        except Exception:
+            pass
+
+
+class IMAPSessionPool:
+    """One persistent IMAP session per (imap_server, port, username).
+
+    IMAP sessions are stateful (the selected mailbox), so callers get
+    exclusive use of an account's session for the duration of the
+    ``async with`` block. Sessions idle past ``health_check_interval`` are
+    probed with NOOP before reuse, sessions idle past ``idle_timeout`` are
+    closed, and any error inside the block discards the session so the next
+    caller reconnects.
+    """
+
+    def __init__(
+        self,
+        idle_timeout: float = settings.IMAP_SESSION_IDLE_TIMEOUT,
+        health_check_interval: float = settings.IMAP_SESSION_HEALTH_CHECK_INTERVAL,
+        timeout: float = settings.IMAP_TIMEOUT,
+        imap_factory: Callable[..., aioimaplib.IMAP4_SSL] = aioimaplib.IMAP4_SSL,
+    ):
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+        self._imap_factory = imap_factory
+        self._sessions: Dict[SessionKey, IMAPSession] = {}
+        self._locks: Dict[SessionKey, asyncio.Lock] = {}
+
+    @staticmethod
+    def key_for(account) -> SessionKey:
+        return (account.imap_server.lower(), account.imap_port, account.username)
+
+    async def open_dedicated(self, account) -> aioimaplib.IMAP4_SSL:
+        """Log in a connection that is not pooled, e.g. one parked in IDLE"""
+        client = self._imap_factory(account.imap_server, account.imap_port, timeout=self.timeout)
+        await client.wait_hello_from_server()
+        response = await client.login(account.username, account.password)
+        if response.result != "OK":
+            raise aioimaplib.Abort(f"IMAP login failed for {account.username}")
+        return client
+
+    async def _connect(self, key: SessionKey, account) -> IMAPSession:
+        return IMAPSession(key, await self.open_dedicated(account))
+
+    async def _is_healthy(self, session: IMAPSession) -> bool:
+        if not session.is_open or session.idle_for >= self.idle_timeout:
+            return False
+        if session.idle_for < self.health_check_interval:
+            return True
+        try:
+            response = await session.client.noop()
+            return response.result == "OK"
+        except Exception:
+            return False
+
+    @asynccontextmanager
+    async def session(self, account) -> AsyncIterator[aioimaplib.IMAP4_SSL]:
+        key = self.key_for(account)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            session = self._sessions.pop(key, None)
+            if session is not None and not await self._is_healthy(session):
+                await session.close()
+                session = None
+            if session is None:
+                session = await self._connect(key, account)
+
+            try:
+                yield session.client
+            except BaseException:
+                await session.close()
+                raise
+            session.last_used = time.monotonic()
+            self._sessions[key] = session
+
+    async def evict_idle(self):
+        for key, session in list(self._sessions.items()):
+            if session.idle_for >= self.idle_timeout and not self._locks[key].locked():
+                del self._sessions[key]
+                await session.close()
+
+    async def close_all(self):
+        sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            await session.close()
+
+
+imap_pool = IMAPSessionPool()
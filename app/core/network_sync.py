@@ -0,0 +1,165 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Optional
+import logging
+from bson import Timestamp
+from pymongo.errors import OperationFailure, PyMongoError
+from .config import settings
+from .roster import reputation_of
+from ..database.counters import AccountCounters
+from ..database.mongodb import MongoDB
+
+logger = logging.getLogger(__name__)
+
+CHANGE_STREAMS_UNSUPPORTED = (40573, 40324)
+
+
+class NetworkSync:
+    """Keep a warmup engine's network in step with ``email_accounts``.
+
+    ``load`` streams active accounts into the engine in cursor batches rather
+    than materialising the whole collection. ``run`` then follows a change
+    stream so pause, resume and delete take effect immediately; the stream
+    starts at the cluster time read before the load, so changes made during
+    the scan aren't missed. Against a standalone server (no change streams)
+    it falls back to polling for documents whose ``updated_at`` moved, with
+    a periodic id reconciliation to catch deletes that polling can't see.
+    Member reputations are recomputed from the placement counters every
+    ``reputation_interval`` seconds, since those don't live on the account.
+    """
+
+    def __init__(
+        self,
+        engine,
+        batch_size: int = settings.NETWORK_LOAD_BATCH_SIZE,
+        poll_interval: float = settings.NETWORK_POLL_INTERVAL,
+        reconcile_interval: float = settings.NETWORK_RECONCILE_INTERVAL,
+        reputation_interval: float = settings.NETWORK_REPUTATION_REFRESH_INTERVAL,
+    ):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.reconcile_interval = reconcile_interval
+        self.reputation_interval = reputation_interval
+        self._emails_by_id: Dict[Any, str] = {}
+        self._last_seen: datetime = datetime.min
+        self._resume_token: Optional[dict] = None
+        self._start_at: Optional[Timestamp] = None
+
+    def apply(self, document: dict):
+        """Add, refresh or drop one account according to its current state"""
+        self._emails_by_id[document["_id"]] = document["email"]
+        if document.get("updated_at") and document["updated_at"] > self._last_seen:
+            self._last_seen = document["updated_at"]
+        if document.get("status") == "active":
+            self.engine.upsert_account(document)
+        else:
+            self.engine.remove_account(document["email"])
+
+    def _forget(self, account_id):
+        email = self._emails_by_id.pop(account_id, None)
+        if email is not None:
+            self.engine.remove_account(email)
+
+    @staticmethod
+    async def _operation_time() -> Optional[Timestamp]:
+        """The cluster's current operation time; None on a standalone server"""
+        try:
+            reply = await MongoDB.db.command("ping")
+        except PyMongoError as e:
+            logger.warning(f"Could not read the cluster time: {str(e)}")
+            return None
+        return reply.get("operationTime")
+
+    async def load(self) -> int:
+        self._start_at = await self._operation_time()
+        loaded = 0
+        cursor = MongoDB.db.email_accounts.find({"status": "active"}).batch_size(self.batch_size)
+        async for document in cursor:
+            self.apply(document)
+            loaded += 1
+        logger.info(f"Loaded {loaded} active accounts into the warmup network")
+        await self.refresh_reputation()
+        return loaded
+
+    async def refresh_reputation(self) -> int:
+        """Reweight members from their recent inbox/spam counts; returns how many changed"""
+        emails = list(self.engine.active_accounts)
+        changed = 0
+        for start in range(0, len(emails), self.batch_size):
+            totals = await AccountCounters.daily_totals_many(
+                emails[start:start + self.batch_size],
+                settings.NETWORK_REPUTATION_WINDOW_DAYS
+            )
+            for email, counts in totals.items():
+                if self.engine.set_reputation(email, reputation_of(counts["delivered"], counts["spam"])):
+                    changed += 1
+        if changed:
+            logger.info(f"Reweighted {changed} network members by inbox placement")
+        return changed
+
+    async def _refresh_reputation_forever(self):
+        while True:
+            await asyncio.sleep(self.reputation_interval)
+            try:
+                await self.refresh_reputation()
+            except PyMongoError as e:
+                logger.error(f"Reputation refresh failed: {str(e)}")
+
+    async def run(self):
+        refresher = asyncio.create_task(self._refresh_reputation_forever())
+        try:
+            await self._follow()
+        finally:
+            refresher.cancel()
+
+    async def _follow(self):
+        while True:
+            try:
+                await self._follow_change_stream()
+            except OperationFailure as e:
+                if e.code in CHANGE_STREAMS_UNSUPPORTED:
+                    logger.info("Change streams unavailable, polling email_accounts instead")
+                    await self._poll()
+                    return
+                logger.error(f"Account change stream failed: {str(e)}")
+            except PyMongoError as e:
+                logger.error(f"Account change stream failed: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _follow_change_stream(self):
+        if self._resume_token is not None:
+            start = {"resume_after": self._resume_token}
+        elif self._start_at is not None:
+            start = {"start_at_operation_time": self._start_at}
+        else:
+            start = {}
+        async with MongoDB.db.email_accounts.watch(full_document="updateLookup", **start) as stream:
+            async for change in stream:
+                self._resume_token = stream.resume_token
+                if change["operationType"] == "delete":
+                    self._forget(change["documentKey"]["_id"])
+                elif change.get("fullDocument"):
+                    self.apply(change["fullDocument"])
+
+    async def _poll(self):
+        loop = asyncio.get_running_loop()
+        last_reconcile = loop.time()
+        while True:
+            cursor = MongoDB.db.email_accounts.find(
+                {"updated_at": {"$gt": self._last_seen}}
+            ).sort("updated_at", 1).batch_size(self.batch_size)
+            async for document in cursor:
+                self.apply(document)
+
+            if loop.time() - last_reconcile >= self.reconcile_interval:
+                await self._reconcile()
+                last_reconcile = loop.time()
+            await asyncio.sleep(self.poll_interval)
+
+    async def _reconcile(self):
+        existing = set()
+        async for document in MongoDB.db.email_accounts.find({}, {"_id": 1}).batch_size(self.batch_size):
+            existing.add(document["_id"])
+        for account_id in set(self._emails_by_id) - existing:
+            self._forget(account_id)
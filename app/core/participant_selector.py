@@ -0,0 +1,300 @@
+import random
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from .config import settings
+from .utils import get_email_domain
+from ..database.counters import day_bucket
+from ..database.mongodb import MongoDB
+
+DUPLICATE_KEY = 11000
+
+
+class AliasTable:
+    """Walker/Vose alias table: O(n) to build, O(1) per weighted draw"""
+
+    def __init__(self, weights: Sequence[float]):
+        n = len(weights)
+        total = float(sum(weights))
+        self.prob = [0.0] * n
+        self.alias = [0] * n
+        if n == 0 or total <= 0:
+            return
+
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def draw(self, rng: random.Random) -> int:
+        i = rng.randrange(len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+
+class _ProviderGroup:
+    """Members of one provider in a swap-remove array with a lazy alias table"""
+
+    def __init__(self):
+        self.members: List[Any] = []
+        self.weights: List[float] = []
+        self.table: Optional[AliasTable] = None
+
+    @property
+    def total_weight(self) -> float:
+        return sum(self.weights)
+
+    def draw(self, rng: random.Random) -> Any:
+        if self.table is None:
+            self.table = AliasTable(self.weights)
+        return self.members[self.table.draw(rng)]
+
+
+class ReceiveLedger:
+    """Daily receive caps and pairing cooldowns, kept in this process.
+
+    Only correct while a single process picks recipients; workers that
+    share a network use ``SharedReceiveLedger``.
+    """
+
+    def __init__(
+        self,
+        daily_receive_cap: int = settings.WARMUP_DAILY_RECEIVE_CAP,
+        pairing_cooldown: float = settings.WARMUP_PAIRING_COOLDOWN,
+    ):
+        self.daily_receive_cap = daily_receive_cap
+        self.pairing_cooldown = pairing_cooldown
+        self._received: Dict[str, int] = {}
+        self._received_day = date.today()
+        self._recent_pairs: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+
+    def _roll_day(self):
+        today = date.today()
+        if today != self._received_day:
+            self._received = {}
+            self._received_day = today
+
+    def _expire_pairs(self, now: float):
+        while self._recent_pairs:
+            pair, expires = next(iter(self._recent_pairs.items()))
+            if expires > now:
+                break
+            del self._recent_pairs[pair]
+
+    async def reserve(self, sender_email: str, recipients: List[str]) -> List[str]:
+        """Take a receive slot and a pairing for each recipient that has both free"""
+        self._roll_day()
+        now = time.monotonic()
+        self._expire_pairs(now)
+        expires = now + self.pairing_cooldown
+        accepted = []
+        for email in recipients:
+            if self._received.get(email, 0) >= self.daily_receive_cap:
+                continue
+            if (sender_email, email) in self._recent_pairs:
+                continue
+            self._received[email] = self._received.get(email, 0) + 1
+            self._recent_pairs[(sender_email, email)] = expires
+            accepted.append(email)
+        return accepted
+
+
+class SharedReceiveLedger(ReceiveLedger):
+    """Receive caps and pairing cooldowns shared by every worker through MongoDB.
+
+    A recipient's receipts for the day are a ``received`` counter on its
+    daily ``account_counters`` bucket, taken with a conditional upsert: once
+    the cap is reached the filter stops matching and the upsert collides
+    with the bucket's unique key, so concurrent workers can't overshoot.
+    Pairings are ``warmup_pairs`` documents that expire by TTL. Only the
+    worker owning a sender pairs it, so pairings are read before writing.
+    """
+
+    async def reserve(self, sender_email: str, recipients: List[str]) -> List[str]:
+        now = datetime.utcnow()
+        cooling = {
+            pair["recipient"]
+            async for pair in MongoDB.db.warmup_pairs.find(
+                {"sender": sender_email, "recipient": {"$in": recipients}, "until": {"$gt": now}},
+                {"_id": 0, "recipient": 1}
+            )
+        }
+        candidates = [email for email in recipients if email not in cooling]
+        if not candidates:
+            return []
+
+        bucket = day_bucket(now)
+        refused: Set[str] = set()
+        try:
+            await MongoDB.db.account_counters.bulk_write([
+                UpdateOne(
+                    {
+                        "email": email,
+                        "granularity": "day",
+                        "bucket": bucket,
+                        "received": {"$not": {"$gte": self.daily_receive_cap}}
+                    },
+                    {"$inc": {"received": 1}},
+                    upsert=True
+                )
+                for email in candidates
+            ], ordered=False)
+        except BulkWriteError as e:
+            errors = e.details["writeErrors"]
+            if any(error["code"] != DUPLICATE_KEY for error in errors):
+                raise
+            refused = {candidates[error["index"]] for error in errors}
+
+        accepted = [email for email in candidates if email not in refused]
+        if accepted and self.pairing_cooldown > 0:
+            until = now + timedelta(seconds=self.pairing_cooldown)
+            await MongoDB.db.warmup_pairs.bulk_write([
+                UpdateOne(
+                    {"sender": sender_email, "recipient": email},
+                    {"$set": {"until": until}},
+                    upsert=True
+                )
+                for email in accepted
+            ], ordered=False)
+        return accepted
+
+
+class ParticipantSelector:
+    """Pick warmup recipients in O(k) per cycle instead of O(network size).
+
+    Members live in per-provider arrays; removal swaps the last member into
+    the freed slot so the arrays stay dense. A draw first picks a provider
+    with probability proportional to ``total_reputation ** diversity``
+    (1.0 is plain reputation weighting, 0.0 spreads mail evenly across
+    providers), then a member of that provider by reputation, both via alias
+    tables that are rebuilt only after membership changes. Candidates that
+    are the sender or already chosen are redrawn, and same-domain pairs are
+    kept with ``same_domain_acceptance`` probability. The rest are offered
+    to the ``ledger`` in batches; those at their daily receive cap or paired
+    with the sender within the cooldown are refused and replaced.
+    """
+
+    def __init__(
+        self,
+        daily_receive_cap: int = settings.WARMUP_DAILY_RECEIVE_CAP,
+        pairing_cooldown: float = settings.WARMUP_PAIRING_COOLDOWN,
+        diversity: float = settings.WARMUP_PROVIDER_DIVERSITY,
+        same_domain_acceptance: float = 0.25,
+        rng: Optional[random.Random] = None,
+        ledger: Optional[ReceiveLedger] = None,
+    ):
+        self.ledger = ledger or ReceiveLedger(daily_receive_cap, pairing_cooldown)
+        self.diversity = diversity
+        self.same_domain_acceptance = same_domain_acceptance
+        self._rng = rng or random.Random()
+        self._groups: Dict[str, _ProviderGroup] = {}
+        self._position: Dict[str, Tuple[str, int]] = {}
+        self._providers: List[str] = []
+        self._provider_table: Optional[AliasTable] = None
+
+    def __len__(self) -> int:
+        return len(self._position)
+
+    def __contains__(self, email: str) -> bool:
+        return email in self._position
+
+    def __iter__(self) -> Iterator[Any]:
+        for group in self._groups.values():
+            yield from group.members
+
+    @staticmethod
+    def provider_of(member) -> str:
+        return member.provider
+
+    def add(self, member, reputation: float = 1.0):
+        """Add or replace a member; reputation scales how often it is picked"""
+        if member.email in self._position:
+            self.remove(member.email)
+        provider = self.provider_of(member)
+        group = self._groups.get(provider)
+        if group is None:
+            group = self._groups[provider] = _ProviderGroup()
+        self._position[member.email] = (provider, len(group.members))
+        group.members.append(member)
+        group.weights.append(max(reputation, 1e-6))
+        group.table = None
+        self._provider_table = None
+
+    def reweight(self, email: str, reputation: float) -> bool:
+        """Change a member's reputation in place"""
+        position = self._position.get(email)
+        if position is None:
+            return False
+        provider, index = position
+        group = self._groups[provider]
+        group.weights[index] = max(reputation, 1e-6)
+        group.table = None
+        self._provider_table = None
+        return True
+
+    def remove(self, email: str) -> bool:
+        position = self._position.pop(email, None)
+        if position is None:
+            return False
+        provider, index = position
+        group = self._groups[provider]
+        last = len(group.members) - 1
+        if index != last:
+            group.members[index] = group.members[last]
+            group.weights[index] = group.weights[last]
+            self._position[group.members[index].email] = (provider, index)
+        group.members.pop()
+        group.weights.pop()
+        group.table = None
+        if not group.members:
+            del self._groups[provider]
+        self._provider_table = None
+        return True
+
+    def _draw_provider(self) -> _ProviderGroup:
+        if self._provider_table is None:
+            self._providers = list(self._groups)
+            self._provider_table = AliasTable([
+                self._groups[p].total_weight ** self.diversity for p in self._providers
+            ])
+        return self._groups[self._providers[self._provider_table.draw(self._rng)]]
+
+    async def select(self, sender_email: str, count: int) -> List[Any]:
+        """Draw up to ``count`` distinct recipients for ``sender_email``"""
+        available = len(self) - (1 if sender_email in self else 0)
+        count = min(count, available)
+        sender_domain = get_email_domain(sender_email).lower()
+        chosen: Dict[str, Any] = {}
+        refused: Set[str] = set()
+        attempts = 0
+        max_attempts = count * settings.WARMUP_SELECTION_ATTEMPTS_PER_PICK
+        while len(chosen) < count and attempts < max_attempts:
+            batch: Dict[str, Any] = {}
+            while len(chosen) + len(batch) < count and attempts < max_attempts:
+                attempts += 1
+                candidate = self._draw_provider().draw(self._rng)
+                email = candidate.email
+                if email == sender_email or email in chosen or email in batch or email in refused:
+                    continue
+                if (candidate.domain == sender_domain
+                        and self._rng.random() >= self.same_domain_acceptance):
+                    continue
+                batch[email] = candidate
+            if not batch:
+                break
+            accepted = set(await self.ledger.reserve(sender_email, list(batch)))
+            for email, candidate in batch.items():
+                if email in accepted:
+                    chosen[email] = candidate
+                else:
+                    refused.add(email)
+        return list(chosen.values())
@@ -0,0 +1,233 @@
+import asyncio
+import re
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import logging
+from pymongo import UpdateOne
+from .config import settings
+from .imap_sessions import IMAPSessionPool, imap_pool
+from ..database.mongodb import MongoDB
+from ..database.counters import AccountCounters
+
+logger = logging.getLogger(__name__)
+
+UIDVALIDITY_RE = re.compile(rb"\[UIDVALIDITY (\d+)\]")
+UIDNEXT_RE = re.compile(rb"\[UIDNEXT (\d+)\]")
+FETCH_UID_RE = re.compile(rb"FETCH \(.*?UID (\d+)")
+MESSAGE_ID_RE = re.compile(rb"Message-ID:\s*(<[^>\r\n]+>)", re.IGNORECASE)
+
+HEADER_FETCH = "(UID BODY.PEEK[HEADER.FIELDS (MESSAGE-ID)])"
+
+
+class FolderState(NamedTuple):
+    uidvalidity: int
+    last_uid: int
+
+
+class PlacementMatch(NamedTuple):
+    message_id: str
+    sender: str
+    recipient: str
+    placement: str
+
+
+def parse_select(lines: Iterable[bytes]) -> Tuple[Optional[int], Optional[int]]:
+    """Return (UIDVALIDITY, UIDNEXT) from a SELECT response"""
+    uidvalidity = uidnext = None
+    for line in lines:
+        line = bytes(line)
+        match = UIDVALIDITY_RE.search(line)
+        if match:
+            uidvalidity = int(match.group(1))
+        match = UIDNEXT_RE.search(line)
+        if match:
+            uidnext = int(match.group(1))
+    return uidvalidity, uidnext
+
+
+def parse_message_ids(lines: Iterable[bytes]) -> Dict[int, str]:
+    """Map UID -> Message-ID from a header-only UID FETCH response"""
+    found: Dict[int, str] = {}
+    uid = None
+    for line in lines:
+        line = bytes(line)
+        match = FETCH_UID_RE.search(line)
+        if match:
+            uid = int(match.group(1))
+        match = MESSAGE_ID_RE.search(line)
+        if match and uid is not None:
+            found[uid] = match.group(1).decode()
+    return found
+
+
+def search_message_ids(message_ids: List[str]) -> List[str]:
+    """UID SEARCH criteria matching any of ``message_ids``, in one command"""
+    keys = []
+    for message_id in message_ids:
+        keys += ["HEADER", "Message-ID", f'"{message_id}"']
+    return ["OR"] * (len(message_ids) - 1) + keys
+
+
+def uid_set(uids: Iterable[int]) -> str:
+    """Compact IMAP sequence set: [1, 2, 3, 7] -> '1:3,7'"""
+    ranges = []
+    for uid in sorted(set(uids)):
+        if ranges and uid == ranges[-1][1] + 1:
+            ranges[-1][1] = uid
+        else:
+            ranges.append([uid, uid])
+    return ",".join(f"{low}:{high}" if low != high else str(low) for low, high in ranges)
+
+
+class PlacementChecker:
+    """Find where warmup messages landed by scanning only new mail.
+
+    For each folder the last scanned UID is kept per UIDVALIDITY in
+    ``imap_sync_state``. A check SELECTs the folder and, when UIDNEXT shows
+    nothing new, stops there; otherwise it fetches just the Message-ID header
+    of the new UIDs and matches them against the Message-IDs recorded in
+    ``email_logs``. A changed UIDVALIDITY (mailbox rebuilt) resets the state.
+    """
+
+    def __init__(
+        self,
+        pool: IMAPSessionPool = imap_pool,
+        concurrency: int = settings.IMAP_CHECK_CONCURRENCY,
+        folders: Optional[Dict[str, str]] = None,
+    ):
+        self.pool = pool
+        self.concurrency = concurrency
+        self.folders = folders or {"inbox": "INBOX", "spam": settings.IMAP_SPAM_FOLDER}
+        self._state: Dict[Tuple[str, str], FolderState] = {}
+
+    async def _load_state(self, email: str, folder: str) -> Optional[FolderState]:
+        state = self._state.get((email, folder))
+        if state is None:
+            document = await MongoDB.db.imap_sync_state.find_one({"email": email, "folder": folder})
+            if document:
+                state = FolderState(document["uidvalidity"], document["last_uid"])
+                self._state[(email, folder)] = state
+        return state
+
+    async def _save_state(self, email: str, folder: str, state: FolderState):
+        self._state[(email, folder)] = state
+        await MongoDB.db.imap_sync_state.update_one(
+            {"email": email, "folder": folder},
+            {"$set": {
+                "uidvalidity": state.uidvalidity,
+                "last_uid": state.last_uid,
+                "checked_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
+
+    async def scan_folder(self, client, email: str, folder: str) -> Dict[int, str]:
+        """Return UID -> Message-ID for messages that arrived since the last scan"""
+        response = await client.select(folder)
+        if response.result != "OK":
+            return {}
+        uidvalidity, uidnext = parse_select(response.lines)
+        state = await self._load_state(email, folder)
+        if state is not None and state.uidvalidity != uidvalidity:
+            state = None
+
+        if state is None:
+            # First sight of this folder: only look back a little
+            since = (datetime.utcnow() - timedelta(days=settings.IMAP_INITIAL_LOOKBACK_DAYS))
+            response = await client.uid_search("SINCE", since.strftime("%d-%b-%Y"), charset=None)
+            uids = [int(uid) for uid in bytes(response.lines[0]).split()] if response.lines else []
+            last_uid = min(uids) - 1 if uids else (uidnext or 1) - 1
+        else:
+            last_uid = state.last_uid
+
+        if uidnext is not None and uidnext - 1 <= last_uid:
+            await self._save_state(email, folder, FolderState(uidvalidity, last_uid))
+            return {}
+
+        response = await client.uid("fetch", f"{last_uid + 1}:*", HEADER_FETCH)
+        # "n:*" always matches the newest message even if its UID is below n
+        message_ids = {
+            uid: message_id
+            for uid, message_id in parse_message_ids(response.lines).items()
+            if uid > last_uid
+        }
+        newest = max(message_ids, default=last_uid)
+        if uidnext is not None:
+            newest = max(newest, uidnext - 1)
+        await self._save_state(email, folder, FolderState(uidvalidity, newest))
+        return message_ids
+
+    async def check(self, account, placements: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """Scan an account's folders and record where warmup mail landed"""
+        placements = list(placements or self.folders)
+        found: Dict[str, List[str]] = {}
+        async with self.pool.session(account) as client:
+            for placement in placements:
+                scanned = await self.scan_folder(client, account.email, self.folders[placement])
+                found[placement] = list(scanned.values())
+        matches = await self.record(account.email, found)
+        counts = {placement: 0 for placement in placements}
+        for match in matches:
+            counts[match.placement] += 1
+        return counts
+
+    async def check_many(self, accounts: List) -> Dict[str, Dict[str, int]]:
+        """Check many accounts concurrently, at most ``concurrency`` at a time"""
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def check_one(account):
+            async with limit:
+                try:
+                    return account.email, await self.check(account)
+                except Exception as e:
+                    logger.error(f"Error checking inbox for {account.email}: {str(e)}")
+                    return account.email, None
+
+        results = await asyncio.gather(*(check_one(account) for account in accounts))
+        return {email: counts for email, counts in results if counts is not None}
+
+    async def record(self, recipient: str, found: Dict[str, List[str]]) -> List[PlacementMatch]:
+        """Match scanned Message-IDs to sent warmup mail and record placements"""
+        message_ids = [mid for ids in found.values() for mid in ids]
+        if not message_ids:
+            return []
+
+        placement_of = {mid: placement for placement, ids in found.items() for mid in ids}
+        logs = await MongoDB.db.email_logs.find(
+            {"message_id": {"$in": message_ids}, "to_email": recipient},
+            {"message_id": 1, "from_email": 1}
+        ).to_list(None)
+        if not logs:
+            return []
+
+        matches = []
+        per_sender: Dict[str, Dict[str, int]] = {}
+        updates = []
+        for log in logs:
+            placement = placement_of[log["message_id"]]
+            matches.append(PlacementMatch(log["message_id"], log["from_email"], recipient, placement))
+            sender = per_sender.setdefault(log["from_email"], {"inbox": 0, "spam": 0})
+            sender[placement] = sender.get(placement, 0) + 1
+            updates.append(UpdateOne(
+                {"_id": log["_id"]},
+                {"$set": {"placement": placement, "delivered": placement == "inbox"}}
+            ))
+        await MongoDB.db.email_logs.bulk_write(updates, ordered=False)
+
+        await MongoDB.db.email_metrics.bulk_write([
+            UpdateOne(
+                {"email": sender},
+                {
+                    "$inc": {"inbox_placement": hits["inbox"], "spam_count": hits["spam"]},
+                    "$set": {"last_updated": datetime.utcnow()}
+                },
+                upsert=True
+            )
+            for sender, hits in per_sender.items()
+        ], ordered=False)
+        for sender, hits in per_sender.items():
+            await AccountCounters.record(sender, delivered=hits["inbox"], spam=hits["spam"])
+        return matches
+
+
+placement_checker = PlacementChecker()
@@ -0,0 +1,237 @@
+import asyncio
+import random
+import re
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+import aiosmtplib
+import logging
+from .config import settings
+from .dns_cache import CachedResolver, DNSLookupError, dns_cache
+from .utils import get_email_domain
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Replies providers use to say "slow down": service unavailable, mailbox
+# busy, local error and insufficient storage, plus any 4.7.x policy status
+THROTTLE_CODES = {421, 450, 451, 452}
+# 454 temporary authentication failure; 530 authentication required, 534/535 credentials rejected
+AUTH_CODES = {454, 530, 534, 535}
+ENHANCED_STATUS = re.compile(r"\b([245])\.(\d{1,3})\.(\d{1,3})\b")
+
+# Second-level labels under which the registrable domain has three labels
+SHARED_SECOND_LEVEL = {"ac", "co", "com", "edu", "gov", "net", "org"}
+
+
+def reply_code(error: Exception) -> Optional[int]:
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused) and error.recipients:
+        return error.recipients[0].code
+    return getattr(error, "code", None)
+
+
+def enhanced_status(error: Exception) -> Optional[str]:
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused) and error.recipients:
+        error = error.recipients[0]
+    match = ENHANCED_STATUS.search(str(getattr(error, "message", "")))
+    return match.group(0) if match else None
+
+
+def is_temporary(error: Exception) -> bool:
+    code = reply_code(error)
+    return code is not None and 400 <= code < 500
+
+
+def is_auth_failure(error: Exception) -> bool:
+    return isinstance(error, aiosmtplib.SMTPAuthenticationError) or reply_code(error) in AUTH_CODES
+
+
+def is_throttle(error: Exception) -> bool:
+    status = enhanced_status(error)
+    return reply_code(error) in THROTTLE_CODES or bool(status and status.startswith("4.7."))
+
+
+def registrable_domain(host: str) -> str:
+    labels = host.lower().rstrip(".").split(".")
+    if len(labels) > 2 and labels[-2] in SHARED_SECOND_LEVEL and len(labels[-1]) == 2:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+class AdaptiveBucket:
+    """Token bucket whose refill rate follows AIMD.
+
+    Each success raises the rate by ``increase / rate`` (about ``increase``
+    messages/second per second of clean sending); a throttle multiplies it
+    by ``decrease`` and empties the bucket, at most once per cooldown so a
+    burst of rejections from one episode counts once.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        min_rate: float,
+        max_rate: float,
+        increase: float,
+        decrease: float,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.tokens = burst
+        self.throttles = 0
+        self._updated = time.monotonic()
+        self._last_decrease = float("-inf")
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        # The lock keeps waiters in FIFO order instead of racing for tokens
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+    def succeeded(self):
+        self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def throttled(self):
+        now = time.monotonic()
+        self.throttles += 1
+        if now - self._last_decrease < max(1.0, 1 / self.rate):
+            return
+        self._last_decrease = now
+        self._refill()
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        self.tokens = 0
+
+    def stats(self) -> Dict[str, float]:
+        return {"rate": round(self.rate, 3), "throttles": self.throttles}
+
+
+class SendRateLimiter:
+    """Pace sends per sending provider and per account, and retry throttles.
+
+    The provider of an account is the registrable domain of its domain's
+    primary MX (so custom domains hosted on one provider share its limit),
+    falling back to the domain itself. A send waits for a token from both
+    buckets. Temporary 4xx replies are retried up to ``max_retries`` times
+    with jittered exponential backoff; throttle replies (421/450/451/452,
+    4.7.x) also cut both rates. Permanent failures are raised at once.
+    """
+
+    def __init__(
+        self,
+        provider_rate: float = settings.RATE_LIMIT_PROVIDER_RATE,
+        provider_max_rate: float = settings.RATE_LIMIT_PROVIDER_MAX_RATE,
+        account_rate: float = settings.RATE_LIMIT_ACCOUNT_RATE,
+        account_max_rate: float = settings.RATE_LIMIT_ACCOUNT_MAX_RATE,
+        min_rate: float = settings.RATE_LIMIT_MIN_RATE,
+        increase: float = settings.RATE_LIMIT_INCREASE,
+        decrease: float = settings.RATE_LIMIT_DECREASE,
+        max_retries: int = settings.RATE_LIMIT_MAX_RETRIES,
+        retry_base: float = settings.RATE_LIMIT_RETRY_BASE,
+        resolver: CachedResolver = dns_cache,
+    ):
+        self.provider_rate = provider_rate
+        self.provider_max_rate = provider_max_rate
+        self.account_rate = account_rate
+        self.account_max_rate = account_max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self.resolver = resolver
+        self._providers: Dict[str, AdaptiveBucket] = {}
+        self._accounts: Dict[str, AdaptiveBucket] = {}
+        self._provider_of_domain: Dict[str, str] = {}
+
+    def _bucket(
+        self,
+        buckets: Dict[str, AdaptiveBucket],
+        key: str,
+        rate: float,
+        max_rate: float
+    ) -> AdaptiveBucket:
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = AdaptiveBucket(
+                rate=rate,
+                burst=max(1.0, rate),
+                min_rate=min(self.min_rate, rate),
+                max_rate=max_rate,
+                increase=self.increase,
+                decrease=self.decrease,
+            )
+        return bucket
+
+    async def provider_for(self, email: str) -> str:
+        domain = get_email_domain(email).lower()
+        provider = self._provider_of_domain.get(domain)
+        if provider is None:
+            try:
+                mx = await self.resolver.mx(domain)
+            except DNSLookupError as e:
+                # Don't remember the fallback; the next send tries DNS again
+                logger.error(f"Using {domain} as its own provider: {str(e)}")
+                return domain
+            provider = registrable_domain(mx[0][1]) if mx else domain
+            self._provider_of_domain[domain] = provider
+        return provider
+
+    async def send(self, account, operation: Callable[[], Awaitable[T]]) -> T:
+        """Run ``operation`` (one SMTP send) within the account's limits"""
+        provider = self._bucket(
+            self._providers, await self.provider_for(account.email), self.provider_rate, self.provider_max_rate
+        )
+        sender = self._bucket(self._accounts, account.email, self.account_rate, self.account_max_rate)
+        attempt = 0
+        while True:
+            await provider.acquire()
+            await sender.acquire()
+            try:
+                result = await operation()
+            except Exception as e:
+                throttle = is_throttle(e)
+                if throttle:
+                    provider.throttled()
+                    sender.throttled()
+                # Re-trying a login within seconds only risks a lockout; auth failures go back to the caller
+                if not is_temporary(e) or is_auth_failure(e) or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                delay = self.retry_base * 2 ** attempt * random.uniform(0.5, 1.5)
+                logger.info(
+                    f"{'Throttled' if throttle else 'Temporary failure'} sending from {account.email} "
+                    f"({reply_code(e)} {enhanced_status(e) or ''}), retry {attempt} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+            provider.succeeded()
+            sender.succeeded()
+            return result
+
+    def rates(self) -> dict:
+        throttled = [b for b in self._accounts.values() if b.rate < self.account_rate]
+        return {
+            "providers": {key: bucket.stats() for key, bucket in self._providers.items()},
+            "accounts": {
+                "tracked": len(self._accounts),
+                "below_base_rate": len(throttled),
+                "min_rate": round(min((b.rate for b in throttled), default=self.account_rate), 3)
+            }
+        }
+
+
+send_limiter = SendRateLimiter()
@@ -0,0 +1,188 @@
+import random
+from datetime import datetime
+from email.parser import BytesHeaderParser
+from email import policy
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import logging
+from .batching import KeyedBatcher
+from .config import settings
+from .content import ContentGenerator, content_generator
+from .delivery import SendResult
+from .imap_sessions import IMAPSessionPool, imap_pool
+from .placement import search_message_ids
+from .rate_limiter import SendRateLimiter, reply_code, send_limiter
+from .smtp_pool import SMTPConnectionPool, smtp_pool
+from .templates import TemplateLibrary
+from ..database.mongodb import MongoDB
+from ..database.log_sink import log_sink
+from ..database.counters import AccountCounters
+
+logger = logging.getLogger(__name__)
+
+THREAD_FETCH = "(UID BODY.PEEK[HEADER.FIELDS (MESSAGE-ID SUBJECT REFERENCES)])"
+
+_header_parser = BytesHeaderParser(policy=policy.default)
+
+
+class Thread(NamedTuple):
+    """What a reply needs to know about the message it answers"""
+    message_id: str
+    subject: str
+    references: Tuple[str, ...] = ()
+
+
+class PendingReply(NamedTuple):
+    recipient: object
+    message_id: str
+
+
+def parse_threads(lines: Iterable[bytes]) -> Dict[str, Thread]:
+    """Map Message-ID -> Thread from a header-only UID FETCH response"""
+    threads: Dict[str, Thread] = {}
+    for line in lines:
+        # Header blocks arrive as literals; status lines are plain bytes
+        if not isinstance(line, bytearray):
+            continue
+        headers = _header_parser.parsebytes(bytes(line))
+        message_id = str(headers.get("Message-ID", "")).strip()
+        if not message_id:
+            continue
+        threads[message_id] = Thread(
+            message_id,
+            str(headers.get("Subject", "")),
+            tuple(str(headers.get("References", "")).split())
+        )
+    return threads
+
+
+class ReplyPipeline:
+    """Threaded replies to received warmup mail, batched per replying account.
+
+    Engagement jobs that decide to reply call ``reply`` and wait. Requests
+    for the same replying account are collected for up to ``batch_delay``
+    seconds (or ``batch_size`` requests) and handled together: one pooled
+    IMAP session finds all the originals with a single UID SEARCH per
+    folder and fetches their Subject/Message-ID/References in one UID
+    FETCH, then the replies go out one after another over the account's
+    pooled SMTP session with In-Reply-To and References set. Originals the
+    mailbox doesn't show fall back to the subject and references recorded
+    in ``email_logs`` when they were sent.
+    """
+
+    def __init__(
+        self,
+        templates: Optional[TemplateLibrary] = None,
+        generator: ContentGenerator = content_generator,
+        imap: IMAPSessionPool = imap_pool,
+        smtp: SMTPConnectionPool = smtp_pool,
+        limiter: SendRateLimiter = send_limiter,
+        batch_size: int = settings.REPLY_BATCH_SIZE,
+        batch_delay: float = settings.REPLY_BATCH_DELAY,
+        folders: Optional[List[str]] = None,
+    ):
+        self.templates = templates or TemplateLibrary()
+        self.generator = generator
+        self.imap = imap
+        self.smtp = smtp
+        self.limiter = limiter
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.folders = folders or ["INBOX", settings.IMAP_SPAM_FOLDER]
+        self._batcher = KeyedBatcher(self.process_batch, batch_size, batch_delay)
+        self.batches = 0
+
+    async def reply(self, replier, recipient, message_id: str) -> SendResult:
+        """Reply from ``replier`` to the message ``message_id`` sent by ``recipient``"""
+        return await self._batcher.submit(replier.email, replier, PendingReply(recipient, message_id))
+
+    async def process_batch(self, replier, batch: List[PendingReply]) -> List[SendResult]:
+        self.batches += 1
+        message_ids = list(dict.fromkeys(request.message_id for request in batch))
+        try:
+            threads = await self.fetch_threads(replier, message_ids)
+        except Exception as e:
+            logger.error(f"Error fetching reply headers for {replier.email}: {str(e)}")
+            threads = {}
+
+        missing = [message_id for message_id in message_ids if message_id not in threads]
+        if missing:
+            threads.update(await self.logged_threads(missing))
+
+        results = []
+        for request in batch:
+            thread = threads.get(request.message_id) or Thread(request.message_id, "")
+            results.append(await self.send_reply(replier, request.recipient, thread))
+        return results
+
+    async def fetch_threads(self, account, message_ids: List[str]) -> Dict[str, Thread]:
+        """Headers of the given messages as they sit in ``account``'s mailbox"""
+        threads: Dict[str, Thread] = {}
+        async with self.imap.session(account) as client:
+            for folder in self.folders:
+                wanted = [message_id for message_id in message_ids if message_id not in threads]
+                if not wanted:
+                    break
+                response = await client.select(folder)
+                if response.result != "OK":
+                    continue
+                response = await client.uid_search(*search_message_ids(wanted), charset=None)
+                uids = bytes(response.lines[0]).split() if response.lines else []
+                if not uids:
+                    continue
+                response = await client.uid("fetch", b",".join(uids).decode(), THREAD_FETCH)
+                threads.update(parse_threads(response.lines))
+        return threads
+
+    async def logged_threads(self, message_ids: List[str]) -> Dict[str, Thread]:
+        logs = await MongoDB.db.email_logs.find(
+            {"message_id": {"$in": message_ids}},
+            {"message_id": 1, "subject": 1, "references": 1}
+        ).to_list(None)
+        return {
+            log["message_id"]: Thread(log["message_id"], log.get("subject", ""), tuple(log.get("references", ())))
+            for log in logs
+        }
+
+    @staticmethod
+    async def latest_message_id(sender: str, recipient: str) -> Optional[str]:
+        """The last warmup message ``sender`` sent to ``recipient``"""
+        log = await MongoDB.db.email_logs.find_one(
+            {"from_email": sender, "to_email": recipient, "message_id": {"$exists": True}},
+            {"message_id": 1},
+            sort=[("sent_at", -1)]
+        )
+        return log["message_id"] if log else None
+
+    async def send_reply(self, replier, recipient, thread: Thread) -> SendResult:
+        subject = thread.subject or self.generator.generate(replier.email).subject
+        reply = self.generator.reply(replier.email, subject, thread.message_id, thread.references)
+        template = random.choice(self.templates.get("warmup"))
+        message = template.render(
+            replier.email,
+            recipient.email,
+            {"subject": reply.subject, "body": reply.body},
+            headers=reply.headers
+        )
+        try:
+            await self.limiter.send(
+                replier,
+                lambda: self.smtp.sendmail(replier, message.sender, [message.recipient], message.data)
+            )
+        except Exception as e:
+            logger.error(f"Error sending reply ({reply_code(e) or 'no reply'}): {str(e)}")
+            return SendResult.from_error(e, message.message_id)
+
+        # Unbuffered, like warmup sends, so the recipient's placement scan can match it
+        await log_sink.write_now("email_logs", {
+            "from_email": replier.email,
+            "to_email": recipient.email,
+            "message_id": message.message_id,
+            "subject": reply.subject,
+            "in_reply_to": thread.message_id,
+            "references": [*thread.references, thread.message_id],
+            "sent_at": datetime.utcnow(),
+            "type": "reply",
+            "status": "sent"
+        })
+        await AccountCounters.record(replier.email, sent=1)
+        return SendResult.sent(message.message_id)
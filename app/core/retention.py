@@ -0,0 +1,127 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import List
+import logging
+from .config import settings
+from ..database.mongodb import MongoDB
+from ..database.counters import day_bucket
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_STATE_ID = "daily_summaries"
+
+
+class LogRollup:
+    """Compact raw warmup logs into one summary document per account per day.
+
+    Raw ``email_logs``/``engagement_logs`` expire through TTL indexes after
+    ``LOG_RETENTION_DAYS``; before that happens each completed day is
+    aggregated into ``daily_summaries`` so long-term history survives. A day
+    is only ever rolled up once, tracked in ``retention_state``, because
+    recomputing it after some raw logs expired would undercount. Every
+    worker runs ``run_forever``; two workers closing the same day at once
+    merge identical totals, so that race is harmless.
+    """
+
+    @staticmethod
+    async def rollup_day(day: datetime):
+        start = day_bucket(day)
+        end = start + timedelta(days=1)
+
+        await MongoDB.db.email_logs.aggregate([
+            {"$match": {"sent_at": {"$gte": start, "$lt": end}}},
+            {"$group": {
+                "_id": "$from_email",
+                "sent": {"$sum": 1},
+                "delivered": {"$sum": {"$cond": [{"$eq": ["$delivered", True]}, 1, 0]}},
+                "opened": {"$sum": {"$cond": [{"$eq": ["$opened", True]}, 1, 0]}},
+                "replied": {"$sum": {"$cond": [{"$eq": ["$replied", True]}, 1, 0]}},
+            }},
+            {"$project": {
+                "_id": 0,
+                "email": "$_id",
+                "day": start,
+                "sent": 1,
+                "delivered": 1,
+                "opened": 1,
+                "replied": 1,
+            }},
+            {"$merge": {
+                "into": "daily_summaries",
+                "on": ["email", "day"],
+                "whenMatched": "merge",
+                "whenNotMatched": "insert",
+            }},
+        ]).to_list(None)
+
+        await MongoDB.db.engagement_logs.aggregate([
+            {"$match": {"timestamp": {"$gte": start, "$lt": end}}},
+            {"$group": {
+                "_id": {"email": "$to_email", "type": "$engagement_type"},
+                "count": {"$sum": 1},
+            }},
+            {"$group": {
+                "_id": "$_id.email",
+                "engagements": {"$push": {"k": "$_id.type", "v": "$count"}},
+            }},
+            {"$project": {
+                "_id": 0,
+                "email": "$_id",
+                "day": start,
+                "engagements": {"$arrayToObject": "$engagements"},
+            }},
+            {"$merge": {
+                "into": "daily_summaries",
+                "on": ["email", "day"],
+                "whenMatched": "merge",
+                "whenNotMatched": "insert",
+            }},
+        ]).to_list(None)
+
+    @staticmethod
+    async def rollup_pending() -> List[datetime]:
+        """Roll up every completed day that hasn't been summarised yet"""
+        # Leave an hour for buffered log writes to land before closing a day
+        cutoff = day_bucket(datetime.utcnow() - timedelta(hours=1))
+        state = await MongoDB.db.retention_state.find_one({"_id": ROLLUP_STATE_ID})
+        if state:
+            day = state["last_day"] + timedelta(days=1)
+        else:
+            day = cutoff - timedelta(days=settings.LOG_RETENTION_DAYS)
+
+        rolled = []
+        while day < cutoff:
+            await LogRollup.rollup_day(day)
+            await MongoDB.db.retention_state.update_one(
+                {"_id": ROLLUP_STATE_ID},
+                {"$set": {"last_day": day, "updated_at": datetime.utcnow()}},
+                upsert=True
+            )
+            rolled.append(day)
+            day += timedelta(days=1)
+
+        if rolled:
+            logger.info(f"Rolled up warmup logs for {len(rolled)} day(s)")
+        return rolled
+
+    @staticmethod
+    async def run_forever(interval: float = settings.LOG_ROLLUP_INTERVAL):
+        while True:
+            try:
+                await LogRollup.rollup_pending()
+            except Exception as e:
+                logger.error(f"Error rolling up warmup logs: {str(e)}")
+            await asyncio.sleep(interval)
+
+
+async def main():
+    await MongoDB.connect_to_database()
+    try:
+        await LogRollup.rollup_pending()
+    finally:
+        await MongoDB.close_database_connection()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,128 @@
+import sys
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+from .config import settings
+from .utils import get_email_domain
+from ..models.email_account import EmailAccount
+from ..database.mongodb import MongoDB
+
+CREDENTIAL_FIELDS = ("smtp_server", "smtp_port", "imap_server", "imap_port", "username", "password")
+
+
+def reputation_of(delivered: int, spam: int) -> float:
+    """Smoothed inbox rate of an account's recent warmup mail, in steps of 0.05.
+
+    An account without placement results yet counts as clean. The coarse
+    steps keep day-to-day noise from reweighting the network.
+    """
+    rate = (delivered + 1) / (delivered + spam + 1)
+    return max(round(rate * 20) / 20, 0.05)
+
+
+class RosterEntry:
+    """What the warmup hot path needs to know about a network member.
+
+    Plain slotted object with no credentials, metrics or timestamps; domain
+    and provider strings are interned so thousands of members of the same
+    provider share one copy. ``reputation`` comes from the account's
+    placement counters (see ``NetworkSync.refresh_reputation``), not from
+    the account document. Full accounts are fetched from
+    ``CredentialCache`` only when a member actually sends or is checked.
+    """
+
+    __slots__ = ("id", "email", "domain", "provider", "warmup_stage", "daily_limit", "reputation")
+
+    def __init__(
+        self,
+        email: str,
+        provider: str,
+        warmup_stage: int = 1,
+        daily_limit: int = 5,
+        reputation: float = 1.0,
+        id: Optional[str] = None
+    ):
+        self.id = id
+        self.email = email
+        self.domain = sys.intern(get_email_domain(email).lower())
+        self.provider = sys.intern(provider.lower())
+        self.warmup_stage = warmup_stage
+        self.daily_limit = daily_limit
+        self.reputation = reputation
+
+    @classmethod
+    def from_document(cls, document: dict) -> "RosterEntry":
+        return cls(
+            email=document["email"],
+            provider=document["smtp_server"],
+            warmup_stage=document.get("warmup_stage", 1),
+            daily_limit=document.get("daily_limit", 5),
+            id=str(document["_id"]) if "_id" in document else None
+        )
+
+    def same_place(self, other: "RosterEntry") -> bool:
+        """Whether ``other`` would sit in the network exactly where this entry does"""
+        return (
+            self.provider == other.provider
+            and self.warmup_stage == other.warmup_stage
+            and self.daily_limit == other.daily_limit
+            and self.reputation == other.reputation
+        )
+
+    def __repr__(self) -> str:
+        return f"RosterEntry({self.email!r}, stage={self.warmup_stage})"
+
+
+class CredentialCache:
+    """LRU of full ``EmailAccount`` documents, loaded on first use"""
+
+    def __init__(self, max_size: int = settings.CREDENTIAL_CACHE_SIZE):
+        self.max_size = max_size
+        self._accounts: "OrderedDict[str, EmailAccount]" = OrderedDict()
+
+    def _remember(self, account: EmailAccount):
+        self._accounts[account.email] = account
+        self._accounts.move_to_end(account.email)
+        while len(self._accounts) > self.max_size:
+            self._accounts.popitem(last=False)
+
+    def invalidate(self, email: str):
+        self._accounts.pop(email, None)
+
+    def refresh(self, document: dict) -> bool:
+        """Drop the cached account only if ``document`` changed how it connects"""
+        account = self._accounts.get(document["email"])
+        if account is not None and any(
+            getattr(account, field) != document.get(field) for field in CREDENTIAL_FIELDS
+        ):
+            self.invalidate(document["email"])
+            return True
+        return False
+
+    async def get(self, email: str) -> Optional[EmailAccount]:
+        account = self._accounts.get(email)
+        if account is not None:
+            self._accounts.move_to_end(email)
+            return account
+        document = await MongoDB.db.email_accounts.find_one({"email": email})
+        if document is None:
+            return None
+        account = EmailAccount(**document)
+        self._remember(account)
+        return account
+
+    async def get_many(self, emails: Iterable[str]) -> Dict[str, EmailAccount]:
+        """Fetch several accounts, loading all cache misses in one query"""
+        found: Dict[str, EmailAccount] = {}
+        missing: List[str] = []
+        for email in emails:
+            account = self._accounts.get(email)
+            if account is None:
+                missing.append(email)
+            else:
+                found[email] = account
+        if missing:
+            async for document in MongoDB.db.email_accounts.find({"email": {"$in": missing}}):
+                account = EmailAccount(**document)
+                self._remember(account)
+                found[account.email] = account
+        return found
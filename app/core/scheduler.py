@@ -0,0 +1,253 @@
+import asyncio
+import heapq
+import random
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
+import logging
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+from .config import settings
+from .email_pool import WORKER_ID
+from ..database.mongodb import MongoDB
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[dict], Awaitable[Any]]
+
+LEASE_FIELDS = {"lease_id": "", "leased_by": "", "lease_expires_at": ""}
+
+
+class JobScheduler:
+    """Persistent delayed-job queue backed by the ``scheduled_jobs`` collection.
+
+    Jobs are documents with a ``kind``, a ``payload`` and a ``due_at``; the
+    ``(status, due_at)`` index acts as the durable priority queue, so pending
+    jobs survive restarts and their number is bounded only by the collection.
+    Each worker leases jobs that fall due within ``lookahead`` seconds in
+    batches, keeps them in a local heap until they are due and runs them with
+    at most ``concurrency`` in flight. A worker never holds more jobs than it
+    has free slots, so a leased job doesn't wait behind running ones while
+    its lease runs down, and a running job's lease is renewed every third of
+    ``lease_seconds`` until it finishes. Jobs whose lease expires (their
+    worker died) are returned to ``pending`` and picked up by another worker;
+    every update a worker makes to a job is scoped to its own ``lease_id``,
+    so a worker that lost a lease can't overwrite the new holder's outcome.
+    With a shard ``coordinator`` a worker only leases jobs of the shards it
+    owns, plus jobs scheduled without a shard.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = settings.SCHEDULER_CONCURRENCY,
+        batch_size: int = settings.SCHEDULER_BATCH_SIZE,
+        lookahead: float = settings.SCHEDULER_LOOKAHEAD,
+        poll_interval: float = settings.SCHEDULER_POLL_INTERVAL,
+        lease_seconds: int = settings.SCHEDULER_LEASE_SECONDS,
+        max_attempts: int = settings.SCHEDULER_MAX_ATTEMPTS,
+        coordinator=None,
+    ):
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.lookahead = lookahead
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.coordinator = coordinator
+        self._handlers: Dict[str, JobHandler] = {}
+        self._heap: List[Tuple[datetime, str, dict]] = []
+        self._running: set = set()
+        self._stopping = False
+
+    def register(self, kind: str, handler: JobHandler):
+        self._handlers[kind] = handler
+
+    @staticmethod
+    def _job(kind: str, payload: dict, due_at: Optional[datetime], shard: Optional[int] = None) -> dict:
+        now = datetime.utcnow()
+        job = {
+            "kind": kind,
+            "payload": payload,
+            "due_at": due_at or now,
+            "status": "pending",
+            "attempts": 0,
+            "created_at": now
+        }
+        if shard is not None:
+            job["shard"] = shard
+        return job
+
+    @staticmethod
+    async def schedule(
+        kind: str,
+        payload: dict,
+        due_at: Optional[datetime] = None,
+        delay: Optional[float] = None,
+        shard: Optional[int] = None
+    ) -> str:
+        if delay is not None:
+            due_at = datetime.utcnow() + timedelta(seconds=delay)
+        result = await MongoDB.db.scheduled_jobs.insert_one(JobScheduler._job(kind, payload, due_at, shard))
+        return str(result.inserted_id)
+
+    @staticmethod
+    async def schedule_many(
+        jobs: List[Tuple[str, dict, datetime]],
+        shard: Optional[int] = None
+    ) -> List[str]:
+        if not jobs:
+            return []
+        result = await MongoDB.db.scheduled_jobs.insert_many(
+            [JobScheduler._job(kind, payload, due_at, shard) for kind, payload, due_at in jobs],
+            ordered=False
+        )
+        return [str(job_id) for job_id in result.inserted_ids]
+
+    @staticmethod
+    async def get_job(job_id: str) -> Optional[dict]:
+        if not ObjectId.is_valid(job_id):
+            return None
+        return await MongoDB.db.scheduled_jobs.find_one({"_id": ObjectId(job_id)})
+
+    @staticmethod
+    async def reclaim_expired() -> int:
+        result = await MongoDB.db.scheduled_jobs.update_many(
+            {"status": "leased", "lease_expires_at": {"$lt": datetime.utcnow()}},
+            {"$set": {"status": "pending"}, "$unset": LEASE_FIELDS}
+        )
+        if result.modified_count:
+            logger.info(f"Reclaimed {result.modified_count} expired job leases")
+        return result.modified_count
+
+    async def _claim(self, limit: int) -> List[dict]:
+        horizon = datetime.utcnow() + timedelta(seconds=self.lookahead)
+        query = {"status": "pending", "due_at": {"$lte": horizon}, "kind": {"$in": list(self._handlers)}}
+        if self.coordinator is not None:
+            query["shard"] = {"$in": self.coordinator.owned_shards() + [None]}
+        candidates = await MongoDB.db.scheduled_jobs.find(query).sort("due_at", 1).limit(limit).to_list(limit)
+        if not candidates:
+            return []
+
+        lease_id = uuid4().hex
+        result = await MongoDB.db.scheduled_jobs.update_many(
+            {"_id": {"$in": [job["_id"] for job in candidates]}, "status": "pending"},
+            {
+                "$set": {
+                    "status": "leased",
+                    "lease_id": lease_id,
+                    "leased_by": WORKER_ID,
+                    "lease_expires_at": horizon + timedelta(seconds=self.lease_seconds)
+                }
+            }
+        )
+        if result.modified_count == len(candidates):
+            return [{**job, "status": "leased", "lease_id": lease_id} for job in candidates]
+        return await MongoDB.db.scheduled_jobs.find({"lease_id": lease_id}).to_list(limit)
+
+    @staticmethod
+    def _held(job: dict) -> dict:
+        """Filter matching ``job`` only while it is under the lease it was claimed with"""
+        return {"_id": job["_id"], "lease_id": job["lease_id"], "status": "leased"}
+
+    async def _settle(self, job: dict, update: dict):
+        result = await MongoDB.db.scheduled_jobs.update_one(JobScheduler._held(job), update)
+        if not result.modified_count:
+            logger.warning(f"Lease on job {job['_id']} ({job['kind']}) expired before it finished")
+
+    async def _heartbeat(self, job: dict):
+        """Keep pushing ``job``'s lease forward while its handler runs"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                result = await MongoDB.db.scheduled_jobs.update_one(
+                    JobScheduler._held(job),
+                    {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=self.lease_seconds)}}
+                )
+            except PyMongoError as e:
+                logger.error(f"Could not renew the lease on job {job['_id']}: {str(e)}")
+                continue
+            if not result.matched_count:
+                logger.warning(f"Lease on job {job['_id']} ({job['kind']}) was lost while it ran")
+                return
+
+    async def _execute(self, job: dict):
+        handler = self._handlers[job["kind"]]
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            result = await handler(job["payload"])
+        except Exception as e:
+            await self._fail(job, e)
+            return
+        finally:
+            heartbeat.cancel()
+        await self._settle(job, {
+            "$set": {"status": "done", "result": result, "finished_at": datetime.utcnow()},
+            "$inc": {"attempts": 1},
+            "$unset": LEASE_FIELDS
+        })
+
+    async def _fail(self, job: dict, error: Exception):
+        attempts = job.get("attempts", 0) + 1
+        logger.error(f"Job {job['_id']} ({job['kind']}) failed on attempt {attempts}: {str(error)}")
+        update = {"attempts": attempts, "error": str(error)}
+        if attempts >= self.max_attempts:
+            update.update({"status": "failed", "finished_at": datetime.utcnow()})
+        else:
+            backoff = min(2 ** attempts * 30, 3600) * random.uniform(0.8, 1.2)
+            update.update({
+                "status": "pending",
+                "due_at": datetime.utcnow() + timedelta(seconds=backoff)
+            })
+        await self._settle(job, {"$set": update, "$unset": LEASE_FIELDS})
+
+    def _start(self, job: dict, slots: asyncio.Semaphore):
+        async def run():
+            try:
+                await self._execute(job)
+            finally:
+                slots.release()
+
+        task = asyncio.create_task(run())
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def run(self):
+        """Lease and execute due jobs until ``stop`` is called"""
+        slots = asyncio.Semaphore(self.concurrency)
+        last_reclaim = datetime.min
+        while not self._stopping:
+            now = datetime.utcnow()
+            if now - last_reclaim > timedelta(seconds=self.lease_seconds):
+                await self.reclaim_expired()
+                last_reclaim = now
+
+            # Only lease what can start as soon as it is due
+            free = self.concurrency - len(self._running) - len(self._heap)
+            if free > 0:
+                for job in await self._claim(min(self.batch_size, free)):
+                    heapq.heappush(self._heap, (job["due_at"], str(job["_id"]), job))
+
+            while self._heap and self._heap[0][0] <= datetime.utcnow():
+                await slots.acquire()
+                _, _, job = heapq.heappop(self._heap)
+                self._start(job, slots)
+
+            if self._heap:
+                wait = (self._heap[0][0] - datetime.utcnow()).total_seconds()
+                await asyncio.sleep(min(max(wait, 0), self.poll_interval))
+            else:
+                await asyncio.sleep(self.poll_interval)
+
+        # Hand back jobs that were leased but never started
+        held = [JobScheduler._held(job) for _, _, job in self._heap]
+        self._heap = []
+        if held:
+            await MongoDB.db.scheduled_jobs.update_many(
+                {"$or": held},
+                {"$set": {"status": "pending"}, "$unset": LEASE_FIELDS}
+            )
+        if self._running:
+            await asyncio.gather(*list(self._running), return_exceptions=True)
+
+    def stop(self):
+        self._stopping = True
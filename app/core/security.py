@@ -1,10 +1,89 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from functools import partial
+from typing import Callable, Optional, Tuple, TypeVar
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+import logging
 from ..core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class PasswordHasherBusy(Exception):
+    """Every hashing thread is busy and the wait queue is full"""
+
+
+class PasswordHasher:
+    """Password hashing and verification off the event loop.
+
+    bcrypt runs in a dedicated pool of ``workers`` threads (it releases
+    the GIL, so threads use all cores without process start-up or
+    pickling). At most ``max_pending`` calls wait for a thread; past that
+    ``hash`` and ``verify`` raise ``PasswordHasherBusy`` immediately
+    instead of queueing a login storm behind minutes of CPU work. New
+    hashes use cost ``rounds``, and ``verify_and_update`` hands back a
+    replacement for any stored hash made with a different cost.
+    """
+
+    def __init__(
+        self,
+        rounds: int = settings.BCRYPT_ROUNDS,
+        workers: int = settings.PASSWORD_HASH_WORKERS,
+        max_pending: int = settings.PASSWORD_HASH_MAX_PENDING,
+        scheme: str = "bcrypt",
+    ):
+        self.context = CryptContext(
+            schemes=[scheme],
+            deprecated="auto",
+            **{
+                f"{scheme}__default_rounds": rounds,
+                f"{scheme}__min_rounds": rounds,
+                f"{scheme}__max_rounds": rounds,
+            }
+        )
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight = 0
+        self.rejected = 0
+
+    async def _run(self, function: Callable[..., T], *args) -> T:
+        if self._in_flight >= self.workers + self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusy()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        self._in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, partial(function, *args))
+        finally:
+            self._in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(self.context.verify, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """(valid, new hash or None); a new hash means the stored one should be replaced"""
+        return await self._run(self.context.verify_and_update, password, hashed_password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {"in_flight": self._in_flight, "rejected": self.rejected}
+
+
+password_hasher = PasswordHasher()
+pwd_context = password_hasher.context
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -17,7 +96,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Blocking; async code should use ``password_hasher.verify``"""
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
+    """Blocking; async code should use ``password_hasher.hash``"""
     return pwd_context.hash(password)
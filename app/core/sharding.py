@@ -0,0 +1,205 @@
+import asyncio
+import bisect
+import hashlib
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Set
+import logging
+from pymongo.errors import BulkWriteError
+from .config import settings
+from .email_pool import WORKER_ID
+from ..database.mongodb import MongoDB
+
+logger = logging.getLogger(__name__)
+
+ShardChangeHandler = Callable[[Set[int], Set[int]], None]
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+def shard_of(email: str, shard_count: int = settings.SHARD_COUNT) -> int:
+    """Fixed shard for an account; stable for as long as the shard count is"""
+    return _hash(email.lower()) % shard_count
+
+
+class HashRing:
+    """Consistent hash ring of workers with ``vnodes`` points per worker.
+
+    Adding or removing a worker only moves the shards that hash next to
+    its points, roughly ``1 / workers`` of them.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = settings.SHARD_VNODES):
+        self.vnodes = vnodes
+        self._points: List[int] = []
+        self._owners: Dict[int, str] = {}
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str):
+        for i in range(self.vnodes):
+            point = _hash(f"{node}#{i}")
+            if point not in self._owners:
+                bisect.insort(self._points, point)
+                self._owners[point] = node
+
+    def remove(self, node: str):
+        self._points = [p for p in self._points if self._owners[p] != node]
+        self._owners = {p: self._owners[p] for p in self._points}
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[self._points[index]]
+
+
+class ShardCoordinator:
+    """Own a slice of the account shards through leases in ``shard_leases``.
+
+    Every worker heartbeats into ``workers``; the live workers form a hash
+    ring and each worker wants the shards the ring maps to it. A round
+    releases shards the worker no longer wants, then renews and acquires
+    the wanted ones in one ``update_many`` that only matches shards that
+    are free, expired or already ours. A shard taken over from another
+    worker is only acquired once that worker released it or its lease ran
+    out, so two workers never hold the same shard. ``owns`` stops
+    answering true as soon as the local copy of the lease could have
+    expired, even if the database is unreachable.
+    """
+
+    def __init__(
+        self,
+        worker_id: str = WORKER_ID,
+        shard_count: int = settings.SHARD_COUNT,
+        lease_seconds: int = settings.SHARD_LEASE_SECONDS,
+        heartbeat_interval: float = settings.SHARD_HEARTBEAT_INTERVAL,
+        vnodes: int = settings.SHARD_VNODES,
+        on_change: Optional[ShardChangeHandler] = None,
+    ):
+        self.worker_id = worker_id
+        self.shard_count = shard_count
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.vnodes = vnodes
+        self.on_change = on_change
+        self.owned: Set[int] = set()
+        self._valid_until = 0.0
+        self._stopping = False
+
+    def owns_shard(self, shard: int) -> bool:
+        return shard in self.owned and time.monotonic() < self._valid_until
+
+    def owns(self, email: str) -> bool:
+        return self.owns_shard(shard_of(email, self.shard_count))
+
+    def owned_shards(self) -> List[int]:
+        return sorted(self.owned) if time.monotonic() < self._valid_until else []
+
+    async def _seed_shards(self):
+        try:
+            await MongoDB.db.shard_leases.insert_many(
+                [{"_id": shard, "owner": None} for shard in range(self.shard_count)],
+                ordered=False
+            )
+        except BulkWriteError:
+            # Other workers seeded them first
+            pass
+
+    async def _heartbeat(self, now: datetime):
+        await MongoDB.db.workers.update_one(
+            {"_id": self.worker_id},
+            {
+                "$set": {
+                    "heartbeat_at": now,
+                    "expires_at": now + timedelta(seconds=self.lease_seconds)
+                },
+                "$setOnInsert": {"started_at": now}
+            },
+            upsert=True
+        )
+
+    async def live_workers(self) -> List[str]:
+        cursor = MongoDB.db.workers.find({"expires_at": {"$gt": datetime.utcnow()}}, {"_id": 1})
+        return [document["_id"] async for document in cursor]
+
+    def _wanted(self, workers: List[str]) -> Set[int]:
+        ring = HashRing(workers, self.vnodes)
+        return {
+            shard for shard in range(self.shard_count)
+            if ring.owner(str(shard)) == self.worker_id
+        }
+
+    async def _release(self, shards: Iterable[int]):
+        shards = list(shards)
+        if shards:
+            await MongoDB.db.shard_leases.update_many(
+                {"_id": {"$in": shards}, "owner": self.worker_id},
+                {"$set": {"owner": None}, "$unset": {"lease_expires_at": ""}}
+            )
+
+    async def rebalance(self) -> Set[int]:
+        """One heartbeat round; returns the shards held afterwards"""
+        started = time.monotonic()
+        now = datetime.utcnow()
+        await self._heartbeat(now)
+        wanted = self._wanted(sorted(set(await self.live_workers()) | {self.worker_id}))
+
+        # Stop using and hand back what moved before the new owner takes it
+        previous = self.owned
+        self.owned = previous & wanted
+        await self._release(previous - wanted)
+
+        expires = now + timedelta(seconds=self.lease_seconds)
+        # BSON dates have millisecond precision; the read-back matches on it
+        expires = expires.replace(microsecond=expires.microsecond // 1000 * 1000)
+        await MongoDB.db.shard_leases.update_many(
+            {
+                "_id": {"$in": sorted(wanted)},
+                "$or": [
+                    {"owner": self.worker_id},
+                    {"owner": None},
+                    {"lease_expires_at": {"$lt": now}}
+                ]
+            },
+            {"$set": {"owner": self.worker_id, "lease_expires_at": expires}}
+        )
+        held = {
+            document["_id"] async for document in MongoDB.db.shard_leases.find(
+                {"owner": self.worker_id, "lease_expires_at": expires}, {"_id": 1}
+            )
+        }
+
+        gained, lost = held - previous, previous - held
+        self.owned = held
+        self._valid_until = started + self.lease_seconds
+        if gained or lost:
+            logger.info(
+                f"Worker {self.worker_id} owns {len(held)} shards "
+                f"(+{len(gained)} -{len(lost)}, {len(wanted) - len(held)} pending handoff)"
+            )
+            if self.on_change is not None:
+                self.on_change(gained, lost)
+        return held
+
+    async def run(self):
+        """Heartbeat and rebalance until ``leave`` is called"""
+        await self._seed_shards()
+        while not self._stopping:
+            try:
+                await self.rebalance()
+            except Exception as e:
+                logger.error(f"Shard rebalance failed for {self.worker_id}: {str(e)}")
+            await asyncio.sleep(self.heartbeat_interval)
+
+    async def leave(self):
+        """Release every shard and deregister so others take over at once"""
+        self._stopping = True
+        lost, self.owned = self.owned, set()
+        self._valid_until = 0.0
+        await self._release(lost)
+        await MongoDB.db.workers.delete_one({"_id": self.worker_id})
+        if lost and self.on_change is not None:
+            self.on_change(set(), lost)
@@ -0,0 +1,183 @@
+import asyncio
+import time
+from collections import deque
+from email.message import Message
+from typing import Awaitable, Callable, Deque, Dict, Optional, Sequence, Tuple, TypeVar
+import aiosmtplib
+import logging
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+PoolKey = Tuple[str, int, str]
+T = TypeVar("T")
+
+# Errors that mean the cached session is unusable and a fresh one should be tried
+RECONNECT_ERRORS = (
+    aiosmtplib.SMTPServerDisconnected,
+    ConnectionError,
+)
+
+
+class PooledSMTPConnection:
+    """An authenticated SMTP session kept alive between sends"""
+
+    def __init__(self, key: PoolKey, smtp: aiosmtplib.SMTP):
+        self.key = key
+        self.smtp = smtp
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+    @property
+    def idle_for(self) -> float:
+        return time.monotonic() - self.last_used
+
+    async def close(self):
+        try:
+            if self.smtp.is_connected:
+                await self.smtp.quit()
+        except Exception:
+            self.smtp.close()
+
+
+class SMTPConnectionPool:
+    """Keep-alive SMTP sessions keyed by (smtp_server, port, username).
+
+    Each key gets at most ``max_connections_per_key`` concurrent sessions.
+    Sessions idle longer than ``idle_timeout`` are evicted, and sessions idle
+    longer than ``health_check_interval`` are probed with NOOP before reuse.
+    A send that fails because the server dropped the session is retried once
+    on a freshly connected session.
+    """
+
+    def __init__(
+        self,
+        max_connections_per_key: int = settings.SMTP_POOL_MAX_CONNECTIONS,
+        idle_timeout: float = settings.SMTP_POOL_IDLE_TIMEOUT,
+        health_check_interval: float = settings.SMTP_POOL_HEALTH_CHECK_INTERVAL,
+        smtp_factory: Callable[..., aiosmtplib.SMTP] = aiosmtplib.SMTP,
+    ):
+        self.max_connections_per_key = max_connections_per_key
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self._smtp_factory = smtp_factory
+        self._idle: Dict[PoolKey, Deque[PooledSMTPConnection]] = {}
+        self._limits: Dict[PoolKey, asyncio.Semaphore] = {}
+        self._last_sweep = time.monotonic()
+
+    @staticmethod
+    def key_for(account) -> PoolKey:
+        return (account.smtp_server.lower(), account.smtp_port, account.username)
+
+    def _limit(self, key: PoolKey) -> asyncio.Semaphore:
+        limit = self._limits.get(key)
+        if limit is None:
+            limit = asyncio.Semaphore(self.max_connections_per_key)
+            self._limits[key] = limit
+        return limit
+
+    async def _connect(self, key: PoolKey, account) -> PooledSMTPConnection:
+        smtp = self._smtp_factory(
+            hostname=account.smtp_server,
+            port=account.smtp_port,
+            use_tls=True
+        )
+        await smtp.connect()
+        try:
+            await smtp.login(account.username, account.password)
+        except Exception:
+            smtp.close()
+            raise
+        logger.debug(f"Opened SMTP session for {key[2]}@{key[0]}:{key[1]}")
+        return PooledSMTPConnection(key, smtp)
+
+    async def _is_healthy(self, conn: PooledSMTPConnection) -> bool:
+        if not conn.smtp.is_connected:
+            return False
+        if conn.idle_for < self.health_check_interval:
+            return True
+        try:
+            await conn.smtp.noop()
+            return True
+        except Exception:
+            return False
+
+    async def _checkout(self, key: PoolKey, account) -> PooledSMTPConnection:
+        idle = self._idle.get(key)
+        while idle:
+            conn = idle.pop()
+            if conn.idle_for < self.idle_timeout and await self._is_healthy(conn):
+                return conn
+            await conn.close()
+        return await self._connect(key, account)
+
+    def _checkin(self, conn: PooledSMTPConnection):
+        conn.last_used = time.monotonic()
+        self._idle.setdefault(conn.key, deque()).append(conn)
+
+    async def run(self, account, operation: Callable[[aiosmtplib.SMTP], Awaitable[T]]) -> T:
+        """Run ``operation`` on a pooled session for ``account``.
+
+        If the session turns out to be dead the operation is retried once on a
+        new connection; any other error discards the session and propagates.
+        """
+        key = self.key_for(account)
+        await self._maybe_sweep()
+        async with self._limit(key):
+            conn = await self._checkout(key, account)
+            try:
+                result = await operation(conn.smtp)
+            except RECONNECT_ERRORS:
+                await conn.close()
+                logger.info(f"SMTP session for {key[2]} dropped, reconnecting")
+                conn = await self._connect(key, account)
+                try:
+                    result = await operation(conn.smtp)
+                except Exception:
+                    await conn.close()
+                    raise
+            except Exception:
+                await conn.close()
+                raise
+            self._checkin(conn)
+            return result
+
+    async def send_message(self, account, message: Message):
+        return await self.run(account, lambda smtp: smtp.send_message(message))
+
+    async def sendmail(self, account, sender: str, recipients: Sequence[str], data: bytes):
+        """Send an already serialized message, e.g. from ``CompiledTemplate.render``"""
+        return await self.run(account, lambda smtp: smtp.sendmail(sender, list(recipients), data))
+
+    async def evict_idle(self):
+        """Close every pooled session that has been idle past the timeout"""
+        self._last_sweep = time.monotonic()
+        for key in list(self._idle):
+            idle = self._idle[key]
+            keep = deque(conn for conn in idle if conn.idle_for < self.idle_timeout)
+            expired = [conn for conn in idle if conn.idle_for >= self.idle_timeout]
+            if keep:
+                self._idle[key] = keep
+            else:
+                del self._idle[key]
+            for conn in expired:
+                await conn.close()
+
+    async def _maybe_sweep(self):
+        if time.monotonic() - self._last_sweep >= self.idle_timeout:
+            await self.evict_idle()
+
+    async def close_all(self):
+        idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                await conn.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "keys": len(self._limits),
+            "idle_connections": sum(len(c) for c in self._idle.values()),
+        }
+
+
+smtp_pool = SMTPConnectionPool()
@@ -0,0 +1,196 @@
+import re
+import time
+from email import quoprimime
+from email.header import Header
+from email.utils import formatdate
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence, Union
+from uuid import uuid4
+import logging
+from ..database.mongodb import MongoDB
+from ..models.email_account import EmailTemplate
+
+logger = logging.getLogger(__name__)
+
+VARIABLE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+# Filled in for every message; templates may use them without declaring them.
+# ``subject`` and ``body`` carry generated content (see ``ContentGenerator``).
+BUILTIN_VARIABLES = ("sender", "recipient", "sender_name", "recipient_name", "subject", "body")
+
+DEFAULT_TEMPLATES = [
+    EmailTemplate(subject="{{subject}}", body=f"{greeting}\n\n{{{{body}}}}\n\n{sign_off}\n", category="warmup")
+    for greeting, sign_off in [
+        ("Hi {{recipient_name}},", "Best,\n{{sender_name}}"),
+        ("Hello {{recipient_name}},", "Thanks,\n{{sender_name}}"),
+        ("Hey {{recipient_name}},", "Cheers,\n{{sender_name}}"),
+        ("{{recipient_name}},", "Regards,\n{{sender_name}}"),
+        ("Hi {{recipient_name}},", "{{sender_name}}"),
+    ]
+]
+
+Segment = Union[bytes, str]
+
+
+class RenderedMessage(NamedTuple):
+    sender: str
+    recipient: str
+    message_id: str
+    data: bytes
+
+
+def display_name(email: str) -> str:
+    """'jane.doe@example.com' -> 'Jane Doe'"""
+    return re.sub(r"[._+-]+", " ", email.split("@")[0]).strip().title()
+
+
+def make_message_id(domain: str) -> str:
+    # uuid4 is unique without make_msgid's per-call hostname lookup
+    return f"<{uuid4().hex}@{domain}>"
+
+
+_date_cache = [0, ""]
+
+
+def _date_header() -> str:
+    now = int(time.time())
+    if _date_cache[0] != now:
+        _date_cache[:] = [now, formatdate(now, usegmt=True)]
+    return _date_cache[1]
+
+
+def _compile(text: str, crlf: bool) -> List[Segment]:
+    """Split text into pre-encoded literal bytes and variable names (str)"""
+    if crlf:
+        text = text.replace("\r\n", "\n").replace("\n", "\r\n")
+    segments: List[Segment] = []
+    for i, part in enumerate(VARIABLE.split(text)):
+        if i % 2:
+            segments.append(part)
+        elif part:
+            segments.append(part.encode("utf-8"))
+    return segments
+
+
+def _render(segments: Sequence[Segment], values: Dict[str, str], crlf: bool = False) -> bytes:
+    parts = []
+    for segment in segments:
+        if isinstance(segment, bytes):
+            parts.append(segment)
+            continue
+        value = values.get(segment, "")
+        if crlf and "\n" in value:
+            value = value.replace("\r\n", "\n").replace("\n", "\r\n")
+        parts.append(value.encode("utf-8"))
+    return b"".join(parts)
+
+
+class CompiledTemplate:
+    """An ``EmailTemplate`` parsed once into byte segments.
+
+    ``{{ name }}`` placeholders in the subject and body become slots; the
+    literal text around them, the fixed MIME headers and the header/body
+    separators are encoded to bytes at compile time. Rendering a message
+    only encodes the variable values and joins buffers into the final
+    RFC 5322 bytes, ready for ``sendmail`` without any ``email.message``
+    objects. Non-ASCII subjects are RFC 2047 encoded and non-ASCII bodies
+    quoted-printable, so messages stay 7-bit clean for any relay.
+    """
+
+    def __init__(self, template: EmailTemplate):
+        self.template = template
+        self.category = template.category
+        self.variables = set(VARIABLE.findall(template.subject)) | set(VARIABLE.findall(template.body))
+        undeclared = self.variables - set(template.variables) - set(BUILTIN_VARIABLES)
+        if undeclared:
+            raise ValueError(f"Template uses undeclared variables: {', '.join(sorted(undeclared))}")
+        self._subject = _compile(template.subject, crlf=False)
+        self._body = _compile(template.body, crlf=True)
+        if not template.body.endswith("\n"):
+            self._body.append(b"\r\n")
+
+    def _subject_header(self, values: Dict[str, str]) -> bytes:
+        subject = _render(self._subject, values)
+        if b"\n" in subject or b"\r" in subject:
+            # A line break in a value must not start a new header
+            subject = re.sub(rb"\s*[\r\n]+\s*", b" ", subject)
+        if subject.isascii():
+            return subject
+        # Long subjects are folded; the fold has to be CRLF like the rest of the message
+        return Header(subject.decode("utf-8"), "utf-8").encode(linesep="\r\n").encode("ascii")
+
+    def render(
+        self,
+        sender: str,
+        recipient: str,
+        variables: Optional[Dict[str, str]] = None,
+        message_id: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> RenderedMessage:
+        values = {
+            "sender": sender,
+            "recipient": recipient,
+            "sender_name": display_name(sender),
+            "recipient_name": display_name(recipient),
+        }
+        if variables:
+            values.update(variables)
+        message_id = message_id or make_message_id(sender.rsplit("@", 1)[-1])
+        body = _render(self._body, values, crlf=True)
+        if body.isascii():
+            encoding = b"7bit"
+        else:
+            # Latin-1 maps each UTF-8 byte to one code point, so the bytes are what get quoted
+            body = quoprimime.body_encode(body.decode("latin-1"), eol="\r\n").encode("ascii")
+            encoding = b"quoted-printable"
+
+        head = [
+            b"From: ", sender.encode(), b"\r\n",
+            b"To: ", recipient.encode(), b"\r\n",
+            b"Subject: ", self._subject_header(values), b"\r\n",
+            b"Date: ", _date_header().encode(), b"\r\n",
+            b"Message-ID: ", message_id.encode(), b"\r\n",
+        ]
+        for name, value in (headers or {}).items():
+            head += [name.encode(), b": ", value.encode("utf-8"), b"\r\n"]
+        head += [
+            b"MIME-Version: 1.0\r\nContent-Type: text/plain; charset=utf-8\r\n",
+            b"Content-Transfer-Encoding: ", encoding, b"\r\n\r\n",
+        ]
+        return RenderedMessage(sender, recipient, message_id, b"".join(head) + body)
+
+
+class TemplateLibrary:
+    """Compiled templates by category, loaded from ``email_templates``"""
+
+    def __init__(self, templates: Sequence[EmailTemplate] = DEFAULT_TEMPLATES):
+        self._by_category: Dict[str, List[CompiledTemplate]] = {}
+        self.add_many(templates)
+
+    def add_many(self, templates: Sequence[EmailTemplate]):
+        for template in templates:
+            try:
+                compiled = CompiledTemplate(template)
+            except ValueError as e:
+                logger.error(f"Skipping template {template.subject!r}: {str(e)}")
+                continue
+            self._by_category.setdefault(compiled.category, []).append(compiled)
+
+    def get(self, category: str) -> List[CompiledTemplate]:
+        return self._by_category.get(category, [])
+
+    async def load(self, category: Optional[str] = None) -> int:
+        """Replace the built-in templates with stored ones, where there are any"""
+        query = {"category": category} if category else {}
+        stored = [EmailTemplate(**doc) async for doc in MongoDB.db.email_templates.find(query)]
+        if stored:
+            for loaded in {t.category for t in stored}:
+                self._by_category.pop(loaded, None)
+            self.add_many(stored)
+        return len(stored)
+
+
+@lru_cache(maxsize=256)
+def compile_text(subject: str, body: str) -> CompiledTemplate:
+    """Compile an ad-hoc subject/body pair once and reuse it across sends"""
+    return CompiledTemplate(EmailTemplate(subject=subject, body=body, category="adhoc"))
@@ -1,29 +1,42 @@
 import re
+from datetime import datetime
 from typing import List
-import dns.resolver
 from email_validator import validate_email, EmailNotValidError
+from .dns_cache import dns_cache
+from .content import content_generator
 
 def validate_email_format(email: str) -> bool:
+    # Syntax only: a blocking DNS lookup per address would stall bulk imports
     try:
-        validate_email(email)
+        validate_email(email, check_deliverability=False)
         return True
     except EmailNotValidError:
         return False
 
-def validate_smtp_settings(smtp_server: str, smtp_port: int) -> bool:
+async def validate_smtp_settings(smtp_server: str, smtp_port: int) -> bool:
+    """Port is a submission port and the host resolves.
+
+    Raises ``DNSLookupError`` when DNS itself fails, so callers can retry
+    instead of rejecting a good server.
+    """
     common_smtp_ports = [25, 465, 587, 2525]
     if smtp_port not in common_smtp_ports:
         return False
     
-    try:
-        dns.resolver.resolve(smtp_server, 'MX')
-        return True
-    except:
-        return False
+    # Submission hosts have address records; MX belongs to the mail domain
+    return await dns_cache.host_exists(smtp_server)
+
+def generate_natural_response() -> str:
+    """A short, varied reply body"""
+    return content_generator.response_text()
 
 def get_email_domain(email: str) -> str:
     return email.split('@')[1]
 
+def start_of_today() -> datetime:
+    """Midnight UTC of the current day; warmup cycles are counted per UTC day"""
+    return datetime.combine(datetime.utcnow().date(), datetime.min.time())
+
 def generate_warmup_schedule(
     start_volume: int,
     target_volume: int,
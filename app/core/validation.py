@@ -0,0 +1,164 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+import aiosmtplib
+import logging
+from pymongo import UpdateOne
+from .config import settings
+from .imap_sessions import IMAPSessionPool, imap_pool
+from .scheduler import JobScheduler
+from .sharding import shard_of
+from ..database.mongodb import MongoDB
+from ..models.email_account import EmailAccount, WarmupStatus
+
+logger = logging.getLogger(__name__)
+
+
+class AccountValidator:
+    """Check that an account's SMTP and IMAP credentials work.
+
+    SMTP (connect, EHLO, AUTH) and IMAP (connect, LOGIN) are probed
+    concurrently, each bounded by ``timeout``, so an account costs the
+    slower of the two round trips rather than their sum and a hung server
+    can't hold a worker. Nothing is sent. Bulk validations run as one job
+    per batch, at most ``concurrency`` accounts at a time, and their
+    outcomes are written back in a single ``bulk_write``.
+    """
+
+    def __init__(
+        self,
+        timeout: float = settings.VALIDATION_TIMEOUT,
+        concurrency: int = settings.VALIDATION_CONCURRENCY,
+        pool: IMAPSessionPool = imap_pool,
+        smtp_factory: Callable[..., aiosmtplib.SMTP] = aiosmtplib.SMTP,
+    ):
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.pool = pool
+        self._smtp_factory = smtp_factory
+
+    def register_jobs(self, scheduler: JobScheduler):
+        scheduler.register("account.validate", self._run_validate_job)
+        scheduler.register("account.validate_batch", self._run_validate_batch_job)
+
+    @staticmethod
+    async def enqueue(emails: List[str], user_id: str) -> List[str]:
+        """Queue validation for newly added accounts, batched for bulk adds"""
+        if len(emails) == 1:
+            return [await JobScheduler.schedule(
+                "account.validate",
+                {"email": emails[0], "user_id": user_id},
+                shard=shard_of(emails[0])
+            )]
+        now = datetime.utcnow()
+        size = settings.VALIDATION_BATCH_SIZE
+        return await JobScheduler.schedule_many([
+            ("account.validate_batch", {"emails": emails[i:i + size], "user_id": user_id}, now)
+            for i in range(0, len(emails), size)
+        ])
+
+    async def check_smtp(self, account: EmailAccount):
+        smtp = self._smtp_factory(
+            hostname=account.smtp_server,
+            port=account.smtp_port,
+            use_tls=True,
+            timeout=self.timeout
+        )
+        await smtp.connect()
+        try:
+            await smtp.ehlo()
+            await smtp.login(account.username, account.password)
+        finally:
+            try:
+                await smtp.quit()
+            except Exception:
+                smtp.close()
+
+    async def check_imap(self, account: EmailAccount):
+        client = await self.pool.open_dedicated(account)
+        try:
+            await client.logout()
+        except Exception:
+            pass
+
+    async def _probe(self, check, account: EmailAccount) -> Optional[str]:
+        try:
+            await asyncio.wait_for(check(account), timeout=self.timeout)
+            return None
+        except asyncio.TimeoutError:
+            return f"Timed out after {self.timeout:g}s"
+        except aiosmtplib.SMTPAuthenticationError as e:
+            return f"Authentication failed: {e.message}"
+        except Exception as e:
+            return str(e) or type(e).__name__
+
+    async def validate(self, account: EmailAccount) -> dict:
+        started = time.monotonic()
+        smtp_error, imap_error = await asyncio.gather(
+            self._probe(self.check_smtp, account),
+            self._probe(self.check_imap, account)
+        )
+        return {
+            "valid": smtp_error is None and imap_error is None,
+            "smtp_error": smtp_error,
+            "imap_error": imap_error,
+            "checked_at": datetime.utcnow(),
+            "elapsed": round(time.monotonic() - started, 3)
+        }
+
+    async def validate_many(self, accounts: Iterable[EmailAccount]) -> Dict[str, dict]:
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def validate_one(account):
+            async with limit:
+                return account.email, await self.validate(account)
+
+        return dict(await asyncio.gather(*(validate_one(account) for account in accounts)))
+
+    @staticmethod
+    async def record(results: Dict[str, dict]):
+        """Store outcomes on the accounts.
+
+        Failed accounts are marked failed; pending accounts that pass become
+        active and join the network. Paused accounts stay paused.
+        """
+        if not results:
+            return
+        now = datetime.utcnow()
+        operations = []
+        for email, result in results.items():
+            update = {"validation": result}
+            if not result["valid"]:
+                update.update({"status": WarmupStatus.FAILED, "updated_at": now})
+            operations.append(UpdateOne({"email": email}, {"$set": update}))
+            if result["valid"]:
+                operations.append(UpdateOne(
+                    {"email": email, "status": WarmupStatus.PENDING},
+                    {"$set": {"status": WarmupStatus.ACTIVE, "updated_at": now}}
+                ))
+        await MongoDB.db.email_accounts.bulk_write(operations, ordered=False)
+
+    @staticmethod
+    async def _load(emails: List[str]) -> Dict[str, EmailAccount]:
+        accounts = {}
+        async for document in MongoDB.db.email_accounts.find({"email": {"$in": emails}}):
+            accounts[document["email"]] = EmailAccount(**document)
+        return accounts
+
+    async def _run_validate_job(self, payload: dict) -> dict:
+        return (await self._run_validate_batch_job({"emails": [payload["email"]]}))[0]
+
+    async def _run_validate_batch_job(self, payload: dict) -> List[dict]:
+        emails = payload["emails"]
+        accounts = await self._load(emails)
+        results = await self.validate_many(accounts.values())
+        await self.record(results)
+        logger.info(
+            f"Validated {len(results)} accounts, "
+            f"{sum(1 for r in results.values() if not r['valid'])} failed"
+        )
+
+        # Emails contain dots, so the job result is a list rather than a map
+        missing = {"valid": False, "error": "Email account not found"}
+        return [{"email": email, **results.get(email, missing)} for email in emails]
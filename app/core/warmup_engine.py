@@ -1,22 +1,49 @@
 from datetime import datetime, timedelta
 import random
-from typing import List, Dict
-import aiosmtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import asyncio
-import aioimaplib
+from typing import Callable, List, Dict, Optional
 import logging
-from .utils import generate_natural_response
-from ..models.email_account import EmailAccount, WarmupStatus
+from ..models.email_account import EmailAccount, WarmupStatus, WarmupSettings
 from ..database.mongodb import MongoDB
+from ..database.log_sink import log_sink
+from ..database.counters import AccountCounters
+from .smtp_pool import smtp_pool
+from .rate_limiter import send_limiter, reply_code
+from .delivery import RetryQueue, SendResult
+from .templates import TemplateLibrary
+from .content import content_generator
+from .replies import ReplyPipeline
+from .engagement import ACTION_FLAGS, MOVE_TO_INBOX, EngagementExecutor
+from .scheduler import JobScheduler
+from .placement import placement_checker
+from .idle_listener import IdleListener
+from .participant_selector import ParticipantSelector, SharedReceiveLedger
+from .network_sync import NetworkSync
+from .roster import CredentialCache, RosterEntry
+from .sharding import ShardCoordinator, shard_of
+from .utils import start_of_today
+from .config import settings
 
 logger = logging.getLogger(__name__)
 
 class WarmupEngine:
-    def __init__(self):
-        self.active_accounts: Dict[str, EmailAccount] = {}
-        self.network_pool: List[EmailAccount] = []
+    def __init__(
+        self,
+        warmup_settings: Optional[WarmupSettings] = None,
+        on_member_change: Optional[Callable[[str, bool], None]] = None
+    ):
+        self.settings = warmup_settings or WarmupSettings()
+        # Called with (email, True) when an account joins or its credentials
+        # change and (email, False) when it leaves the network
+        self.on_member_change = on_member_change
+        self.active_accounts: Dict[str, RosterEntry] = {}
+        # Caps are shared with every other worker drawing from the same network
+        self.network_pool = ParticipantSelector(ledger=SharedReceiveLedger())
+        self.credentials = CredentialCache()
+        self.templates = TemplateLibrary()
+        self.content = content_generator
+        self.replies = ReplyPipeline(self.templates, self.content)
+        self.engagements = EngagementExecutor()
         self.engagement_patterns = [
             "read",
             "reply",
@@ -26,103 +53,286 @@ class WarmupEngine:
 
     async def initialize_network(self):
         """Initialize the warmup network with available accounts"""
-        accounts = await MongoDB.db.email_accounts.find(
-            {"status": "active"}
-        ).to_list(None)
-        
-        for account in accounts:
-            email_acc = EmailAccount(**account)
-            self.active_accounts[email_acc.email] = email_acc
-            self.network_pool.append(email_acc)
+        await self.templates.load("warmup")
+        self.network_sync = NetworkSync(self)
+        await self.network_sync.load()
+
+    def start_network_sync(self) -> asyncio.Task:
+        """Follow account changes so pause/resume/delete apply immediately"""
+        return asyncio.create_task(self.network_sync.run())
+
+    def upsert_account(self, document: dict):
+        entry = RosterEntry.from_document(document)
+        current = self.active_accounts.get(entry.email)
+        if current is not None:
+            entry.reputation = current.reputation
+        # Most updates (last_warmup, counters) don't touch the roster; re-adding
+        # would throw away the selector's alias tables for nothing
+        if current is None or not current.same_place(entry):
+            self.active_accounts[entry.email] = entry
+            self.network_pool.add(entry, reputation=entry.reputation)
+        if self.credentials.refresh(document) or current is None:
+            self._member_changed(entry.email, True)
+
+    def _member_changed(self, email: str, active: bool):
+        if self.on_member_change is not None:
+            self.on_member_change(email, active)
+
+    def set_reputation(self, email: str, reputation: float) -> bool:
+        entry = self.active_accounts.get(email)
+        if entry is None or entry.reputation == reputation:
+            return False
+        entry.reputation = reputation
+        self.network_pool.reweight(email, reputation)
+        return True
+
+    def remove_account(self, email: str):
+        entry = self.active_accounts.pop(email, None)
+        self.network_pool.remove(email)
+        self.credentials.invalidate(email)
+        if entry is not None:
+            self._member_changed(email, False)
 
-    async def send_warmup_email(self, from_account: EmailAccount, to_account: EmailAccount):
+    async def send_warmup_email(self, from_account: EmailAccount, to_account: EmailAccount) -> SendResult:
         """Send a warmup email from one account to another"""
+        template = random.choice(self.templates.get("warmup"))
+        content = self.content.generate(from_account.email)
+        message = template.render(
+            from_account.email,
+            to_account.email,
+            {"subject": content.subject, "body": content.body}
+        )
         try:
-            message = MIMEMultipart()
-            message["From"] = from_account.email
-            message["To"] = to_account.email
-            message["Subject"] = await self._generate_natural_subject()
-            
-            body = await self._generate_email_body()
-            message.attach(MIMEText(body, "plain"))
-            
-            async with aiosmtplib.SMTP(
-                hostname=from_account.smtp_server,
-                port=from_account.smtp_port,
-                use_tls=True
-            ) as smtp:
-                await smtp.login(from_account.username, from_account.password)
-                await smtp.send_message(message)
-            
-            await self._log_email_sent(from_account.email, to_account.email)
-            return True
+            await send_limiter.send(
+                from_account,
+                lambda: smtp_pool.sendmail(from_account, message.sender, [message.recipient], message.data)
+            )
         except Exception as e:
-            logger.error(f"Error sending email: {str(e)}")
-            return False
+            logger.error(f"Error sending email ({reply_code(e) or 'no reply'}): {str(e)}")
+            return SendResult.from_error(e, message.message_id)
+
+        await self._log_email_sent(from_account.email, to_account.email, message.message_id, content.subject)
+        return SendResult.sent(message.message_id)
 
-    async def check_inbox_placement(self, account: EmailAccount):
+    async def check_inbox_placement(self, account: EmailAccount) -> Optional[Dict[str, int]]:
         """Check inbox placement and spam status"""
         try:
-            imap_client = aioimaplib.IMAP4_SSL(
-                account.imap_server, 
-                account.imap_port
-            )
-            await imap_client.wait_hello_from_server()
-            await imap_client.login(account.username, account.password)
-            
-            # Check Inbox
-            await imap_client.select('INBOX')
-            _, inbox_messages = await imap_client.search('ALL')
-            
-            # Check Spam folder
-            await imap_client.select('[Gmail]/Spam')
-            _, spam_messages = await imap_client.search('ALL')
-            
-            inbox_count = len(inbox_messages[0].split())
-            spam_count = len(spam_messages[0].split())
-            
-            await self._update_placement_stats(
-                account.email, 
-                inbox_count, 
-                spam_count
-            )
-            
-            await imap_client.logout()
-            
+            return await placement_checker.check(account)
         except Exception as e:
             logger.error(f"Error checking inbox: {str(e)}")
+            return None
+
+    async def check_network_placement(self, emails: Optional[List[str]] = None) -> Dict[str, Dict[str, int]]:
+        """Check placement for ``emails`` (default: the whole network), concurrently"""
+        results: Dict[str, Dict[str, int]] = {}
+        if emails is None:
+            emails = [entry.email for entry in self.network_pool]
+        for start in range(0, len(emails), settings.NETWORK_LOAD_BATCH_SIZE):
+            # Credentials are only loaded for the chunk being checked
+            accounts = await self.credentials.get_many(
+                emails[start:start + settings.NETWORK_LOAD_BATCH_SIZE]
+            )
+            results.update(await placement_checker.check_many(list(accounts.values())))
+        return results
+
+    async def run_placement_checks(
+        self,
+        coordinator: ShardCoordinator,
+        interval: float = settings.IMAP_POLL_INTERVAL
+    ):
+        """Poll the inboxes of this worker's accounts when IMAP IDLE is off"""
+        while True:
+            owned = [entry.email for entry in self.network_pool if coordinator.owns(entry.email)]
+            try:
+                await self.check_network_placement(owned)
+            except Exception as e:
+                logger.error(f"Error checking network placement: {str(e)}")
+            await asyncio.sleep(interval)
 
-    async def process_warmup_cycle(self, account: EmailAccount):
-        """Process a complete warmup cycle for an account"""
+    def register_jobs(self, scheduler: JobScheduler):
+        """Register the engine's job handlers with a scheduler worker"""
+        scheduler.register("warmup.send", self._run_send_job)
+        scheduler.register("warmup.engage", self._run_engage_job)
+        scheduler.register("warmup.cycle", self._run_cycle_job)
+
+    async def process_warmup_cycle(self, account: RosterEntry) -> List[str]:
+        """Schedule a complete warmup cycle for an account"""
         # Calculate daily volume based on warmup stage
         daily_volume = self._calculate_daily_volume(account.warmup_stage)
         
         # Get network participants for this cycle
-        participants = self._select_network_participants(
+        participants = await self._select_network_participants(
             daily_volume, 
             exclude_email=account.email
         )
         
+        # Space the sends out naturally instead of sleeping between them
+        due_at = datetime.utcnow()
+        jobs = []
         for participant in participants:
-            # Send email
-            success = await self.send_warmup_email(account, participant)
-            if success:
-                # Simulate natural delay
-                await asyncio.sleep(random.randint(60, 300))
-                
-                # Process engagement
-                await self._process_engagement(participant, account)
-            
-            # Update account metrics
-            await self._update_account_metrics(account.email)
+            jobs.append((
+                "warmup.send",
+                {"from_email": account.email, "to_email": participant.email},
+                due_at
+            ))
+            due_at += timedelta(seconds=self._natural_delay())
+        
+        return await JobScheduler.schedule_many(jobs, shard=shard_of(account.email))
+
+    async def _run_cycle_job(self, payload: dict) -> List[str]:
+        entry = self.active_accounts.get(payload["email"])
+        # On-demand cycles take the same daily claim as run_cycles, so they can't add volume
+        if entry is None or not await self._claim_daily_cycle(entry.email):
+            return []
+        return await self.process_warmup_cycle(entry)
+
+    async def _claim_daily_cycle(self, email: str) -> bool:
+        """Mark today's cycle as taken so a shard handoff or a repeated request can't repeat it"""
+        today = start_of_today()
+        document = await MongoDB.db.email_accounts.find_one_and_update(
+            {
+                "email": email,
+                "status": "active",
+                "$or": [{"last_warmup": None}, {"last_warmup": {"$lt": today}}]
+            },
+            {"$set": {"last_warmup": datetime.utcnow()}},
+            projection={"_id": 1}
+        )
+        return document is not None
 
-    async def _process_engagement(self, from_account: EmailAccount, to_account: EmailAccount):
+    async def run_cycles(
+        self,
+        coordinator: ShardCoordinator,
+        interval: float = settings.WARMUP_CYCLE_INTERVAL
+    ):
+        """Schedule the daily cycle of every account in this worker's shards"""
+        while True:
+            owned = [entry.email for entry in self.network_pool if coordinator.owns(entry.email)]
+            try:
+                due = await self._due_cycles(owned)
+            except Exception as e:
+                logger.error(f"Error finding due warmup cycles: {str(e)}")
+                due = []
+            for email in due:
+                entry = self.active_accounts.get(email)
+                if entry is None or not coordinator.owns(email):
+                    continue
+                try:
+                    if await self._claim_daily_cycle(email):
+                        await self.process_warmup_cycle(entry)
+                except Exception as e:
+                    logger.error(f"Error starting warmup cycle for {email}: {str(e)}")
+            await asyncio.sleep(interval)
+
+    async def _due_cycles(self, emails: List[str]) -> List[str]:
+        """Those of ``emails`` that are active and haven't had today's cycle yet.
+
+        One indexed query per ``NETWORK_LOAD_BATCH_SIZE`` accounts, so a pass
+        where every cycle already ran costs a handful of reads instead of a
+        claim attempt per account.
+        """
+        today = start_of_today()
+        due = []
+        for start in range(0, len(emails), settings.NETWORK_LOAD_BATCH_SIZE):
+            cursor = MongoDB.db.email_accounts.find(
+                {
+                    "email": {"$in": emails[start:start + settings.NETWORK_LOAD_BATCH_SIZE]},
+                    "status": "active",
+                    "$or": [{"last_warmup": None}, {"last_warmup": {"$lt": today}}]
+                },
+                {"email": 1, "_id": 0}
+            )
+            due.extend([document["email"] async for document in cursor])
+        return due
+
+    def _natural_delay(self) -> int:
+        return random.randint(
+            self.settings.engagement_delay_min,
+            self.settings.engagement_delay_max
+        )
+
+    async def _run_send_job(self, payload: dict) -> bool:
+        accounts = await self.credentials.get_many([payload["from_email"], payload["to_email"]])
+        account = accounts.get(payload["from_email"])
+        participant = accounts.get(payload["to_email"])
+        if account is None or participant is None:
+            return False
+        
+        result = await self.send_warmup_email(account, participant)
+        if not result:
+            await RetryQueue.handle_failure(
+                "warmup.send", payload, result, account.email, participant.email,
+                shard=shard_of(account.email)
+            )
+        elif not settings.IMAP_IDLE_ENABLED:
+            # Engage once the message has had time to arrive
+            await JobScheduler.schedule(
+                "warmup.engage",
+                {"from_email": participant.email, "to_email": account.email, "message_id": result.message_id},
+                delay=self._natural_delay(),
+                shard=shard_of(participant.email)
+            )
+        
+        # Update account metrics
+        await self._update_account_metrics(account.email)
+        return result.ok
+
+    async def consume_placement_events(self, listener: IdleListener):
+        """Schedule engagement for warmup mail as the listener sees it arrive"""
+        while True:
+            match = await listener.events.get()
+            try:
+                await JobScheduler.schedule(
+                    "warmup.engage",
+                    {
+                        "from_email": match.recipient,
+                        "to_email": match.sender,
+                        "message_id": match.message_id,
+                        "placement": match.placement
+                    },
+                    delay=self._natural_delay(),
+                    shard=shard_of(match.recipient)
+                )
+            except Exception as e:
+                logger.error(f"Error scheduling engagement for {match.message_id}: {str(e)}")
+            finally:
+                listener.events.task_done()
+
+    async def _run_engage_job(self, payload: dict) -> bool:
+        accounts = await self.credentials.get_many([payload["from_email"], payload["to_email"]])
+        participant = accounts.get(payload["from_email"])
+        account = accounts.get(payload["to_email"])
+        if account is None or participant is None:
+            return False
+        
+        await self._process_engagement(participant, account, payload.get("message_id"))
+        return True
+
+    async def _process_engagement(
+        self,
+        from_account: EmailAccount,
+        to_account: EmailAccount,
+        message_id: Optional[str] = None
+    ):
         """Process engagement actions for received emails"""
         engagement = random.choice(self.engagement_patterns)
+        message_id = message_id or await self.replies.latest_message_id(to_account.email, from_account.email)
+        if message_id is None:
+            return
+        
+        # Every engagement opens the message, and warmup mail found in spam is always rescued
+        actions = {"read", MOVE_TO_INBOX}
+        if engagement in ACTION_FLAGS:
+            actions.add(engagement)
+        placement = await self.engagements.perform(from_account, message_id, actions)
+        if placement is None:
+            logger.info(f"{message_id} not found in {from_account.email}'s mailbox, skipping engagement")
+            return
         
         if engagement == "reply":
-            reply_content = await generate_natural_response()
-            await self.send_warmup_email(from_account, to_account)
+            result = await self.replies.reply(from_account, to_account, message_id)
+            if not result:
+                return
         
         await self._log_engagement(
             from_account.email,
@@ -151,7 +361,8 @@ class WarmupEngine:
                             "$inc": {
                                 "warmup_stage": 1,
                                 "daily_limit": 10
-                            }
+                            },
+                            "$set": {"updated_at": datetime.utcnow()}
                         }
                     )
 
@@ -160,51 +371,35 @@ class WarmupEngine:
         base_volume = 5
         return base_volume * (2 ** (warmup_stage - 1))
 
-    def _select_network_participants(
+    async def _select_network_participants(
         self, 
         count: int, 
         exclude_email: str
-    ) -> List[EmailAccount]:
-        """Select random participants from the network"""
-        available = [acc for acc in self.network_pool if acc.email != exclude_email]
-        return random.sample(available, min(count, len(available)))
-
-    async def _generate_natural_subject(self) -> str:
-        """Generate a natural-looking email subject"""
-        subjects = [
-            "Quick question about the project",
-            "Following up on our discussion",
-            "Update on the recent changes",
-            "Thoughts on this approach?",
-            "Checking in"
-        ]
-        return random.choice(subjects)
-
-    async def _generate_email_body(self) -> str:
-        """Generate a natural-looking email body"""
-        # This should be enhanced with more sophisticated content generation
-        bodies = [
-            "I hope this email finds you well. I wanted to follow up on our previous discussion.",
-            "I've been reviewing the latest updates and had a few thoughts to share.",
-            "Just checking in to see how things are progressing on your end.",
-            "I came across something interesting that I thought might be relevant to our project."
-        ]
-        return random.choice(bodies)
+    ) -> List[RosterEntry]:
+        """Select weighted, constraint-aware participants from the network"""
+        return await self.network_pool.select(exclude_email, count)
 
-    async def _log_email_sent(self, from_email: str, to_email: str):
+    async def _log_email_sent(self, from_email: str, to_email: str, message_id: str, subject: str):
         """Log email sending activity"""
-        await MongoDB.db.email_logs.insert_one({
+        # Unbuffered: the recipient's worker may scan for this Message-ID as soon as it arrives
+        await log_sink.write_now("email_logs", {
             "from_email": from_email,
             "to_email": to_email,
+            "message_id": message_id,
+            "subject": subject,
             "sent_at": datetime.utcnow(),
             "type": "warmup",
             "status": "sent"
         })
+        await AccountCounters.record(from_email, sent=1)
 
     async def _log_engagement(self, from_email: str, to_email: str, engagement_type: str):
         """Log engagement activity"""
-        await MongoDB.db.engagement_logs.insert_one({
+        await log_sink.write("engagement_logs", {
             "from_email": from_email,
             "to_email": to_email,
             "engagement_type": engagement_type,
-            "timestamp](#)** ▋
+            "timestamp": datetime.utcnow()
+        })
+        if engagement_type == "reply":
+            await AccountCounters.record(to_email, replied=1)
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+from pymongo import UpdateOne
+from .mongodb import MongoDB
+
+COUNTER_FIELDS = ("sent", "delivered", "spam", "replied", "bounced")
+
+
+def hour_bucket(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def day_bucket(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class AccountCounters:
+    """Per-account send counters pre-aggregated into hour and day buckets.
+
+    Every event increments one hourly and one daily document with ``$inc``,
+    so "how many did this account send in the last 24h" reads at most 25
+    hourly buckets and a 7-day success rate reads 8 daily buckets, however
+    many raw log entries exist. Windows are aligned to bucket boundaries,
+    so a window can include up to one extra partial bucket.
+    """
+
+    @staticmethod
+    async def record(email: str, at: Optional[datetime] = None, **counts: int):
+        increments = {field: n for field, n in counts.items() if n}
+        unknown = set(increments) - set(COUNTER_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown counter fields: {', '.join(sorted(unknown))}")
+        if not increments:
+            return
+
+        at = at or datetime.utcnow()
+        await MongoDB.db.account_counters.bulk_write([
+            UpdateOne(
+                {"email": email, "granularity": granularity, "bucket": bucket},
+                {"$inc": increments},
+                upsert=True
+            )
+            for granularity, bucket in (("hour", hour_bucket(at)), ("day", day_bucket(at)))
+        ], ordered=False)
+
+    @staticmethod
+    async def _sum(
+        emails: Iterable[str],
+        granularity: str,
+        since: datetime
+    ) -> Dict[str, Dict[str, int]]:
+        emails = list(emails)
+        totals = {email: dict.fromkeys(COUNTER_FIELDS, 0) for email in emails}
+        cursor = MongoDB.db.account_counters.find(
+            {"email": {"$in": emails}, "granularity": granularity, "bucket": {"$gte": since}},
+            {"_id": 0, "email": 1, **{field: 1 for field in COUNTER_FIELDS}}
+        )
+        async for bucket in cursor:
+            account_totals = totals[bucket["email"]]
+            for field in COUNTER_FIELDS:
+                account_totals[field] += bucket.get(field, 0)
+        return totals
+
+    @staticmethod
+    async def sent_in_last_day(emails: Iterable[str]) -> Dict[str, int]:
+        """Emails sent per account over the trailing 24 hours, in one query"""
+        since = hour_bucket(datetime.utcnow() - timedelta(days=1))
+        totals = await AccountCounters._sum(emails, "hour", since)
+        return {email: counts["sent"] for email, counts in totals.items()}
+
+    @staticmethod
+    async def daily_totals_many(emails: Iterable[str], days: int) -> Dict[str, Dict[str, int]]:
+        """``daily_totals`` for several accounts, in one query"""
+        since = day_bucket(datetime.utcnow() - timedelta(days=days))
+        return await AccountCounters._sum(emails, "day", since)
+
+    @staticmethod
+    async def daily_totals(email: str, days: int) -> Dict[str, int]:
+        since = day_bucket(datetime.utcnow() - timedelta(days=days))
+        totals = await AccountCounters._sum([email], "day", since)
+        return totals[email]
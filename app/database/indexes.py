@@ -0,0 +1,230 @@
+import asyncio
+import sys
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import logging
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+INDEX_OPTIONS_CONFLICT = 85
+LOG_TTL_SECONDS = settings.LOG_RETENTION_DAYS * 24 * 60 * 60
+
+
+class IndexSpec(NamedTuple):
+    collection: str
+    keys: List[Tuple[str, int]]
+    options: Dict[str, Any] = {}
+
+    @property
+    def name(self) -> str:
+        return "_".join(f"{field}_{direction}" for field, direction in self.keys)
+
+
+class HotQuery(NamedTuple):
+    name: str
+    collection: str
+    filter: Dict[str, Any]
+    sort: Optional[List[Tuple[str, int]]] = None
+
+
+# Every index the application relies on. Add new entries here rather than
+# calling create_index from feature code so startup stays the single owner.
+INDEXES: List[IndexSpec] = [
+    IndexSpec("users", [("email", ASCENDING)], {"unique": True}),
+    IndexSpec("email_accounts", [("email", ASCENDING)], {"unique": True}),
+    IndexSpec("email_accounts", [("user_id", ASCENDING), ("is_active", ASCENDING)]),
+    IndexSpec("email_accounts", [("status", ASCENDING)]),
+    IndexSpec("email_accounts", [("updated_at", ASCENDING)]),
+    IndexSpec("email_metrics", [("email", ASCENDING)], {"unique": True}),
+    IndexSpec("email_logs", [("from_email", ASCENDING), ("sent_at", DESCENDING)]),
+    IndexSpec("email_logs", [("sent_at", ASCENDING)], {"expireAfterSeconds": LOG_TTL_SECONDS}),
+    IndexSpec("email_logs", [("message_id", ASCENDING)], {"sparse": True}),
+    IndexSpec(
+        "engagement_logs",
+        [("timestamp", ASCENDING)],
+        {"expireAfterSeconds": LOG_TTL_SECONDS}
+    ),
+    IndexSpec("email_pool", [("campaign_id", ASCENDING), ("status", ASCENDING)]),
+    IndexSpec("email_pool", [("lease_id", ASCENDING)], {"sparse": True}),
+    IndexSpec(
+        "email_pool",
+        [("status", ASCENDING), ("lease_expires_at", ASCENDING)],
+        {"partialFilterExpression": {"status": "leased"}}
+    ),
+    IndexSpec(
+        "account_counters",
+        [("email", ASCENDING), ("granularity", ASCENDING), ("bucket", ASCENDING)],
+        {"unique": True}
+    ),
+    IndexSpec(
+        "imap_sync_state",
+        [("email", ASCENDING), ("folder", ASCENDING)],
+        {"unique": True}
+    ),
+    IndexSpec("scheduled_jobs", [("status", ASCENDING), ("due_at", ASCENDING)]),
+    IndexSpec("scheduled_jobs", [("lease_id", ASCENDING)], {"sparse": True}),
+    IndexSpec(
+        "scheduled_jobs",
+        [("finished_at", ASCENDING)],
+        {"expireAfterSeconds": settings.SCHEDULER_JOB_RETENTION_DAYS * 24 * 60 * 60}
+    ),
+    IndexSpec("dead_letters", [("from_email", ASCENDING), ("created_at", DESCENDING)]),
+    IndexSpec(
+        "warmup_pairs",
+        [("sender", ASCENDING), ("recipient", ASCENDING)],
+        {"unique": True}
+    ),
+    IndexSpec("warmup_pairs", [("until", ASCENDING)], {"expireAfterSeconds": 0}),
+    IndexSpec("shard_leases", [("owner", ASCENDING)]),
+    IndexSpec("workers", [("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    IndexSpec(
+        "daily_summaries",
+        [("email", ASCENDING), ("day", ASCENDING)],
+        {"unique": True}
+    ),
+]
+
+# Queries on the request and warmup hot paths; each must be served by an index.
+HOT_QUERIES: List[HotQuery] = [
+    HotQuery("login user", "users", {"email": "probe@example.com"}),
+    HotQuery("account by email", "email_accounts", {"email": "probe@example.com"}),
+    HotQuery("campaign accounts", "email_accounts", {"user_id": "probe", "is_active": True}),
+    HotQuery("active network", "email_accounts", {"status": "active"}),
+    HotQuery("changed accounts", "email_accounts", {"updated_at": {"$gt": 0}}, [("updated_at", ASCENDING)]),
+    HotQuery("account metrics", "email_metrics", {"email": "probe@example.com"}),
+    HotQuery(
+        "recent sends",
+        "email_logs",
+        {"from_email": "probe@example.com", "sent_at": {"$gte": 0}},
+        [("sent_at", DESCENDING)]
+    ),
+    HotQuery(
+        "latest to peer",
+        "email_logs",
+        {"from_email": "probe@example.com", "to_email": "peer@example.com", "message_id": {"$exists": True}},
+        [("sent_at", DESCENDING)]
+    ),
+    HotQuery("thread lookup", "email_logs", {"message_id": {"$in": ["<probe@example.com>"]}}),
+    HotQuery(
+        "placement match",
+        "email_logs",
+        {"message_id": {"$in": ["<probe@example.com>"]}, "to_email": "probe@example.com"}
+    ),
+    HotQuery(
+        "imap sync state",
+        "imap_sync_state",
+        {"email": "probe@example.com", "folder": "INBOX"}
+    ),
+    HotQuery(
+        "pending targets",
+        "email_pool",
+        {"campaign_id": "probe", "status": "pending", "retry_at": {"$not": {"$gt": 0}}}
+    ),
+    HotQuery("lease batch", "email_pool", {"lease_id": "probe"}),
+    HotQuery("expired leases", "email_pool", {"status": "leased", "lease_expires_at": {"$lt": 0}}),
+    HotQuery(
+        "counter buckets",
+        "account_counters",
+        {"email": {"$in": ["probe@example.com"]}, "granularity": "hour", "bucket": {"$gte": 0}}
+    ),
+    HotQuery(
+        "due jobs",
+        "scheduled_jobs",
+        {"status": "pending", "due_at": {"$lte": 0}, "kind": {"$in": ["probe"]}},
+        [("due_at", ASCENDING)]
+    ),
+    HotQuery("job lease batch", "scheduled_jobs", {"lease_id": "probe"}),
+    HotQuery("expired job leases", "scheduled_jobs", {"status": "leased", "lease_expires_at": {"$lt": 0}}),
+    HotQuery(
+        "receive slot",
+        "account_counters",
+        {"email": "probe@example.com", "granularity": "day", "bucket": 0, "received": {"$not": {"$gte": 0}}}
+    ),
+    HotQuery(
+        "recent pairings",
+        "warmup_pairs",
+        {"sender": "probe@example.com", "recipient": {"$in": ["peer@example.com"]}, "until": {"$gt": 0}}
+    ),
+    HotQuery("held shards", "shard_leases", {"owner": "probe", "lease_expires_at": 0}),
+    HotQuery("live workers", "workers", {"expires_at": {"$gt": 0}}),
+    HotQuery(
+        "summary history",
+        "daily_summaries",
+        {"email": "probe@example.com", "day": {"$gte": 0}},
+        [("day", DESCENDING)]
+    ),
+]
+
+
+async def ensure_indexes(db) -> List[str]:
+    """Create every registered index; existing identical indexes are a no-op"""
+    created = []
+    for spec in INDEXES:
+        try:
+            created.append(await db[spec.collection].create_index(
+                spec.keys,
+                name=spec.name,
+                background=True,
+                **spec.options
+            ))
+        except OperationFailure as e:
+            if e.code == INDEX_OPTIONS_CONFLICT and "expireAfterSeconds" in spec.options:
+                # Retention window changed; TTL can be altered in place
+                await db.command(
+                    "collMod",
+                    spec.collection,
+                    index={"name": spec.name, "expireAfterSeconds": spec.options["expireAfterSeconds"]}
+                )
+                created.append(spec.name)
+                continue
+            logger.error(f"Could not create index {spec.name} on {spec.collection}: {str(e)}")
+    return created
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    if isinstance(plan, dict):
+        stages = [plan["stage"]] if "stage" in plan else []
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+        return stages
+    if isinstance(plan, list):
+        return [stage for item in plan for stage in _plan_stages(item)]
+    return []
+
+
+async def verify_query_plans(db) -> List[str]:
+    """Explain every hot query and return the names of those that COLLSCAN"""
+    scans = []
+    for query in HOT_QUERIES:
+        cursor = db[query.collection].find(query.filter)
+        if query.sort:
+            cursor = cursor.sort(query.sort)
+        explanation = await cursor.explain()
+        winning_plan = explanation.get("queryPlanner", {}).get("winningPlan", {})
+        if "COLLSCAN" in _plan_stages(winning_plan):
+            scans.append(query.name)
+            logger.error(f"Hot query '{query.name}' on {query.collection} is a COLLSCAN")
+    return scans
+
+
+async def main() -> int:
+    from .mongodb import MongoDB
+
+    await MongoDB.connect_to_database()
+    try:
+        scans = await verify_query_plans(MongoDB.db)
+    finally:
+        await MongoDB.close_database_connection()
+
+    if scans:
+        print(f"COLLSCAN in {len(scans)} hot queries: {', '.join(scans)}")
+        return 1
+    print(f"All {len(HOT_QUERIES)} hot queries use an index.")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(main()))
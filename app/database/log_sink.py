@@ -0,0 +1,149 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+import logging
+from pymongo.errors import BulkWriteError
+from ..core.config import settings
+from .mongodb import MongoDB
+
+logger = logging.getLogger(__name__)
+
+
+class LogSink:
+    """Buffer log records and write them with unordered ``insert_many``.
+
+    Records are grouped per collection and flushed when a collection's
+    buffer reaches ``batch_size`` or every ``flush_interval`` seconds,
+    whichever comes first. ``write`` never raises: callers log after work
+    that already happened (a message was sent), so a database outage must
+    not turn that into a failure. Records that couldn't be written stay
+    buffered and are retried by the periodic flush; writers don't retry
+    inline for ``flush_interval`` after a failed flush. Once
+    ``max_buffered`` records are queued, new ones are dropped and counted
+    rather than growing the buffer without bound.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = settings.LOG_SINK_BATCH_SIZE,
+        flush_interval: float = settings.LOG_SINK_FLUSH_INTERVAL,
+        max_buffered: int = settings.LOG_SINK_MAX_BUFFERED,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self._buffers: Dict[str, List[dict]] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self.flushes = 0
+        self.records_written = 0
+        self.records_failed = 0
+        self.records_dropped = 0
+        self.last_flush_latency: Optional[float] = None
+        self._retry_at = 0.0
+        self._dropping = False
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(buffer) for buffer in self._buffers.values())
+
+    async def write(self, collection: str, record: dict):
+        if self.queue_depth >= self.max_buffered:
+            await self._try_flush()
+            if self.queue_depth >= self.max_buffered:
+                if not self._dropping:
+                    logger.error(f"Log sink full ({self.queue_depth} records); dropping new records")
+                    self._dropping = True
+                self.records_dropped += 1
+                return
+        self._dropping = False
+        buffer = self._buffers.setdefault(collection, [])
+        buffer.append(record)
+        self._ensure_flusher()
+        if len(buffer) >= self.batch_size:
+            await self._try_flush(collection)
+
+    async def write_now(self, collection: str, record: dict):
+        """Insert ``record`` now instead of buffering it; buffers it if that fails.
+
+        For records another worker may look up within the flush interval,
+        like the Message-IDs of sent warmup mail that placement scans match.
+        """
+        try:
+            await MongoDB.db[collection].insert_one(record)
+            self.records_written += 1
+        except Exception as e:
+            logger.error(f"Error writing to {collection}, buffering instead: {str(e)}")
+            await self.write(collection, record)
+
+    async def _try_flush(self, collection: Optional[str] = None):
+        """Flush unless a recent flush failed; failures are logged, not raised"""
+        if time.monotonic() < self._retry_at:
+            return
+        try:
+            await self.flush(collection)
+        except Exception as e:
+            self._retry_at = time.monotonic() + self.flush_interval
+            logger.error(f"Error flushing log sink: {str(e)}")
+
+    def _ensure_flusher(self):
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self._retry_at = 0.0
+            await self._try_flush()
+
+    async def flush(self, collection: Optional[str] = None):
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            names = [collection] if collection else list(self._buffers)
+            for name in names:
+                await self._flush_collection(name)
+
+    async def _flush_collection(self, name: str):
+        batch = self._buffers.pop(name, None)
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        try:
+            await MongoDB.db[name].insert_many(batch, ordered=False)
+            self.records_written += len(batch)
+        except BulkWriteError as e:
+            # Unordered inserts keep going past bad records; only those are lost
+            failed = len(e.details.get("writeErrors", []))
+            self.records_written += len(batch) - failed
+            self.records_failed += failed
+            logger.error(f"Failed to write {failed} records to {name}")
+        except Exception:
+            # Database unreachable: put the batch back in front of newer records
+            self._buffers[name] = batch + self._buffers.get(name, [])
+            raise
+        finally:
+            self.last_flush_latency = time.perf_counter() - started
+            self.flushes += 1
+
+    async def close(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        return {
+            "queue_depth": self.queue_depth,
+            "flushes": self.flushes,
+            "records_written": self.records_written,
+            "records_failed": self.records_failed,
+            "records_dropped": self.records_dropped,
+            "last_flush_latency_ms": (
+                self.last_flush_latency * 1000 if self.last_flush_latency is not None else None
+            ),
+        }
+
+
+log_sink = LogSink()
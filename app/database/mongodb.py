@@ -1,6 +1,7 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo import MongoClient
 from ..core.config import settings
+from .indexes import ensure_indexes
 
 class MongoDB:
     client: AsyncIOMotorClient = None
@@ -10,10 +11,15 @@ class MongoDB:
     async def connect_to_database(cls):
         cls.client = AsyncIOMotorClient(settings.MONGODB_URL)
         cls.db = cls.client[settings.DATABASE_NAME]
+        if settings.ENSURE_INDEXES_ON_STARTUP:
+            await ensure_indexes(cls.db)
         print("Connected to MongoDB.")
 
     @classmethod
     async def close_database_connection(cls):
+        from .log_sink import log_sink
+        
         if cls.client is not None:
+            await log_sink.close()
             cls.client.close()
             print("MongoDB connection closed.")
@@ -1,5 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from .api.endpoints import auth, campaigns, email_accounts, jobs
+from .core.auth import user_cache
+from .core.security import password_hasher
+from .core.config import settings
+from .core.smtp_pool import smtp_pool
+from .core.imap_sessions import imap_pool
+from .core.dns_cache import dns_cache
+from .core.rate_limiter import send_limiter
+from .database.mongodb import MongoDB
+from .database.log_sink import log_sink
 
 app = FastAPI(title="Email Warmup API")
 
@@ -12,6 +22,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["auth"])
+app.include_router(campaigns.router, prefix=settings.API_V1_STR, tags=["campaigns"])
+app.include_router(email_accounts.router, prefix=settings.API_V1_STR, tags=["accounts"])
+app.include_router(jobs.router, prefix=settings.API_V1_STR, tags=["jobs"])
+
+@app.on_event("startup")
+async def startup_event():
+    await MongoDB.connect_to_database()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await smtp_pool.close_all()
+    await imap_pool.close_all()
+    password_hasher.shutdown()
+    await MongoDB.close_database_connection()
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to Email Warmup API"}
+
+@app.get("/stats")
+async def stats():
+    return {
+        "log_sink": log_sink.stats(),
+        "smtp_pool": smtp_pool.stats(),
+        "dns_cache": dns_cache.stats(),
+        "send_rates": send_limiter.rates(),
+        "auth_cache": user_cache.stats(),
+        "password_hasher": password_hasher.stats()
+    }
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from enum import Enum
 
@@ -45,6 +45,49 @@ class EmailMetrics(BaseModel):
     engagement_rate: float = 0.0
     last_updated: datetime = datetime.utcnow()
 
+class DailySummary(BaseModel):
+    email: EmailStr
+    day: datetime
+    sent: int = 0
+    delivered: int = 0
+    opened: int = 0
+    replied: int = 0
+    engagements: Dict[str, int] = {}
+
+class AccountValidation(BaseModel):
+    email: EmailStr
+    status: WarmupStatus
+    pending: bool = True
+    valid: Optional[bool] = None
+    smtp_error: Optional[str] = None
+    imap_error: Optional[str] = None
+    checked_at: Optional[datetime] = None
+    elapsed: Optional[float] = None
+
+class ImportRowError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    error: str
+
+class ImportReport(BaseModel):
+    received: int = 0
+    imported: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []
+    validation_job_ids: List[str] = []
+
+class MXRecord(BaseModel):
+    preference: int
+    exchange: str
+
+class DomainDiagnostics(BaseModel):
+    domain: str
+    mx: List[MXRecord] = []
+    spf: Optional[str] = None
+    dkim: Dict[str, str] = {}
+    dmarc: Optional[str] = None
+
 class WarmupSettings(BaseModel):
     initial_volume: int = 5
     max_volume: int = 100
@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import Any, Optional
+from datetime import datetime
+
+class JobAccepted(BaseModel):
+    job_id: str
+    kind: str
+    status: str = "pending"
+
+class JobStatus(BaseModel):
+    id: str
+    kind: str
+    status: str
+    attempts: int = 0
+    due_at: datetime
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
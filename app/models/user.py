@@ -11,9 +11,16 @@ class UserBase(BaseModel):
 class UserCreate(UserBase):
     password: str
 
-class UserUpdate(UserBase):
+class UserUpdate(BaseModel):
+    full_name: Optional[str] = None
     password: Optional[str] = None
 
+class UserPublic(UserBase):
+    """What the API returns about a user; never includes the password hash"""
+    id: str
+    created_at: datetime = datetime.utcnow()
+    updated_at: datetime = datetime.utcnow()
+
 class UserInDB(UserBase):
     id: str
     hashed_password: str
@@ -0,0 +1,128 @@
+"""Warmup worker process, run separately from the API.
+
+    python -m app.worker
+
+Each worker owns a slice of the account shards, runs the daily warmup
+cycles of its accounts and executes the jobs the API enqueues (account
+validation, on-demand cycles) along with the sends and engagement those
+schedule. Inbox placement comes from IMAP IDLE when ``IMAP_IDLE_ENABLED``
+is set and from polling every ``IMAP_POLL_INTERVAL`` seconds otherwise.
+Every worker also rolls completed days of raw logs up into
+``daily_summaries`` before their TTL removes them. Start as many as
+throughput needs, on one node or several.
+"""
+import asyncio
+import signal
+import logging
+from .core.config import settings
+from .core.idle_listener import IdleListener
+from .core.imap_sessions import imap_pool
+from .core.retention import LogRollup
+from .core.scheduler import JobScheduler
+from .core.sharding import ShardCoordinator
+from .core.smtp_pool import smtp_pool
+from .core.validation import AccountValidator
+from .core.warmup_engine import WarmupEngine
+from .database.mongodb import MongoDB
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    def __init__(self):
+        self.engine = WarmupEngine(on_member_change=self._on_member_changed)
+        self.validator = AccountValidator()
+        self.coordinator = ShardCoordinator(on_change=self._on_shards_changed)
+        self.scheduler = JobScheduler(coordinator=self.coordinator)
+        self.listener = IdleListener() if settings.IMAP_IDLE_ENABLED else None
+        self._stopped = asyncio.Event()
+        self._rewatch_task = None
+        self._watch_tasks = set()
+
+    def _on_shards_changed(self, gained, lost):
+        if self.listener is not None:
+            self._rewatch_task = asyncio.create_task(self._rewatch())
+
+    async def _rewatch(self):
+        """Move IDLE connections along with account ownership"""
+        owned = []
+        for entry in list(self.engine.network_pool):
+            if self.coordinator.owns(entry.email):
+                owned.append(entry.email)
+            else:
+                self.listener.unwatch(entry.email)
+        accounts = await self.engine.credentials.get_many(owned)
+        self.listener.watch_many(accounts.values())
+
+    def _on_member_changed(self, email: str, active: bool):
+        """Follow accounts that join, leave or change credentials between rebalances"""
+        if self.listener is None:
+            return
+        self.listener.unwatch(email)
+        if active and self.coordinator.owns(email):
+            task = asyncio.create_task(self._watch(email))
+            self._watch_tasks.add(task)
+            task.add_done_callback(self._watch_tasks.discard)
+
+    async def _watch(self, email: str):
+        account = await self.engine.credentials.get(email)
+        # The account may have left or changed hands while its credentials loaded
+        if account is not None and email in self.engine.active_accounts and self.coordinator.owns(email):
+            self.listener.watch(account)
+
+    def stop(self):
+        self._stopped.set()
+
+    async def run(self):
+        await MongoDB.connect_to_database()
+        await self.engine.initialize_network()
+        self.engine.register_jobs(self.scheduler)
+        self.validator.register_jobs(self.scheduler)
+
+        background = [
+            asyncio.create_task(self.coordinator.run()),
+            self.engine.start_network_sync(),
+            asyncio.create_task(self.engine.run_cycles(self.coordinator)),
+            asyncio.create_task(LogRollup.run_forever()),
+        ]
+        if self.listener is not None:
+            background.append(asyncio.create_task(self.engine.consume_placement_events(self.listener)))
+        else:
+            background.append(asyncio.create_task(self.engine.run_placement_checks(self.coordinator)))
+        jobs = asyncio.create_task(self.scheduler.run())
+        logger.info(f"Worker {self.coordinator.worker_id} started")
+
+        try:
+            await self._stopped.wait()
+        finally:
+            logger.info(f"Worker {self.coordinator.worker_id} stopping")
+            # Let the scheduler hand back leased jobs and finish running ones
+            self.scheduler.stop()
+            await asyncio.gather(jobs, return_exceptions=True)
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
+            await self.coordinator.leave()
+            for task in list(self._watch_tasks):
+                task.cancel()
+            if self.listener is not None:
+                await self.listener.stop()
+            await smtp_pool.close_all()
+            await imap_pool.close_all()
+            await MongoDB.close_database_connection()
+
+
+async def main():
+    worker = Worker()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    await worker.run()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(main())
@@ -0,0 +1,29 @@
+"""Warmup messages generated per second, with near-duplicate checks.
+
+    python -m benchmarks.content_generation [messages] [accounts]
+"""
+import sys
+import time
+from app.core.content import ContentGenerator
+
+
+def main(count: int = 50_000, accounts: int = 1_000):
+    generator = ContentGenerator(seed=1)
+    started = time.perf_counter()
+    generator.load()
+    print(
+        f"load: {(time.perf_counter() - started) * 1e3:.0f} ms for "
+        f"{len(generator.subjects)} subjects, {len(generator.body)} body sentences"
+    )
+
+    senders = [f"seed{i}@domain{i % 50}.com" for i in range(accounts)]
+    started = time.perf_counter()
+    for i in range(count):
+        generator.generate(senders[i % accounts])
+    elapsed = time.perf_counter() - started
+    print(f"{count} messages from {accounts} accounts: {count / elapsed:.0f} messages/s")
+    print(generator.stats())
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
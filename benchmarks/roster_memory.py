@@ -0,0 +1,88 @@
+"""Memory and build time per network member: full accounts vs roster entries.
+
+    python -m benchmarks.roster_memory [accounts]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from bson import ObjectId
+from app.core.participant_selector import ParticipantSelector
+from app.core.roster import RosterEntry
+from app.models.email_account import EmailAccount
+
+PROVIDERS = ["smtp.gmail.com", "smtp.office365.com", "smtp.mail.yahoo.com", "smtp.zoho.com"]
+
+
+def make_documents(count: int):
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "email": f"seed{i}@domain{i % 500}.com",
+            "smtp_server": PROVIDERS[i % len(PROVIDERS)],
+            "smtp_port": 465,
+            "imap_server": PROVIDERS[i % len(PROVIDERS)].replace("smtp", "imap"),
+            "imap_port": 993,
+            "username": f"seed{i}@domain{i % 500}.com",
+            "password": f"app-password-{i:08d}",
+            "status": "active",
+            "warmup_stage": 1 + i % 6,
+            "daily_limit": 5 * (1 + i % 6),
+            "inbox_placement_rate": 0.9,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(count)
+    ]
+
+
+def build_accounts(documents):
+    """What the engine used to hold: a dict and a list of full models"""
+    accounts = {}
+    pool = []
+    for document in documents:
+        account = EmailAccount(**document)
+        accounts[account.email] = account
+        pool.append(account)
+    return accounts, pool
+
+
+def build_roster(documents):
+    """What it holds now: slim entries in a dict and the selector"""
+    roster = {}
+    selector = ParticipantSelector()
+    for document in documents:
+        entry = RosterEntry.from_document(document)
+        roster[entry.email] = entry
+        selector.add(entry, reputation=entry.reputation)
+    return roster, selector
+
+
+def measure(build, documents):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build(documents)
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, elapsed
+
+
+def main(count: int = 100_000):
+    documents = make_documents(count)
+    print(f"{count} accounts")
+    for label, build in (("EmailAccount", build_accounts), ("RosterEntry", build_roster)):
+        memory, elapsed = measure(build, documents)
+        print(
+            f"{label:>12}: {memory / count:7.0f} B/account  "
+            f"{memory / 2**20:7.1f} MiB total  "
+            f"{elapsed * 1e6 / count:6.2f} us/account"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,54 @@
+"""Messages rendered per second: MIMEMultipart + as_bytes vs compiled templates.
+
+    python -m benchmarks.template_render [messages]
+"""
+import random
+import sys
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import make_msgid
+from app.core.templates import DEFAULT_TEMPLATES, TemplateLibrary, display_name
+
+
+SUBJECT = "Following up on the launch checklist"
+BODY = "Hope your week is going well. I put together the draft and would love your feedback.\n\nTalk soon."
+
+
+def make_pairs(count: int):
+    return [(f"seed{i}@domain{i % 500}.com", f"peer{i}@domain{(i + 7) % 500}.com") for i in range(count)]
+
+
+def render_mime(pairs):
+    """What each send used to do: build the message tree, then serialize it"""
+    for sender, recipient in pairs:
+        template = random.choice(DEFAULT_TEMPLATES)
+        message = MIMEMultipart()
+        message["From"] = sender
+        message["To"] = recipient
+        message["Subject"] = template.subject.replace("{{subject}}", SUBJECT)
+        message["Message-ID"] = make_msgid(domain=sender.split("@")[1])
+        body = template.body.replace("{{recipient_name}}", display_name(recipient))
+        body = body.replace("{{sender_name}}", display_name(sender)).replace("{{body}}", BODY)
+        message.attach(MIMEText(body, "plain"))
+        message.as_bytes()
+
+
+def render_compiled(pairs):
+    templates = TemplateLibrary().get("warmup")
+    for sender, recipient in pairs:
+        random.choice(templates).render(sender, recipient, {"subject": SUBJECT, "body": BODY})
+
+
+def main(count: int = 20_000):
+    pairs = make_pairs(count)
+    print(f"{count} messages")
+    for label, render in (("MIMEMultipart", render_mime), ("compiled", render_compiled)):
+        started = time.perf_counter()
+        render(pairs)
+        elapsed = time.perf_counter() - started
+        print(f"{label:>13}: {count / elapsed:9.0f} messages/s  {elapsed * 1e6 / count:7.2f} us/message")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
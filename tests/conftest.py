@@ -0,0 +1,462 @@
+import copy
+from typing import Any, Dict, List, Optional, Tuple
+import pytest
+from bson import ObjectId
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+from app.database.indexes import INDEXES
+from app.database.mongodb import MongoDB
+
+MISSING = object()
+
+
+def lookup(document: dict, path: str) -> Any:
+    value: Any = document
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return MISSING
+        value = value[part]
+    return value
+
+
+def equals(value: Any, expected: Any) -> bool:
+    if value is MISSING:
+        return expected is None
+    if isinstance(value, list) and not isinstance(expected, list):
+        return expected in value
+    return value == expected
+
+
+def compare(value: Any, bound: Any, op) -> bool:
+    if value is MISSING or value is None:
+        return False
+    try:
+        return op(value, bound)
+    except TypeError:
+        return False
+
+
+OPERATORS = {
+    "$eq": equals,
+    "$ne": lambda value, arg: not equals(value, arg),
+    "$in": lambda value, arg: any(equals(value, a) for a in arg),
+    "$nin": lambda value, arg: not any(equals(value, a) for a in arg),
+    "$lt": lambda value, arg: compare(value, arg, lambda a, b: a < b),
+    "$lte": lambda value, arg: compare(value, arg, lambda a, b: a <= b),
+    "$gt": lambda value, arg: compare(value, arg, lambda a, b: a > b),
+    "$gte": lambda value, arg: compare(value, arg, lambda a, b: a >= b),
+    "$exists": lambda value, arg: (value is not MISSING) == bool(arg),
+    "$not": lambda value, arg: not matches_condition(value, arg),
+}
+
+
+def matches_condition(value: Any, condition: Any) -> bool:
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        return all(OPERATORS[op](value, arg) for op, arg in condition.items())
+    return equals(value, condition)
+
+
+def matches(document: dict, query: Optional[dict]) -> bool:
+    for field, condition in (query or {}).items():
+        if field == "$or":
+            if not any(matches(document, branch) for branch in condition):
+                return False
+        elif field == "$and":
+            if not all(matches(document, branch) for branch in condition):
+                return False
+        elif not matches_condition(lookup(document, field), condition):
+            return False
+    return True
+
+
+def assign(document: dict, path: str, value: Any):
+    *parents, last = path.split(".")
+    for part in parents:
+        document = document.setdefault(part, {})
+    document[last] = value
+
+
+def remove(document: dict, path: str):
+    *parents, last = path.split(".")
+    for part in parents:
+        document = document.get(part)
+        if not isinstance(document, dict):
+            return
+    document.pop(last, None)
+
+
+def apply_update(document: dict, update: dict, inserting: bool = False):
+    if not any(key.startswith("$") for key in update):
+        kept = document.get("_id")
+        document.clear()
+        document.update(copy.deepcopy(update))
+        if kept is not None:
+            document.setdefault("_id", kept)
+        return
+    for op, fields in update.items():
+        for path, value in fields.items():
+            current = lookup(document, path)
+            if op == "$set" or (op == "$setOnInsert" and inserting):
+                assign(document, path, copy.deepcopy(value))
+            elif op == "$unset":
+                remove(document, path)
+            elif op == "$inc":
+                assign(document, path, (0 if current is MISSING else current) + value)
+            elif op == "$max":
+                assign(document, path, value if current is MISSING else max(current, value))
+            elif op == "$min":
+                assign(document, path, value if current is MISSING else min(current, value))
+            elif op == "$push":
+                values = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                assign(document, path, ([] if current is MISSING else current) + list(values))
+            elif op != "$setOnInsert":
+                raise NotImplementedError(op)
+
+
+def sort_key(spec: List[Tuple[str, int]]):
+    def key(document):
+        parts = []
+        for field, direction in spec:
+            value = lookup(document, field)
+            # Missing and None sort first, like Mongo
+            rank = (value is not MISSING and value is not None, value if value not in (MISSING, None) else 0)
+            parts.append(rank if direction > 0 else Reverse(rank))
+        return parts
+    return key
+
+
+class Reverse:
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def sort_spec(key_or_list, direction=None) -> List[Tuple[str, int]]:
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or 1)]
+    return list(key_or_list)
+
+
+def evaluate(expression: Any, document: dict) -> Any:
+    """Aggregation expression: ``$field`` paths, $cond, $eq, $arrayToObject and literals"""
+    if isinstance(expression, str) and expression.startswith("$"):
+        value = lookup(document, expression[1:])
+        return None if value is MISSING else value
+    if isinstance(expression, dict):
+        if len(expression) == 1 and next(iter(expression)).startswith("$"):
+            op, args = next(iter(expression.items()))
+            if op == "$eq":
+                return evaluate(args[0], document) == evaluate(args[1], document)
+            if op == "$cond":
+                condition, then, otherwise = args
+                return evaluate(then if evaluate(condition, document) else otherwise, document)
+            if op == "$arrayToObject":
+                return {pair["k"]: pair["v"] for pair in evaluate(args, document)}
+            raise NotImplementedError(op)
+        return {key: evaluate(value, document) for key, value in expression.items()}
+    return expression
+
+
+def group(documents: List[dict], spec: dict) -> List[dict]:
+    groups: Dict[Any, dict] = {}
+    for document in documents:
+        key = evaluate(spec["_id"], document)
+        hashable = repr(key)
+        result = groups.setdefault(hashable, {"_id": key})
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            (op, argument), = accumulator.items()
+            value = evaluate(argument, document)
+            if op == "$sum":
+                result[field] = result.get(field, 0) + value
+            elif op == "$push":
+                result.setdefault(field, []).append(value)
+            else:
+                raise NotImplementedError(op)
+    return list(groups.values())
+
+
+def project(document: dict, spec: dict) -> dict:
+    projected = {} if spec.get("_id", 1) in (0, False) else {"_id": document.get("_id")}
+    for field, value in spec.items():
+        if field == "_id":
+            continue
+        if value is True or value == 1:
+            if field in document:
+                projected[field] = document[field]
+        else:
+            projected[field] = evaluate(value, document)
+    return projected
+
+
+class FakeCursor:
+    def __init__(self, documents: List[dict]):
+        self.documents = documents
+
+    def sort(self, key_or_list, direction=None):
+        self.documents = sorted(self.documents, key=sort_key(sort_spec(key_or_list, direction)))
+        return self
+
+    def skip(self, count: int):
+        self.documents = self.documents[count:]
+        return self
+
+    def limit(self, count: int):
+        if count:
+            self.documents = self.documents[:count]
+        return self
+
+    def batch_size(self, size: int):
+        return self
+
+    async def to_list(self, length: Optional[int] = None):
+        return self.documents[:length] if length else list(self.documents)
+
+    def __aiter__(self):
+        async def iterate():
+            for document in self.documents:
+                yield document
+        return iterate()
+
+
+class FakeCollection:
+    """In-memory stand-in for a Motor collection.
+
+    Supports the query and update operators and the aggregation stages the
+    application uses, enforces the unique indexes declared in
+    ``app.database.indexes`` and records every call in ``calls`` as
+    ``(method, args, kwargs)``. Setting ``fail[method]`` to an exception
+    makes that method raise it.
+    """
+
+    def __init__(self, name: str = "", unique: Tuple[Tuple[str, ...], ...] = (), database=None):
+        self.name = name
+        self.database = database
+        self.unique = (("_id",),) + tuple(unique)
+        self.documents: List[dict] = []
+        self.calls: List[Tuple[str, tuple, dict]] = []
+        self.fail: Dict[str, Exception] = {}
+
+    def _record(self, method: str, *args, **kwargs):
+        self.calls.append((method, args, kwargs))
+        if method in self.fail:
+            raise self.fail[method]
+
+    def calls_to(self, method: str) -> List[Tuple[tuple, dict]]:
+        return [(args, kwargs) for name, args, kwargs in self.calls if name == method]
+
+    def _select(self, query: Optional[dict], sort=None) -> List[dict]:
+        found = [d for d in self.documents if matches(d, query)]
+        if sort:
+            found.sort(key=sort_key(sort_spec(sort)))
+        return found
+
+    def _check_unique(self, document: dict):
+        for fields in self.unique:
+            key = tuple(lookup(document, field) for field in fields)
+            if all(value is MISSING for value in key):
+                continue
+            for other in self.documents:
+                if other is not document and tuple(lookup(other, field) for field in fields) == key:
+                    raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} {fields}", 11000)
+
+    def _insert(self, document: dict) -> Any:
+        document = copy.deepcopy(document)
+        document.setdefault("_id", ObjectId())
+        self._check_unique(document)
+        self.documents.append(document)
+        return document["_id"]
+
+    def _modify(self, document: dict, update: dict) -> bool:
+        before = copy.deepcopy(document)
+        apply_update(document, update)
+        try:
+            self._check_unique(document)
+        except DuplicateKeyError:
+            document.clear()
+            document.update(before)
+            raise
+        return document != before
+
+    def _update(self, query: dict, update: dict, upsert: bool, many: bool) -> dict:
+        targets = self._select(query)
+        if not many:
+            targets = targets[:1]
+        modified = sum(self._modify(document, update) for document in targets)
+        result = {"n": len(targets), "nModified": modified}
+        if not targets and upsert:
+            document = {
+                field: copy.deepcopy(value) for field, value in query.items()
+                if not field.startswith("$") and not (isinstance(value, dict) and any(k.startswith("$") for k in value))
+            }
+            apply_update(document, update, inserting=True)
+            result["upserted"] = self._insert(document)
+        return result
+
+    def find(self, query: Optional[dict] = None, projection: Optional[dict] = None, sort=None, **kwargs):
+        self._record("find", query, projection)
+        return FakeCursor([copy.deepcopy(d) for d in self._select(query, sort)])
+
+    async def find_one(self, query: Optional[dict] = None, projection: Optional[dict] = None, sort=None, **kwargs):
+        self._record("find_one", query, projection)
+        found = self._select(query, sort)
+        return copy.deepcopy(found[0]) if found else None
+
+    async def count_documents(self, query: dict, **kwargs) -> int:
+        self._record("count_documents", query)
+        return len(self._select(query))
+
+    async def insert_one(self, document: dict) -> InsertOneResult:
+        self._record("insert_one", document)
+        inserted_id = self._insert(document)
+        document.setdefault("_id", inserted_id)
+        return InsertOneResult(inserted_id, True)
+
+    async def insert_many(self, documents, ordered: bool = True) -> InsertManyResult:
+        documents = list(documents)
+        self._record("insert_many", documents, ordered=ordered)
+        inserted, errors = [], []
+        for index, document in enumerate(documents):
+            try:
+                inserted.append(self._insert(document))
+                document.setdefault("_id", inserted[-1])
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": 11000, "errmsg": str(e)})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(inserted)})
+        return InsertManyResult(inserted, True)
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False, **kwargs) -> UpdateResult:
+        self._record("update_one", query, update, upsert=upsert)
+        return UpdateResult(self._update(query, update, upsert, many=False), True)
+
+    async def update_many(self, query: dict, update: dict, upsert: bool = False, **kwargs) -> UpdateResult:
+        self._record("update_many", query, update, upsert=upsert)
+        return UpdateResult(self._update(query, update, upsert, many=True), True)
+
+    async def find_one_and_update(
+        self, query: dict, update: dict, projection=None, sort=None, upsert: bool = False,
+        return_document: bool = False, **kwargs
+    ):
+        self._record("find_one_and_update", query, update, upsert=upsert)
+        found = self._select(query, sort)
+        if not found:
+            if upsert:
+                result = self._update(query, update, True, many=False)
+                if return_document:
+                    return copy.deepcopy(next(d for d in self.documents if d["_id"] == result["upserted"]))
+            return None
+        before = copy.deepcopy(found[0])
+        self._modify(found[0], update)
+        return copy.deepcopy(found[0]) if return_document else before
+
+    async def delete_one(self, query: dict) -> DeleteResult:
+        self._record("delete_one", query)
+        found = self._select(query)[:1]
+        for document in found:
+            self.documents.remove(document)
+        return DeleteResult({"n": len(found)}, True)
+
+    async def delete_many(self, query: dict) -> DeleteResult:
+        self._record("delete_many", query)
+        found = self._select(query)
+        self.documents = [d for d in self.documents if d not in found]
+        return DeleteResult({"n": len(found)}, True)
+
+    def aggregate(self, pipeline: List[dict], **kwargs) -> FakeCursor:
+        """$match, $group, $project and a $merge into another collection of the same database"""
+        self._record("aggregate", pipeline)
+        documents = [copy.deepcopy(d) for d in self.documents]
+        for stage in pipeline:
+            (name, spec), = stage.items()
+            if name == "$match":
+                documents = [d for d in documents if matches(d, spec)]
+            elif name == "$group":
+                documents = group(documents, spec)
+            elif name == "$project":
+                documents = [project(d, spec) for d in documents]
+            elif name == "$merge":
+                target = self.database[spec["into"]]
+                for document in documents:
+                    key = {field: document[field] for field in spec["on"]}
+                    existing = target._select(key)
+                    if existing:
+                        existing[0].update(document)
+                    else:
+                        target._insert(document)
+                documents = []
+            else:
+                raise NotImplementedError(name)
+        return FakeCursor(documents)
+
+    async def bulk_write(self, operations, ordered: bool = True) -> BulkWriteResult:
+        operations = list(operations)
+        self._record("bulk_write", operations, ordered=ordered)
+        totals = {"nInserted": 0, "nMatched": 0, "nModified": 0, "nUpserted": 0, "nRemoved": 0, "upserted": []}
+        errors = []
+        for index, operation in enumerate(operations):
+            try:
+                if isinstance(operation, InsertOne):
+                    self._insert(operation._doc)
+                    totals["nInserted"] += 1
+                elif isinstance(operation, (UpdateOne, UpdateMany, ReplaceOne)):
+                    result = self._update(
+                        operation._filter, operation._doc, bool(operation._upsert),
+                        many=isinstance(operation, UpdateMany)
+                    )
+                    totals["nMatched"] += result["n"]
+                    totals["nModified"] += result["nModified"]
+                    if "upserted" in result:
+                        totals["nUpserted"] += 1
+                        totals["upserted"].append({"index": index, "_id": result["upserted"]})
+                elif isinstance(operation, (DeleteOne, DeleteMany)):
+                    found = self._select(operation._filter)
+                    if isinstance(operation, DeleteOne):
+                        found = found[:1]
+                    self.documents = [d for d in self.documents if d not in found]
+                    totals["nRemoved"] += len(found)
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": 11000, "errmsg": str(e), "op": operation})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({**totals, "writeErrors": errors})
+        return BulkWriteResult(totals, True)
+
+
+class FakeDatabase:
+    """Collections are created on first access, by attribute or by name"""
+
+    def __init__(self):
+        self.collections: Dict[str, FakeCollection] = {}
+
+    def __getattr__(self, name: str) -> FakeCollection:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        if name not in self.collections:
+            unique = tuple(
+                tuple(field for field, _ in index.keys)
+                for index in INDEXES
+                if index.collection == name and index.options.get("unique")
+            )
+            self.collections[name] = FakeCollection(name, unique, self)
+        return self.collections[name]
+
+
+@pytest.fixture
+def fake_db(monkeypatch) -> FakeDatabase:
+    database = FakeDatabase()
+    monkeypatch.setattr(MongoDB, "db", database)
+    return database
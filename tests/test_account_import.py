@@ -0,0 +1,103 @@
+import pytest
+from bson import ObjectId
+from app.core.account_import import AccountImporter, iter_lines
+from app.core.validation import AccountValidator
+
+
+@pytest.fixture
+def enqueued(monkeypatch):
+    batches = []
+
+    async def enqueue(emails, user_id):
+        batches.append(list(emails))
+        return [f"job{len(batches)}"]
+
+    monkeypatch.setattr(AccountValidator, "enqueue", staticmethod(enqueue))
+    return batches
+
+
+async def stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def csv_row(email):
+    return f"{email},smtp.example.com,465,imap.example.com,993,{email},secret\n"
+
+
+@pytest.mark.asyncio
+async def test_csv_import_batches_and_reports_rows(fake_db, monkeypatch, enqueued):
+    accounts = fake_db.email_accounts
+    accounts.documents.append({"_id": ObjectId(), "email": "old@example.com"})
+    find = accounts.find
+
+    def racing_find(query, projection=None):
+        cursor = find(query, projection)
+        # Another writer inserts between the existence check and the insert
+        if "race@example.com" in query["email"]["$in"]:
+            accounts.documents.append({"_id": ObjectId(), "email": "race@example.com"})
+        return cursor
+
+    monkeypatch.setattr(accounts, "find", racing_find)
+    body = (
+        "email,smtp_server,smtp_port,imap_server,imap_port,username,password\n"
+        + csv_row("a@example.com")
+        + csv_row("not-an-email")
+        + csv_row("old@example.com")
+        + csv_row("a@example.com")
+        + csv_row("race@example.com")
+        + "b@example.com,smtp.example.com,abc,imap.example.com,993,b@example.com,secret\n"
+        + csv_row("c@example.com")
+    ).encode()
+
+    # Split mid-line to exercise incremental parsing
+    importer = AccountImporter("user1", batch_size=2)
+    report = await importer.run(iter_lines(stream(body[:50], body[50:130], body[130:])), "csv")
+
+    assert report.received == 7
+    assert report.imported == 2
+    assert report.duplicates == 3
+    assert report.failed == 5
+    assert [(e.row, e.error) for e in report.errors if e.row in (3, 4, 5)] == [
+        (3, "Invalid email address"),
+        (4, "Email account already exists"),
+        (5, "Duplicate email in import"),
+    ]
+    assert {e.row for e in report.errors} == {3, 4, 5, 6, 7}
+    assert enqueued == [["a@example.com"], ["c@example.com"]]
+    assert len(accounts.calls_to("find")) == len(accounts.calls_to("bulk_write")) == 2
+
+
+@pytest.mark.asyncio
+async def test_ndjson_import_reports_bad_lines(fake_db, enqueued):
+    body = (
+        b'{"email": "a@example.com", "smtp_server": "smtp.example.com", "smtp_port": 465,'
+        b' "imap_server": "imap.example.com", "imap_port": 993, "username": "a", "password": "x"}\n'
+        b"{not json\n"
+        b"\n"
+        b'["a list"]'
+    )
+
+    report = await AccountImporter("user1").run(iter_lines(stream(body)), "ndjson")
+
+    assert report.imported == 1
+    assert [(e.row, e.error.split(":")[0]) for e in report.errors] == [
+        (2, "Invalid JSON"),
+        (4, "Expected an object"),
+    ]
+    assert report.validation_job_ids == ["job1"]
+
+
+@pytest.mark.asyncio
+async def test_import_survives_metrics_left_by_a_deleted_account(fake_db, enqueued):
+    fake_db.email_metrics.documents.append({"_id": ObjectId(), "email": "a@example.com", "total_sent": 3})
+    body = (
+        "email,smtp_server,smtp_port,imap_server,imap_port,username,password\n"
+        + csv_row("a@example.com")
+        + csv_row("b@example.com")
+    ).encode()
+
+    report = await AccountImporter("user1").run(iter_lines(stream(body)), "csv")
+
+    assert report.imported == 2 and report.validation_job_ids == ["job1"]
+    assert sorted(m["email"] for m in fake_db.email_metrics.documents) == ["a@example.com", "b@example.com"]
@@ -0,0 +1,56 @@
+from datetime import timedelta
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from app.core import auth
+from app.core.auth import UserCache, get_current_user
+from app.core.security import create_access_token
+
+
+@pytest.fixture
+def users(fake_db, monkeypatch):
+    fake_db.users.documents.extend([
+        {"_id": ObjectId(), "email": "a@example.com", "hashed_password": "x", "full_name": "A"},
+        {"_id": ObjectId(), "email": "off@example.com", "hashed_password": "x", "is_active": False},
+    ])
+    monkeypatch.setattr(auth, "user_cache", UserCache(max_entries=10, ttl=60))
+    return fake_db.users
+
+
+@pytest.mark.asyncio
+async def test_token_and_user_are_resolved_once(users, monkeypatch):
+    token = create_access_token({"sub": "a@example.com"}, timedelta(minutes=5))
+    decodes = []
+    decode = auth.jwt.decode
+    monkeypatch.setattr(auth.jwt, "decode", lambda *a, **k: decodes.append(1) or decode(*a, **k))
+
+    for _ in range(3):
+        user = await get_current_user(token)
+
+    assert user.email == "a@example.com" and user.id
+    assert len(decodes) == 1
+    assert len(users.calls_to("find_one")) == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate_reloads_the_user(users):
+    token = create_access_token({"sub": "a@example.com"}, timedelta(minutes=5))
+    await get_current_user(token)
+
+    users.documents[0]["full_name"] = "Renamed"
+    auth.user_cache.invalidate("a@example.com")
+
+    assert (await get_current_user(token)).full_name == "Renamed"
+    assert len(users.calls_to("find_one")) == 2
+
+
+@pytest.mark.asyncio
+async def test_bad_expired_and_inactive_tokens_are_rejected(users):
+    expired = create_access_token({"sub": "a@example.com"}, timedelta(seconds=-1))
+    inactive = create_access_token({"sub": "off@example.com"}, timedelta(minutes=5))
+    unknown = create_access_token({"sub": "nobody@example.com"}, timedelta(minutes=5))
+
+    for token, code in [("garbage", 401), (expired, 401), (unknown, 401), (inactive, 400)]:
+        with pytest.raises(HTTPException) as error:
+            await get_current_user(token)
+        assert error.value.status_code == code
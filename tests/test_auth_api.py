@@ -0,0 +1,43 @@
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from app.core import auth
+from app.core.auth import UserCache, get_current_user
+from app.core.security import PasswordHasher
+from app.main import app
+from app.models.user import User
+
+
+@pytest.fixture
+def client(fake_db, monkeypatch):
+    document = {"_id": ObjectId(), "email": "a@example.com", "hashed_password": "secret-hash", "full_name": "A"}
+    fake_db.users.documents.append(document)
+    monkeypatch.setattr(auth, "user_cache", UserCache(max_entries=10, ttl=60))
+    monkeypatch.setattr("app.api.endpoints.auth.user_cache", auth.user_cache)
+    monkeypatch.setattr(
+        "app.api.endpoints.auth.password_hasher",
+        PasswordHasher(rounds=1000, workers=1, max_pending=1, scheme="pbkdf2_sha256")
+    )
+    app.dependency_overrides[get_current_user] = lambda: User(**document, id=str(document["_id"]))
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_me_never_returns_the_password_hash(client):
+    for response in (
+        client.get("/api/v1/auth/me"),
+        client.put("/api/v1/auth/me", json={"full_name": "Renamed", "password": "new-password"}),
+    ):
+        assert response.status_code == 200
+        assert "hashed_password" not in response.json()
+        assert response.json()["email"] == "a@example.com"
+    assert response.json()["full_name"] == "Renamed"
+
+
+def test_register_never_returns_the_password_hash(client, fake_db):
+    response = client.post("/api/v1/auth/register", json={"email": "b@example.com", "password": "pw"})
+
+    assert response.status_code == 200
+    assert response.json()["email"] == "b@example.com" and response.json()["id"]
+    assert "hashed_password" not in response.json()
+    assert fake_db.users.documents[-1]["hashed_password"].startswith("$pbkdf2-sha256$")
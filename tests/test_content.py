@@ -0,0 +1,65 @@
+from app.core.content import ContentGenerator, SignatureWindow, hamming, simhash
+from app.core.utils import generate_natural_response
+
+
+def make_generator(**kwargs):
+    options = dict(variants=800, window=50, distance=6, seed=7)
+    options.update(kwargs)
+    return ContentGenerator(**options)
+
+
+def test_variants_are_precomputed_once():
+    generator = make_generator()
+    generator.generate("a@example.com")
+    subjects = generator.subjects
+
+    generator.generate("a@example.com")
+
+    assert generator.subjects is subjects
+    assert len(generator.body) > len(generator.corpus.BODY)
+    assert all("{" not in variant.text for variant in generator.body)
+
+
+def test_window_finds_near_duplicates_only():
+    window = SignatureWindow(size=2, distance=3)
+    window.add(0b1111)
+
+    assert window.near(0b1111)
+    assert window.near(0b1110_0000 << 40 | 0b1111)
+    assert not window.near(0b1111 << 40)
+
+    window.add(1 << 63)
+    window.add(1 << 62)
+    assert not window.near(0b1111)
+
+
+def test_messages_from_one_account_are_not_near_duplicates():
+    generator = make_generator()
+
+    signatures = [generator.generate("a@example.com").signature for _ in range(50)]
+
+    assert all(
+        hamming(a, b) > 6
+        for i, a in enumerate(signatures)
+        for b in signatures[i + 1:]
+    )
+
+
+def test_identical_parts_give_identical_fingerprints():
+    generator = make_generator()
+    generator.load()
+    parts = [v.weights for v in generator.body[:3]]
+
+    assert simhash(parts) == simhash(list(parts))
+    assert hamming(simhash(parts), simhash(parts[:2] + [generator.body[-1].weights])) > 0
+
+
+def test_reply_is_threaded():
+    generator = make_generator()
+
+    reply = generator.reply("b@example.com", "Checking in", "<2@example.com>", ["<1@example.com>"])
+
+    assert reply.subject == "Re: Checking in"
+    assert reply.headers == {"In-Reply-To": "<2@example.com>", "References": "<1@example.com> <2@example.com>"}
+    assert generator.reply("b@example.com", "RE: Checking in").subject == "RE: Checking in"
+    assert isinstance(generate_natural_response(), str)
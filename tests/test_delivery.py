@@ -0,0 +1,112 @@
+import pytest
+import aiosmtplib
+from app.core.delivery import FailureKind, RetryQueue, SendResult
+from app.core.scheduler import JobScheduler
+from app.database.counters import AccountCounters
+
+
+@pytest.fixture
+def scheduled(monkeypatch):
+    jobs = []
+
+    async def schedule(kind, payload, delay=0, shard=None):
+        jobs.append((kind, payload, delay, shard))
+        return f"job{len(jobs)}"
+
+    async def record(email, **counts):
+        pass
+
+    monkeypatch.setattr(JobScheduler, "schedule", staticmethod(schedule))
+    monkeypatch.setattr(AccountCounters, "record", staticmethod(record))
+    return jobs
+
+
+def test_failures_are_classified():
+    assert SendResult.from_error(aiosmtplib.SMTPResponseException(451, "4.3.0 Try later")).kind == FailureKind.TRANSIENT
+    assert SendResult.from_error(aiosmtplib.SMTPResponseException(550, "5.1.1 User unknown")).kind == FailureKind.PERMANENT
+    assert SendResult.from_error(aiosmtplib.SMTPAuthenticationError(535, "5.7.8 Bad credentials")).kind == FailureKind.AUTH
+    assert SendResult.from_error(aiosmtplib.SMTPResponseException(530, "5.7.0 Authentication required")).kind == FailureKind.AUTH
+    # RFC 4954 temporary authentication failure
+    assert SendResult.from_error(aiosmtplib.SMTPAuthenticationError(454, "4.7.0 Try again")).kind == FailureKind.TRANSIENT
+    assert SendResult.from_error(aiosmtplib.SMTPConnectError("refused")).kind == FailureKind.CONNECTION
+    assert SendResult.from_error(aiosmtplib.SMTPException("unexpected reply")).kind == FailureKind.TRANSIENT
+
+    bounce = SendResult.from_error(aiosmtplib.SMTPRecipientsRefused([
+        aiosmtplib.SMTPRecipientRefused(550, "5.1.1 No such user", "a@example.com")
+    ]))
+    assert bounce.bounced and bounce.status == "5.1.1" and not bounce
+    assert SendResult.sent("<id@example.com>")
+
+
+@pytest.mark.asyncio
+async def test_transient_failure_is_requeued_with_backoff(fake_db, scheduled):
+    result = SendResult.from_error(aiosmtplib.SMTPResponseException(421, "4.7.0 Slow down"))
+    payload = {"from_email": "a@example.com", "to_email": "b@example.com"}
+
+    job_id = await RetryQueue.handle_failure("warmup.send", payload, result, "a@example.com", "b@example.com", shard=3)
+
+    assert job_id == "job1"
+    kind, retried, delay, shard = scheduled[0]
+    assert retried == {**payload, "attempt": 1}
+    assert delay > 0 and shard == 3
+    assert fake_db.dead_letters.documents == []
+
+
+@pytest.mark.asyncio
+async def test_exhausted_retries_are_dead_lettered(fake_db, scheduled, monkeypatch):
+    monkeypatch.setattr("app.core.delivery.settings.RETRY_MAX_ATTEMPTS", 2)
+    result = SendResult.from_error(aiosmtplib.SMTPServerDisconnected("gone"))
+
+    job_id = await RetryQueue.handle_failure(
+        "warmup.send", {"attempt": 1}, result, "a@example.com", "b@example.com"
+    )
+
+    assert job_id is None and scheduled == []
+    assert fake_db.dead_letters.documents[0]["attempts"] == 2
+    assert fake_db.dead_letters.documents[0]["result"]["kind"] == "connection"
+
+
+@pytest.mark.asyncio
+async def test_bounce_is_counted_and_never_retried(fake_db, scheduled):
+    result = SendResult.from_error(aiosmtplib.SMTPResponseException(550, "5.1.1 User unknown"))
+
+    assert not await RetryQueue.settle("campaign.send", {}, result, "a@example.com", "b@example.com", 1)
+
+    (query, update), _ = fake_db.email_metrics.calls_to("update_one")[0]
+    assert query == {"email": "a@example.com"}
+    assert update["$inc"] == {"bounce_count": 1}
+    assert len(fake_db.dead_letters.documents) == 1
+
+
+@pytest.mark.asyncio
+async def test_auth_failure_suspends_sender(fake_db, scheduled):
+    result = SendResult.from_error(aiosmtplib.SMTPAuthenticationError(535, "5.7.8 Bad credentials"))
+
+    await RetryQueue.settle("warmup.send", {}, result, "a@example.com", "b@example.com", 1)
+
+    (query, update), _ = fake_db.email_accounts.calls_to("update_one")[0]
+    assert query["email"] == "a@example.com"
+    assert update["$set"]["validation.valid"] is False
+
+
+@pytest.mark.asyncio
+async def test_temporary_auth_failure_is_retried_without_suspending(fake_db, scheduled):
+    result = SendResult.from_error(aiosmtplib.SMTPAuthenticationError(454, "4.7.0 Try again"))
+
+    assert await RetryQueue.settle("warmup.send", {}, result, "a@example.com", "b@example.com", 1)
+    assert fake_db.email_accounts.calls_to("update_one") == []
+
+
+@pytest.mark.asyncio
+async def test_programming_errors_are_dead_lettered_without_retry_or_bounce(fake_db, scheduled):
+    result = SendResult.from_error(KeyError("smtp_server"))
+    assert result.kind == FailureKind.PERMANENT and not result.bounced
+
+    job_id = await RetryQueue.handle_failure(
+        "warmup.send", {"from_email": "a@example.com"}, result, "a@example.com", "b@example.com"
+    )
+
+    assert job_id is None and scheduled == []
+    [letter] = fake_db.dead_letters.documents
+    assert letter["attempts"] == 1 and letter["result"]["kind"] == "permanent"
+    assert fake_db.email_metrics.documents == []
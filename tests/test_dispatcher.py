@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from app.core.dispatcher import CampaignDispatcher
+
+
+@pytest.mark.asyncio
+async def test_per_account_cap_is_respected():
+    running = {"a": 0, "b": 0}
+    peak = {"a": 0, "b": 0}
+
+    async def job(key):
+        running[key] += 1
+        peak[key] = max(peak[key], running[key])
+        await asyncio.sleep(0.01)
+        running[key] -= 1
+        return key
+
+    async with CampaignDispatcher(per_account_concurrency=2) as dispatcher:
+        for key in ["a", "b"] * 5:
+            await dispatcher.submit(key, "smtp.example.com", lambda key=key: job(key))
+
+    assert peak == {"a": 2, "b": 2}
+    assert sorted(await dispatcher.join()) == ["a"] * 5 + ["b"] * 5
+
+
+@pytest.mark.asyncio
+async def test_slow_account_does_not_serialise_others():
+    async def slow():
+        await asyncio.sleep(0.2)
+
+    async def fast():
+        await asyncio.sleep(0.01)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    async with CampaignDispatcher(per_account_concurrency=1) as dispatcher:
+        await dispatcher.submit("slow", "slow.example.com", slow)
+        for i in range(10):
+            await dispatcher.submit(f"fast-{i}", "fast.example.com", fast)
+
+    assert loop.time() - started < 0.4
+
+
+@pytest.mark.asyncio
+async def test_error_in_block_cancels_outstanding_jobs():
+    cancelled = asyncio.Event()
+
+    async def hang():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(RuntimeError):
+        async with CampaignDispatcher() as dispatcher:
+            await dispatcher.submit("a", "smtp.example.com", hang)
+            await asyncio.sleep(0)
+            raise RuntimeError("stop")
+
+    assert cancelled.is_set()
+    assert dispatcher.outstanding == 0
+
+
+@pytest.mark.asyncio
+async def test_job_cancelled_before_it_starts_frees_its_slot():
+    async def job():
+        return "done"
+
+    dispatcher = CampaignDispatcher(max_pending=1)
+    task = await dispatcher.submit("a", "smtp.example.com", job)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    retry = await asyncio.wait_for(dispatcher.submit("a", "smtp.example.com", job), timeout=1)
+    assert await retry == "done"
+    assert dispatcher.outstanding == 0
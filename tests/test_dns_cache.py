@@ -0,0 +1,119 @@
+import asyncio
+import pytest
+import dns.exception
+import dns.resolver
+from app.core.dns_cache import CachedResolver, DNSLookupError
+
+
+class FakeRecord:
+    def __init__(self, text):
+        self.text = text
+
+    def to_text(self):
+        return self.text
+
+
+class FakeRRset:
+    def __init__(self, ttl):
+        self.ttl = ttl
+
+
+class FakeAnswer(list):
+    def __init__(self, texts, ttl):
+        super().__init__(FakeRecord(text) for text in texts)
+        self.rrset = FakeRRset(ttl)
+
+
+class StubResolver:
+    """Answers from a fixed zone, like a local stub nameserver would"""
+
+    def __init__(self, zone, ttl=300, delay=0.0):
+        self.zone = zone
+        self.ttl = ttl
+        self.delay = delay
+        self.queries = []
+
+    async def resolve(self, name, rdtype, lifetime=None):
+        self.queries.append((name, rdtype))
+        await asyncio.sleep(self.delay)
+        answer = self.zone.get((name, rdtype))
+        if isinstance(answer, Exception):
+            raise answer
+        if answer is None:
+            raise dns.resolver.NXDOMAIN()
+        return FakeAnswer(answer, self.ttl)
+
+
+ZONE = {
+    ("smtp.example.com", "A"): ["192.0.2.10"],
+    ("example.com", "MX"): ["20 mx2.example.com.", "10 mx1.example.com."],
+    ("example.com", "TXT"): ['"google-site-verification=abc"', '"v=spf1 include:_spf.example.com " "~all"'],
+    ("_dmarc.example.com", "TXT"): ['"v=DMARC1; p=none"'],
+    ("google._domainkey.example.com", "TXT"): ['"v=DKIM1; k=rsa; p=MIGf"'],
+    ("broken.example.com", "A"): dns.exception.Timeout(),
+}
+
+
+@pytest.mark.asyncio
+async def test_answers_and_negatives_are_cached():
+    stub = StubResolver(ZONE)
+    resolver = CachedResolver(resolver=stub)
+
+    assert await resolver.resolve("SMTP.example.com.", "a") == ["192.0.2.10"]
+    assert await resolver.resolve("smtp.example.com", "A") == ["192.0.2.10"]
+    assert await resolver.resolve("missing.example.com") == []
+    assert await resolver.resolve("missing.example.com") == []
+
+    assert len(stub.queries) == 2
+    assert resolver.stats() == {"entries": 2, "hits": 2, "misses": 2}
+
+
+@pytest.mark.asyncio
+async def test_entries_expire_after_their_ttl():
+    stub = StubResolver(ZONE, ttl=0)
+    resolver = CachedResolver(resolver=stub, min_ttl=0.05, max_ttl=0.05)
+
+    await resolver.resolve("smtp.example.com")
+    await asyncio.sleep(0.06)
+    await resolver.resolve("smtp.example.com")
+
+    assert len(stub.queries) == 2
+
+
+@pytest.mark.asyncio
+async def test_failures_raise_and_are_not_cached():
+    stub = StubResolver(ZONE)
+    resolver = CachedResolver(resolver=stub)
+
+    with pytest.raises(DNSLookupError):
+        await resolver.resolve("broken.example.com")
+    results = await resolver.resolve_many([("broken.example.com", "A"), ("smtp.example.com", "A")])
+
+    assert results == {("broken.example.com", "A"): None, ("smtp.example.com", "A"): ["192.0.2.10"]}
+    assert stub.queries.count(("broken.example.com", "A")) == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_query():
+    stub = StubResolver(ZONE, delay=0.02)
+    resolver = CachedResolver(resolver=stub)
+
+    results = await asyncio.gather(*(resolver.resolve("smtp.example.com") for _ in range(10)))
+
+    assert all(r == ["192.0.2.10"] for r in results)
+    assert len(stub.queries) == 1
+
+
+@pytest.mark.asyncio
+async def test_diagnose_collects_domain_records():
+    resolver = CachedResolver(resolver=StubResolver(ZONE))
+
+    report = await resolver.diagnose("example.com", selectors=["default", "google"])
+
+    assert report["mx"] == [
+        {"preference": 10, "exchange": "mx1.example.com"},
+        {"preference": 20, "exchange": "mx2.example.com"},
+    ]
+    assert report["spf"] == "v=spf1 include:_spf.example.com ~all"
+    assert report["dmarc"] == "v=DMARC1; p=none"
+    assert report["dkim"] == {"google": "v=DKIM1; k=rsa; p=MIGf"}
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+from app.api.endpoints.email_accounts import (
+    add_email_account, delete_account, get_account_history, resume_warmup, start_warmup_cycle
+)
+from app.models.email_account import EmailAccount, WarmupStatus
+
+USER = SimpleNamespace(id="user1")
+
+
+def add_account(fake_db, **fields):
+    fake_db.email_accounts.documents.append({
+        "email": "a@example.com", "user_id": "user1", "status": WarmupStatus.ACTIVE, **fields
+    })
+
+
+@pytest.mark.asyncio
+async def test_warmup_request_queues_a_cycle_job(fake_db):
+    add_account(fake_db, last_warmup=datetime.utcnow() - timedelta(days=1))
+
+    accepted = await start_warmup_cycle("a@example.com", USER)
+
+    [job] = fake_db.scheduled_jobs.documents
+    assert accepted.job_id == str(job["_id"]) and job["kind"] == "warmup.cycle"
+
+
+@pytest.mark.asyncio
+async def test_warmup_request_is_rejected_once_todays_cycle_started(fake_db):
+    add_account(fake_db, last_warmup=datetime.utcnow())
+
+    with pytest.raises(HTTPException) as error:
+        await start_warmup_cycle("a@example.com", USER)
+
+    assert error.value.status_code == 409
+    assert fake_db.scheduled_jobs.documents == []
+
+
+@pytest.mark.asyncio
+async def test_warmup_request_needs_an_active_account_of_the_user(fake_db):
+    add_account(fake_db, status=WarmupStatus.PAUSED)
+
+    for user, code in [(USER, 409), (SimpleNamespace(id="user2"), 404)]:
+        with pytest.raises(HTTPException) as error:
+            await start_warmup_cycle("a@example.com", user)
+        assert error.value.status_code == code
+
+
+@pytest.mark.asyncio
+async def test_deleted_account_can_be_added_again(fake_db):
+    account = EmailAccount(
+        email="new@example.com", smtp_server="smtp.example.com", smtp_port=465,
+        imap_server="imap.example.com", imap_port=993, username="new", password="x"
+    )
+
+    await add_email_account(account, USER)
+    await delete_account("new@example.com", USER)
+    assert fake_db.email_metrics.documents == []
+
+    accepted = await add_email_account(account, USER)
+
+    assert accepted.kind == "account.validate"
+    assert [m["email"] for m in fake_db.email_metrics.documents] == ["new@example.com"]
+
+
+@pytest.mark.asyncio
+async def test_history_is_only_served_to_the_account_owner(fake_db):
+    add_account(fake_db)
+    fake_db.daily_summaries.documents.append(
+        {"email": "a@example.com", "day": datetime.utcnow() - timedelta(days=1), "sent": 3}
+    )
+
+    [summary] = await get_account_history("a@example.com", 90, USER)
+    assert summary.sent == 3
+
+    with pytest.raises(HTTPException) as error:
+        await get_account_history("a@example.com", 90, SimpleNamespace(id="user2"))
+    assert error.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_resume_refuses_accounts_that_have_not_passed_validation(fake_db):
+    add_account(fake_db, status=WarmupStatus.FAILED)
+
+    with pytest.raises(HTTPException) as error:
+        await resume_warmup("a@example.com", USER)
+    assert error.value.status_code == 409
+    assert fake_db.email_accounts.documents[0]["status"] == WarmupStatus.FAILED
+
+    fake_db.email_accounts.documents[0]["status"] = WarmupStatus.PAUSED
+    await resume_warmup("a@example.com", USER)
+    assert fake_db.email_accounts.documents[0]["status"] == WarmupStatus.ACTIVE
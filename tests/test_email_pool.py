@@ -0,0 +1,90 @@
+import pytest
+from bson import ObjectId
+from app.core.delivery import SendResult
+from app.core.email_pool import EmailPool
+from app.core.email_warmup import EmailWarmupManager
+from app.models.email import EmailAccount
+
+
+def seed(fake_db, count):
+    fake_db.email_pool.documents.extend(
+        {"_id": ObjectId(), "campaign_id": "c1", "email": f"t{i}@example.com", "status": "pending"}
+        for i in range(count)
+    )
+
+
+def statuses(fake_db):
+    return [d["status"] for d in fake_db.email_pool.documents]
+
+
+@pytest.mark.asyncio
+async def test_claim_keeps_only_targets_it_won(fake_db, monkeypatch):
+    seed(fake_db, 4)
+    pool = fake_db.email_pool
+    update_many = pool.update_many
+    raced = []
+
+    async def contended(query, update, **kwargs):
+        # Another worker leases two of the candidates between our read and our update
+        if not raced:
+            raced.append(True)
+            for document in pool.documents[:2]:
+                document.update(status="leased", lease_id="other")
+        return await update_many(query, update, **kwargs)
+
+    monkeypatch.setattr(pool, "update_many", contended)
+
+    claimed = await EmailPool.claim_batch("c1", 4)
+
+    assert sorted(t["email"] for t in claimed) == ["t2@example.com", "t3@example.com"]
+    assert len({t["lease_id"] for t in claimed}) == 1 and claimed[0]["lease_id"] != "other"
+
+
+@pytest.mark.asyncio
+async def test_expired_leases_are_reclaimed(fake_db):
+    seed(fake_db, 3)
+    await EmailPool.claim_batch("c1", 2, lease_seconds=-1)
+    await EmailPool.claim_batch("c1", 1)
+
+    assert await EmailPool.reclaim_expired() == 2
+    assert sorted(statuses(fake_db)) == ["leased", "pending", "pending"]
+
+
+@pytest.mark.asyncio
+async def test_settling_after_expiry_leaves_the_new_lease_alone(fake_db):
+    seed(fake_db, 2)
+    stale = await EmailPool.claim_batch("c1", 2, lease_seconds=-1)
+    await EmailPool.reclaim_expired()
+    current = await EmailPool.claim_batch("c1", 2)
+
+    assert await EmailPool.renew(stale) == 0
+    assert await EmailPool.mark_sent(stale) == 0
+    assert await EmailPool.retry_later([(stale[0], 60)]) == 0
+    assert await EmailPool.mark_dead(stale[1:]) == 0
+    assert statuses(fake_db) == ["leased", "leased"]
+
+    assert await EmailPool.renew(current) == 2
+    assert await EmailPool.mark_sent(current) == 2
+    assert statuses(fake_db) == ["sent", "sent"]
+
+
+@pytest.mark.asyncio
+async def test_campaign_send_is_skipped_once_the_lease_is_lost(fake_db, monkeypatch):
+    seed(fake_db, 1)
+    sends = []
+
+    async def deliver(account, to_email, subject, content):
+        sends.append(to_email)
+        return SendResult.sent("<id@example.com>")
+
+    monkeypatch.setattr(EmailWarmupManager, "deliver", staticmethod(deliver))
+    sender = EmailAccount(
+        email="sender@example.com", smtp_server="smtp.example.com", smtp_port=465,
+        imap_server="imap.example.com", imap_port=993, username="sender", password="x"
+    )
+    [stale] = await EmailPool.claim_batch("c1", 1, lease_seconds=-1)
+    await EmailPool.reclaim_expired()
+    await EmailPool.claim_batch("c1", 1)
+
+    assert await EmailWarmupManager._send_campaign_email("c1", sender, stale) is None
+    assert sends == [] and statuses(fake_db) == ["leased"]
@@ -3,6 +3,7 @@ from datetime import datetime, timedelta
 from app.core.email_warmup import EmailWarmupManager
 from app.models.email import EmailAccount, EmailCampaign
 from app.database.mongodb import MongoDB
+from app.database.counters import AccountCounters
 
 @pytest.mark.asyncio
 async def test_send_email():
@@ -28,21 +29,11 @@ async def test_send_email():
 @pytest.mark.asyncio
 async def test_calculate_success_rate():
     # Insert test data
-    await MongoDB.db.email_logs.insert_many([
-        {
-            "from_email": "test@example.com",
-            "sent_at": datetime.utcnow(),
-            "delivered": True
-        },
-        {
-            "from_email": "test@example.com",
-            "sent_at": datetime.utcnow(),
-            "delivered": False
-        }
-    ])
+    await AccountCounters.record("test@example.com", sent=1, delivered=1)
+    await AccountCounters.record("test@example.com", sent=1)
     
     success_rate = await EmailWarmupManager.calculate_success_rate("test@example.com")
     assert success_rate == 0.5
     
     # Cleanup
-    await MongoDB.db.email_logs.delete_many({"from_email": "test@example.com"})
+    await MongoDB.db.account_counters.delete_many({"email": "test@example.com"})
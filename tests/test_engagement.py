@@ -0,0 +1,119 @@
+import asyncio
+from contextlib import asynccontextmanager
+import pytest
+from app.core.engagement import EngagementExecutor
+from app.core.placement import uid_set
+
+
+class Response:
+    def __init__(self, lines=(), result="OK"):
+        self.lines = list(lines)
+        self.result = result
+
+
+class FakeIMAPClient:
+    def __init__(self, mailbox, capabilities=("MOVE",)):
+        self.mailbox = mailbox
+        self.capabilities = set(capabilities)
+        self.folder = None
+        self.commands = []
+
+    def has_capability(self, capability):
+        return capability in self.capabilities
+
+    async def select(self, folder):
+        self.folder = folder
+        return Response()
+
+    async def uid_search(self, *criteria, charset=None):
+        wanted = {c.strip('"') for c in criteria if c.startswith('"')}
+        uids = [str(uid).encode() for uid, mid in self.mailbox[self.folder].items() if mid in wanted]
+        return Response([b" ".join(uids)])
+
+    async def uid(self, command, *args):
+        if command == "fetch":
+            lines = []
+            for uid in args[0].split(","):
+                lines += [
+                    f"1 FETCH (UID {uid} BODY[HEADER.FIELDS (MESSAGE-ID)] {{0}}".encode(),
+                    f"Message-ID: {self.mailbox[self.folder][int(uid)]}\r\n\r\n".encode(),
+                    b")",
+                ]
+            return Response(lines)
+        self.commands.append((self.folder, command) + args)
+        return Response()
+
+    async def expunge(self):
+        self.commands.append((self.folder, "expunge"))
+        return Response()
+
+
+class FakeIMAPPool:
+    def __init__(self, client):
+        self.client = client
+        self.sessions = 0
+
+    @asynccontextmanager
+    async def session(self, account):
+        self.sessions += 1
+        yield self.client
+
+
+class Account:
+    email = "peer@example.org"
+
+
+MAILBOX = {
+    "INBOX": {3: "<a@x>", 4: "<b@x>", 5: "<c@x>", 9: "<d@x>"},
+    "Spam": {12: "<s@x>"},
+}
+
+
+def make_executor(client):
+    return EngagementExecutor(
+        pool=FakeIMAPPool(client),
+        batch_size=100,
+        batch_delay=0.01,
+        folders={"inbox": "INBOX", "spam": "Spam"}
+    )
+
+
+def test_uid_set_is_compacted():
+    assert uid_set([7, 1, 2, 3, 9, 10]) == "1:3,7,9:10"
+
+
+@pytest.mark.asyncio
+async def test_one_session_and_one_command_per_action():
+    client = FakeIMAPClient(MAILBOX)
+    executor = make_executor(client)
+    account = Account()
+
+    placements = await asyncio.gather(
+        executor.perform(account, "<a@x>", ["read"]),
+        executor.perform(account, "<b@x>", ["read", "mark_important"]),
+        executor.perform(account, "<c@x>", ["read", "move_to_primary"]),
+        executor.perform(account, "<s@x>", ["read", "move_to_primary"]),
+        executor.perform(account, "<gone@x>", ["read"]),
+    )
+
+    assert placements == ["inbox", "inbox", "inbox", "spam", None]
+    assert executor.pool.sessions == 1
+    assert client.commands == [
+        ("INBOX", "store", "3:5", "+FLAGS.SILENT", "(\\Seen)"),
+        ("INBOX", "store", "4", "+FLAGS.SILENT", "(\\Flagged)"),
+        ("Spam", "store", "12", "+FLAGS.SILENT", "(\\Seen)"),
+        ("Spam", "move", "12", "INBOX"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_move_falls_back_to_copy_and_expunge():
+    client = FakeIMAPClient(MAILBOX, capabilities=("UIDPLUS",))
+    executor = make_executor(client)
+
+    assert await executor.perform(Account(), "<s@x>", ["move_to_primary"]) == "spam"
+    assert client.commands == [
+        ("Spam", "copy", "12", "INBOX"),
+        ("Spam", "store", "12", "+FLAGS.SILENT", "(\\Deleted)"),
+        ("Spam", "expunge", "12"),
+    ]
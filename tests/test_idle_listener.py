@@ -0,0 +1,72 @@
+import asyncio
+from contextlib import asynccontextmanager
+import pytest
+from app.core.idle_listener import IdleListener
+from app.core.placement import PlacementMatch
+
+
+class FakeChecker:
+    folders = {"inbox": "INBOX", "spam": "Spam"}
+
+    def __init__(self):
+        self.scans = []
+
+    async def scan_folder(self, client, email, folder):
+        self.scans.append(folder)
+        if folder == "INBOX" and len(self.scans) > 2:
+            return {7: "<warm@example.com>"}
+        return {}
+
+    async def record(self, recipient, found):
+        return [
+            PlacementMatch(mid, "sender@example.com", recipient, placement)
+            for placement, ids in found.items()
+            for mid in ids
+        ]
+
+
+class FakePool:
+    @asynccontextmanager
+    async def session(self, account):
+        yield object()
+
+
+class FakeIdleClient:
+    timeout = 1
+
+    def __init__(self):
+        self.pushes = [[b"5 EXISTS"]]
+
+    def has_capability(self, capability):
+        return capability == "IDLE"
+
+    async def idle_start(self, timeout):
+        idle = asyncio.get_running_loop().create_future()
+        idle.set_result(None)
+        return idle
+
+    async def wait_server_push(self, timeout):
+        if self.pushes:
+            return self.pushes.pop(0)
+        await asyncio.sleep(3600)
+
+    def idle_done(self):
+        pass
+
+
+class Account:
+    email = "recipient@example.com"
+
+
+@pytest.mark.asyncio
+async def test_new_mail_push_publishes_placement_event():
+    listener = IdleListener(checker=FakeChecker(), pool=FakePool(), spam_scan_interval=3600)
+    task = asyncio.create_task(listener._listen(FakeIdleClient(), Account()))
+    try:
+        event = await asyncio.wait_for(listener.events.get(), 1)
+    finally:
+        task.cancel()
+
+    assert event == PlacementMatch(
+        "<warm@example.com>", "sender@example.com", "recipient@example.com", "inbox"
+    )
@@ -0,0 +1,21 @@
+from app.database.indexes import HOT_QUERIES, INDEXES, _plan_stages
+
+
+def test_every_hot_query_has_an_index_prefix():
+    for query in HOT_QUERIES:
+        prefixes = [
+            spec.keys[0][0] for spec in INDEXES if spec.collection == query.collection
+        ]
+        assert any(field in query.filter for field in prefixes), query.name
+
+
+def test_collscan_is_found_anywhere_in_plan():
+    plan = {
+        "stage": "SORT",
+        "inputStage": {"stage": "OR", "inputStages": [
+            {"stage": "IXSCAN"},
+            {"stage": "COLLSCAN"}
+        ]}
+    }
+    assert "COLLSCAN" in _plan_stages(plan)
+    assert "COLLSCAN" not in _plan_stages({"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}})
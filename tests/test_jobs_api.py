@@ -0,0 +1,27 @@
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+from app.api.endpoints.jobs import get_job
+from app.core.scheduler import JobScheduler
+
+OWNER = SimpleNamespace(id="user1")
+OTHER = SimpleNamespace(id="user2")
+
+
+@pytest.mark.asyncio
+async def test_owner_can_poll_their_job(fake_db):
+    job_id = await JobScheduler.schedule("warmup.cycle", {"email": "a@example.com", "user_id": "user1"})
+
+    job = await get_job(job_id, OWNER)
+
+    assert job.id == job_id and job.kind == "warmup.cycle" and job.status == "pending"
+
+
+@pytest.mark.asyncio
+async def test_other_users_and_bad_ids_get_404(fake_db):
+    job_id = await JobScheduler.schedule("warmup.cycle", {"email": "a@example.com", "user_id": "user1"})
+
+    for requested, user in [(job_id, OTHER), ("not-an-id", OWNER), ("0" * 24, OWNER)]:
+        with pytest.raises(HTTPException) as error:
+            await get_job(requested, user)
+        assert error.value.status_code == 404
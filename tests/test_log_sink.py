@@ -0,0 +1,67 @@
+import pytest
+from pymongo.errors import AutoReconnect
+from app.database.log_sink import LogSink
+
+
+@pytest.mark.asyncio
+async def test_records_are_flushed_in_batches(fake_db):
+    sink = LogSink(batch_size=3, flush_interval=60)
+
+    for i in range(7):
+        await sink.write("email_logs", {"n": i})
+
+    inserts = fake_db.email_logs.calls_to("insert_many")
+    assert [len(args[0]) for args, _ in inserts] == [3, 3]
+    assert all(kwargs["ordered"] is False for _, kwargs in inserts)
+    assert sink.queue_depth == 1
+
+    await sink.close()
+    assert sink.queue_depth == 0
+    assert sink.stats()["records_written"] == 7
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_each_collection(fake_db):
+    sink = LogSink(batch_size=100, flush_interval=60)
+
+    await sink.write("email_logs", {"n": 1})
+    await sink.write("engagement_logs", {"n": 2})
+    await sink.close()
+
+    assert len(fake_db.email_logs.calls_to("insert_many")) == 1
+    assert len(fake_db.engagement_logs.calls_to("insert_many")) == 1
+    assert sink.stats()["last_flush_latency_ms"] is not None
+
+
+@pytest.mark.asyncio
+async def test_outage_never_fails_the_writer_and_bounds_the_buffer(fake_db):
+    sink = LogSink(batch_size=2, flush_interval=60, max_buffered=5)
+    fake_db.email_logs.fail["insert_many"] = AutoReconnect("connection refused")
+
+    for i in range(8):
+        await sink.write("email_logs", {"n": i})
+
+    assert sink.queue_depth == 5
+    assert sink.stats()["records_dropped"] == 3
+    # One failed attempt, then no inline retries until the next periodic flush
+    assert len(fake_db.email_logs.calls_to("insert_many")) == 1
+
+    del fake_db.email_logs.fail["insert_many"]
+    await sink.close()
+    assert [d["n"] for d in fake_db.email_logs.documents] == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_write_now_is_visible_immediately_and_buffers_on_failure(fake_db):
+    sink = LogSink(batch_size=100, flush_interval=60)
+
+    await sink.write_now("email_logs", {"n": 0})
+    assert [d["n"] for d in fake_db.email_logs.documents] == [0]
+
+    fake_db.email_logs.fail["insert_one"] = AutoReconnect("connection refused")
+    await sink.write_now("email_logs", {"n": 1})
+    assert sink.queue_depth == 1
+
+    del fake_db.email_logs.fail["insert_one"]
+    await sink.close()
+    assert [d["n"] for d in fake_db.email_logs.documents] == [0, 1]
@@ -0,0 +1,86 @@
+from datetime import datetime
+import pytest
+from bson import Timestamp
+from app.core.network_sync import NetworkSync
+
+
+class FakeEngine:
+    def __init__(self):
+        self.accounts = self.active_accounts = {}
+
+    def set_reputation(self, email, reputation):
+        return False
+
+    def upsert_account(self, document):
+        self.accounts[document["email"]] = document
+
+    def remove_account(self, email):
+        self.accounts.pop(email, None)
+
+
+def test_pause_resume_and_delete_are_applied():
+    engine = FakeEngine()
+    sync = NetworkSync(engine)
+    document = {"_id": 1, "email": "a@example.com", "status": "active", "updated_at": datetime(2024, 1, 1)}
+
+    sync.apply(document)
+    assert "a@example.com" in engine.accounts
+
+    sync.apply({**document, "status": "paused", "updated_at": datetime(2024, 1, 2)})
+    assert "a@example.com" not in engine.accounts
+
+    sync.apply({**document, "updated_at": datetime(2024, 1, 3)})
+    assert "a@example.com" in engine.accounts
+    assert sync._last_seen == datetime(2024, 1, 3)
+
+    sync._forget(1)
+    assert engine.accounts == {}
+
+
+@pytest.mark.asyncio
+async def test_change_stream_starts_from_before_the_initial_load(fake_db, monkeypatch):
+    engine = FakeEngine()
+    sync = NetworkSync(engine)
+    events = []
+
+    async def command(name):
+        events.append(name)
+        return {"ok": 1.0, "operationTime": Timestamp(1700000000, 1)}
+
+    class Stream:
+        resume_token = {"_data": "1"}
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            raise StopAsyncIteration
+
+    def watch(**options):
+        events.append(options)
+        return Stream()
+
+    find = fake_db.email_accounts.find
+
+    def tracked_find(*args, **kwargs):
+        events.append("find")
+        return find(*args, **kwargs)
+
+    monkeypatch.setattr(fake_db, "command", command, raising=False)
+    monkeypatch.setattr(fake_db.email_accounts, "watch", watch, raising=False)
+    monkeypatch.setattr(fake_db.email_accounts, "find", tracked_find)
+
+    await sync.load()
+    await sync._follow_change_stream()
+
+    assert events == [
+        "ping",
+        "find",
+        {"full_document": "updateLookup", "start_at_operation_time": Timestamp(1700000000, 1)}
+    ]
@@ -0,0 +1,125 @@
+import random
+from collections import Counter
+import pytest
+from app.core.participant_selector import AliasTable, ParticipantSelector, SharedReceiveLedger
+from app.core.roster import RosterEntry
+
+
+def make_account(email, smtp_server="smtp.example.com"):
+    return RosterEntry(email, smtp_server)
+
+
+def make_selector(**kwargs):
+    kwargs.setdefault("same_domain_acceptance", 1.0)
+    return ParticipantSelector(rng=random.Random(7), **kwargs)
+
+
+def test_alias_table_follows_weights():
+    table = AliasTable([1, 3])
+    rng = random.Random(1)
+    draws = Counter(table.draw(rng) for _ in range(20000))
+    assert 0.70 < draws[1] / 20000 < 0.80
+
+
+@pytest.mark.asyncio
+async def test_select_excludes_sender_and_duplicates():
+    selector = make_selector()
+    for i in range(20):
+        selector.add(make_account(f"user{i}@example.com"))
+
+    chosen = await selector.select("user0@example.com", 10)
+
+    emails = [account.email for account in chosen]
+    assert len(emails) == 10
+    assert len(set(emails)) == 10
+    assert "user0@example.com" not in emails
+
+
+@pytest.mark.asyncio
+async def test_remove_keeps_positions_consistent():
+    selector = make_selector()
+    for i in range(5):
+        selector.add(make_account(f"user{i}@example.com"))
+
+    assert selector.remove("user1@example.com")
+    assert not selector.remove("user1@example.com")
+    selector.remove("user4@example.com")
+
+    assert len(selector) == 3
+    assert sorted(a.email for a in selector) == [
+        "user0@example.com", "user2@example.com", "user3@example.com"
+    ]
+    assert len(await selector.select("someone@other.com", 10)) == 3
+
+
+@pytest.mark.asyncio
+async def test_daily_receive_cap_and_pairing_cooldown():
+    selector = make_selector(daily_receive_cap=1)
+    for i in range(4):
+        selector.add(make_account(f"user{i}@example.com"))
+
+    first = await selector.select("a@sender.com", 4)
+    assert len(first) == 4
+    # Everyone has hit their cap for today
+    assert await selector.select("b@sender.com", 4) == []
+
+
+@pytest.mark.asyncio
+async def test_recent_pairing_is_avoided():
+    selector = make_selector(daily_receive_cap=100)
+    for i in range(4):
+        selector.add(make_account(f"user{i}@example.com"))
+
+    first = {a.email for a in await selector.select("a@sender.com", 2)}
+    second = {a.email for a in await selector.select("a@sender.com", 2)}
+    assert first.isdisjoint(second)
+
+
+@pytest.mark.asyncio
+async def test_diversity_spreads_across_providers():
+    selector = make_selector(diversity=0.0, daily_receive_cap=10**6, pairing_cooldown=0)
+    for i in range(90):
+        selector.add(make_account(f"big{i}@example.com", "smtp.big.com"))
+    for i in range(10):
+        selector.add(make_account(f"small{i}@example.com", "smtp.small.com"))
+
+    picks = Counter()
+    for _ in range(400):
+        for account in await selector.select("sender@other.com", 1):
+            picks[selector.provider_of(account)] += 1
+    assert picks["smtp.small.com"] > 120
+
+
+@pytest.mark.asyncio
+async def test_workers_sharing_a_ledger_respect_one_receive_cap(fake_db):
+    selectors = [
+        make_selector(ledger=SharedReceiveLedger(daily_receive_cap=2, pairing_cooldown=60))
+        for _ in range(2)
+    ]
+    for selector in selectors:
+        for i in range(3):
+            selector.add(make_account(f"user{i}@example.com"))
+
+    received = Counter()
+    for n in range(4):
+        for selector in selectors:
+            for account in await selector.select(f"sender{n}@other.com", 3):
+                received[account.email] += 1
+
+    # Each worker alone would have let every recipient take 2 more
+    assert received == {f"user{i}@example.com": 2 for i in range(3)}
+
+
+@pytest.mark.asyncio
+async def test_pairing_cooldown_is_shared_between_workers(fake_db):
+    first, second = (
+        make_selector(ledger=SharedReceiveLedger(daily_receive_cap=100, pairing_cooldown=60))
+        for _ in range(2)
+    )
+    for selector in (first, second):
+        for i in range(4):
+            selector.add(make_account(f"user{i}@example.com"))
+
+    taken = {a.email for a in await first.select("a@sender.com", 2)}
+    again = {a.email for a in await second.select("a@sender.com", 4)}
+    assert len(taken) == 2 and again == {f"user{i}@example.com" for i in range(4)} - taken
@@ -0,0 +1,67 @@
+import pytest
+from aioimaplib import Response
+from app.core.placement import FolderState, PlacementChecker, parse_message_ids, parse_select
+
+
+SELECT_LINES = [
+    b"172 EXISTS",
+    b"OK [UIDVALIDITY 3857529045] UIDs valid",
+    b"OK [UIDNEXT 4392] Predicted next UID",
+]
+
+
+class FakeIMAP:
+    def __init__(self, fetch_lines):
+        self.fetch_lines = fetch_lines
+        self.fetches = []
+
+    async def select(self, folder):
+        return Response("OK", SELECT_LINES)
+
+    async def uid(self, command, message_set, parts):
+        self.fetches.append(message_set)
+        return Response("OK", self.fetch_lines)
+
+
+def test_parse_select():
+    assert parse_select(SELECT_LINES) == (3857529045, 4392)
+
+
+def test_parse_message_ids():
+    lines = [
+        b"1 FETCH (UID 4390 BODY[HEADER.FIELDS (MESSAGE-ID)] {40}",
+        bytearray(b"Message-ID: <a1@example.com>\r\n\r\n"),
+        b")",
+        b"2 FETCH (UID 4391 BODY[HEADER.FIELDS (MESSAGE-ID)] {40}",
+        bytearray(b"Message-Id: <b2@example.com>\r\n\r\n"),
+        b")",
+        b"Success",
+    ]
+    assert parse_message_ids(lines) == {4390: "<a1@example.com>", 4391: "<b2@example.com>"}
+
+
+@pytest.mark.asyncio
+async def test_scan_skips_fetch_when_nothing_new(fake_db):
+    checker = PlacementChecker()
+    checker._state[("a@example.com", "INBOX")] = FolderState(3857529045, 4391)
+    client = FakeIMAP([])
+
+    assert await checker.scan_folder(client, "a@example.com", "INBOX") == {}
+    assert client.fetches == []
+
+
+@pytest.mark.asyncio
+async def test_scan_fetches_only_new_uids(fake_db):
+    checker = PlacementChecker()
+    checker._state[("a@example.com", "INBOX")] = FolderState(3857529045, 4389)
+    client = FakeIMAP([
+        b"1 FETCH (UID 4391 BODY[HEADER.FIELDS (MESSAGE-ID)] {40}",
+        bytearray(b"Message-ID: <new@example.com>\r\n\r\n"),
+        b")",
+    ])
+
+    found = await checker.scan_folder(client, "a@example.com", "INBOX")
+
+    assert client.fetches == ["4390:*"]
+    assert found == {4391: "<new@example.com>"}
+    assert checker._state[("a@example.com", "INBOX")] == FolderState(3857529045, 4391)
@@ -0,0 +1,117 @@
+import time
+import pytest
+import aiosmtplib
+from app.core.dns_cache import DNSLookupError
+from app.core.rate_limiter import AdaptiveBucket, SendRateLimiter, is_throttle, registrable_domain
+
+
+class FakeResolver:
+    def __init__(self, mx=None, fail=False):
+        self.records = mx or {}
+        self.fail = fail
+
+    async def mx(self, domain):
+        if self.fail:
+            raise DNSLookupError("timeout")
+        return self.records.get(domain, [])
+
+
+class Account:
+    def __init__(self, email):
+        self.email = email
+
+
+def make_limiter(**kwargs):
+    options = dict(
+        provider_rate=1000, account_rate=1000, account_max_rate=2000,
+        retry_base=0.001, resolver=FakeResolver()
+    )
+    options.update(kwargs)
+    return SendRateLimiter(**options)
+
+
+def test_throttle_replies_are_recognised():
+    assert is_throttle(aiosmtplib.SMTPResponseException(421, "4.7.0 Try again later"))
+    assert is_throttle(aiosmtplib.SMTPResponseException(550, "4.7.28 rate limited"))
+    assert is_throttle(aiosmtplib.SMTPRecipientsRefused([
+        aiosmtplib.SMTPRecipientRefused(452, "4.5.3 Too many recipients", "a@example.com")
+    ]))
+    assert not is_throttle(aiosmtplib.SMTPResponseException(550, "5.1.1 User unknown"))
+
+
+def test_registrable_domain():
+    assert registrable_domain("aspmx.l.google.com.") == "google.com"
+    assert registrable_domain("mx1.hosting.co.uk") == "hosting.co.uk"
+
+
+@pytest.mark.asyncio
+async def test_bucket_paces_sends_and_backs_off():
+    bucket = AdaptiveBucket(rate=20, burst=1, min_rate=1, max_rate=100, increase=1, decrease=0.5)
+
+    started = time.monotonic()
+    for _ in range(3):
+        await bucket.acquire()
+    assert time.monotonic() - started >= 0.09
+
+    bucket.throttled()
+    bucket.throttled()
+    assert bucket.rate == 10
+    assert bucket.throttles == 2
+
+    bucket.succeeded()
+    assert bucket.rate == pytest.approx(10.1)
+
+
+@pytest.mark.asyncio
+async def test_throttled_send_is_retried_at_a_lower_rate():
+    limiter = make_limiter()
+    replies = [aiosmtplib.SMTPResponseException(421, "4.7.0 Slow down"), None]
+
+    async def send():
+        reply = replies.pop(0)
+        if reply:
+            raise reply
+        return "sent"
+
+    assert await limiter.send(Account("a@example.com"), send) == "sent"
+    rates = limiter.rates()
+    assert rates["providers"]["example.com"]["throttles"] == 1
+    assert rates["providers"]["example.com"]["rate"] < 1000
+
+
+@pytest.mark.asyncio
+async def test_permanent_failures_are_not_retried():
+    limiter = make_limiter()
+    calls = []
+
+    async def send():
+        calls.append(1)
+        raise aiosmtplib.SMTPResponseException(550, "5.1.1 User unknown")
+
+    with pytest.raises(aiosmtplib.SMTPResponseException):
+        await limiter.send(Account("a@example.com"), send)
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_auth_failures_are_not_retried():
+    limiter = make_limiter()
+    calls = []
+
+    async def send():
+        calls.append(1)
+        raise aiosmtplib.SMTPAuthenticationError(454, "4.7.0 Temporary authentication failure")
+
+    with pytest.raises(aiosmtplib.SMTPAuthenticationError):
+        await limiter.send(Account("a@example.com"), send)
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_provider_comes_from_mx():
+    limiter = make_limiter(resolver=FakeResolver({"custom.io": [(10, "aspmx.l.google.com")]}))
+    assert await limiter.provider_for("me@custom.io") == "google.com"
+    assert await limiter.provider_for("me@nomx.io") == "nomx.io"
+
+    limiter.resolver = FakeResolver(fail=True)
+    assert await limiter.provider_for("me@other.io") == "other.io"
@@ -0,0 +1,141 @@
+import asyncio
+import email
+from contextlib import asynccontextmanager
+from email import policy
+import pytest
+from app.core.content import ContentGenerator
+from app.core.placement import search_message_ids
+from app.core.replies import ReplyPipeline
+from app.database.counters import AccountCounters
+from app.database.log_sink import log_sink
+
+
+class Response:
+    def __init__(self, lines, result="OK"):
+        self.lines = lines
+        self.result = result
+
+
+MAILBOX = {
+    "INBOX": {
+        7: b"Message-ID: <a@example.com>\r\nSubject: Checking in\r\n\r\n",
+        9: b"Message-ID: <b@example.com>\r\nSubject: =?utf-8?q?Gr=C3=BC=C3=9Fe?=\r\n"
+           b"References: <root@example.com>\r\n\r\n",
+    },
+    "Spam": {},
+}
+
+
+class FakeIMAPClient:
+    def __init__(self):
+        self.commands = []
+        self.folder = None
+
+    async def select(self, folder):
+        self.commands.append(("select", folder))
+        self.folder = folder
+        return Response([])
+
+    async def uid_search(self, *criteria, charset=None):
+        self.commands.append(("search",) + criteria)
+        wanted = {c.strip('"') for c in criteria if c.startswith('"')}
+        uids = [
+            str(uid).encode() for uid, headers in MAILBOX[self.folder].items()
+            if any(w.encode() in headers for w in wanted)
+        ]
+        return Response([b" ".join(uids)])
+
+    async def uid(self, command, uids, fields):
+        self.commands.append(("fetch", uids))
+        lines = []
+        for uid in uids.split(","):
+            lines += [f"1 FETCH (UID {uid} BODY[HEADER] {{0}}".encode(), bytearray(MAILBOX[self.folder][int(uid)]), b")"]
+        return Response(lines + [b"Fetch completed"])
+
+
+class FakeIMAPPool:
+    def __init__(self):
+        self.sessions = 0
+        self.client = FakeIMAPClient()
+
+    @asynccontextmanager
+    async def session(self, account):
+        self.sessions += 1
+        yield self.client
+
+
+class FakeSMTPPool:
+    def __init__(self):
+        self.sent = []
+
+    async def sendmail(self, account, sender, recipients, data):
+        self.sent.append(data)
+
+
+class FakeLimiter:
+    async def send(self, account, operation):
+        return await operation()
+
+
+class Account:
+    def __init__(self, email):
+        self.email = email
+
+
+@pytest.fixture
+def pipeline(fake_db, monkeypatch):
+    written = []
+
+    async def write(collection, record):
+        written.append(record)
+
+    async def record(email, **counts):
+        pass
+
+    monkeypatch.setattr(log_sink, "write", write)
+    monkeypatch.setattr(AccountCounters, "record", staticmethod(record))
+    fake_db.email_logs.documents.append(
+        {"message_id": "<c@example.com>", "subject": "Plan for Friday", "references": ["<x@example.com>"]}
+    )
+    return ReplyPipeline(
+        generator=ContentGenerator(variants=200, seed=1),
+        imap=FakeIMAPPool(),
+        smtp=FakeSMTPPool(),
+        limiter=FakeLimiter(),
+        batch_size=10,
+        batch_delay=0.01,
+        folders=["INBOX", "Spam"]
+    )
+
+
+def test_search_matches_any_message_id_in_one_command():
+    assert search_message_ids(["<a@x>", "<b@x>", "<c@x>"]) == [
+        "OR", "OR",
+        "HEADER", "Message-ID", '"<a@x>"',
+        "HEADER", "Message-ID", '"<b@x>"',
+        "HEADER", "Message-ID", '"<c@x>"',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_replies_for_one_account_share_a_session_and_are_threaded(pipeline):
+    replier, sender = Account("peer@example.org"), Account("sender@example.com")
+
+    results = await asyncio.gather(*(
+        pipeline.reply(replier, sender, message_id)
+        for message_id in ["<a@example.com>", "<b@example.com>", "<c@example.com>"]
+    ))
+
+    assert all(results) and pipeline.batches == 1
+    assert pipeline.imap.sessions == 1
+    assert [c[0] for c in pipeline.imap.client.commands].count("search") == 2
+
+    messages = [email.message_from_bytes(data, policy=policy.default) for data in pipeline.smtp.sent]
+    assert [m["In-Reply-To"] for m in messages] == ["<a@example.com>", "<b@example.com>", "<c@example.com>"]
+    assert messages[0]["Subject"] == "Re: Checking in"
+    assert messages[0]["References"] == "<a@example.com>"
+    assert messages[1]["Subject"] == "Re: Grüße"
+    assert messages[1]["References"] == "<root@example.com> <b@example.com>"
+    # Not in the mailbox: threaded from what was logged at send time
+    assert messages[2]["Subject"] == "Re: Plan for Friday"
+    assert messages[2]["References"] == "<x@example.com> <c@example.com>"
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+import pytest
+from app.core.retention import ROLLUP_STATE_ID, LogRollup
+from app.database.counters import day_bucket
+
+
+@pytest.mark.asyncio
+async def test_rollup_day_summarises_sends_and_engagement(fake_db):
+    day = day_bucket(datetime.utcnow() - timedelta(days=2))
+    fake_db.email_logs.documents.extend([
+        {"from_email": "a@example.com", "sent_at": day + timedelta(hours=1), "delivered": True, "opened": True},
+        {"from_email": "a@example.com", "sent_at": day + timedelta(hours=2), "delivered": True, "replied": True},
+        {"from_email": "a@example.com", "sent_at": day + timedelta(hours=3)},
+        {"from_email": "b@example.com", "sent_at": day + timedelta(hours=4), "delivered": True},
+        # Outside the day
+        {"from_email": "a@example.com", "sent_at": day + timedelta(days=1)},
+    ])
+    fake_db.engagement_logs.documents.extend([
+        {"to_email": "a@example.com", "engagement_type": "read", "timestamp": day + timedelta(hours=5)},
+        {"to_email": "a@example.com", "engagement_type": "read", "timestamp": day + timedelta(hours=6)},
+        {"to_email": "a@example.com", "engagement_type": "reply", "timestamp": day + timedelta(hours=7)},
+    ])
+
+    await LogRollup.rollup_day(day + timedelta(hours=12))
+
+    summaries = {s["email"]: s for s in fake_db.daily_summaries.documents}
+    assert summaries["a@example.com"]["day"] == day
+    assert {k: summaries["a@example.com"][k] for k in ("sent", "delivered", "opened", "replied")} == {
+        "sent": 3, "delivered": 2, "opened": 1, "replied": 1
+    }
+    assert summaries["a@example.com"]["engagements"] == {"read": 2, "reply": 1}
+    assert summaries["b@example.com"]["sent"] == 1 and "engagements" not in summaries["b@example.com"]
+
+
+@pytest.mark.asyncio
+async def test_rollup_pending_rolls_each_completed_day_once(fake_db, monkeypatch):
+    rolled = []
+
+    async def rollup_day(day):
+        rolled.append(day)
+
+    monkeypatch.setattr(LogRollup, "rollup_day", staticmethod(rollup_day))
+    today = day_bucket(datetime.utcnow() - timedelta(hours=1))
+    fake_db.retention_state.documents.append({"_id": ROLLUP_STATE_ID, "last_day": today - timedelta(days=4)})
+
+    assert await LogRollup.rollup_pending() == [today - timedelta(days=n) for n in (3, 2, 1)]
+    assert await LogRollup.rollup_pending() == []
+    assert rolled == [today - timedelta(days=n) for n in (3, 2, 1)]
+    assert fake_db.retention_state.documents[0]["last_day"] == today - timedelta(days=1)
+
+
+@pytest.mark.asyncio
+async def test_first_rollup_starts_at_the_retention_window(fake_db, monkeypatch):
+    async def rollup_day(day):
+        pass
+
+    monkeypatch.setattr(LogRollup, "rollup_day", staticmethod(rollup_day))
+    monkeypatch.setattr("app.core.retention.settings.LOG_RETENTION_DAYS", 3)
+
+    assert len(await LogRollup.rollup_pending()) == 3
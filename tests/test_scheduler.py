@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from app.core.scheduler import JobScheduler
+
+
+async def noop(payload):
+    return None
+
+
+def make_scheduler(**options) -> JobScheduler:
+    options = {"lookahead": 5, "poll_interval": 0.01, "lease_seconds": 60, **options}
+    scheduler = JobScheduler(**options)
+    scheduler.register("test.job", noop)
+    return scheduler
+
+
+def statuses(fake_db):
+    return sorted(job["status"] for job in fake_db.scheduled_jobs.documents)
+
+
+@pytest.mark.asyncio
+async def test_claim_leases_only_due_jobs_of_known_kinds(fake_db):
+    now = datetime.utcnow()
+    await JobScheduler.schedule("test.job", {"n": 1})
+    await JobScheduler.schedule("test.job", {"n": 2}, due_at=now + timedelta(seconds=3))
+    await JobScheduler.schedule("test.job", {"n": 3}, due_at=now + timedelta(minutes=10))
+    await JobScheduler.schedule("other.job", {"n": 4})
+
+    claimed = await make_scheduler()._claim(10)
+
+    assert [job["payload"]["n"] for job in claimed] == [1, 2]
+    assert len({job["lease_id"] for job in claimed}) == 1
+    assert statuses(fake_db) == ["leased", "leased", "pending", "pending"]
+
+
+@pytest.mark.asyncio
+async def test_failed_job_backs_off_then_fails(fake_db):
+    scheduler = make_scheduler(max_attempts=2)
+    await JobScheduler.schedule("test.job", {})
+    [job] = await scheduler._claim(1)
+
+    await scheduler._fail(job, RuntimeError("boom"))
+    [stored] = fake_db.scheduled_jobs.documents
+    assert stored["status"] == "pending" and stored["attempts"] == 1 and stored["error"] == "boom"
+    # 2 ** 1 * 30 seconds, with jitter
+    assert timedelta(seconds=45) < stored["due_at"] - datetime.utcnow() < timedelta(seconds=75)
+    assert "lease_id" not in stored
+
+    stored["due_at"] = datetime.utcnow()
+    [job] = await scheduler._claim(1)
+    await scheduler._fail(job, RuntimeError("boom"))
+    assert fake_db.scheduled_jobs.documents[0]["status"] == "failed"
+
+
+@pytest.mark.asyncio
+async def test_outcome_of_a_lost_lease_is_discarded(fake_db):
+    scheduler = make_scheduler(lease_seconds=-60)
+    await JobScheduler.schedule("test.job", {})
+    [stale] = await scheduler._claim(1)
+    await JobScheduler.reclaim_expired()
+    [current] = await make_scheduler()._claim(1)
+
+    await scheduler._execute(stale)
+
+    [stored] = fake_db.scheduled_jobs.documents
+    assert stored["status"] == "leased" and stored["lease_id"] == current["lease_id"]
+
+
+@pytest.mark.asyncio
+async def test_worker_never_leases_more_than_its_free_slots(fake_db):
+    release = asyncio.Event()
+    started = []
+
+    async def slow(payload):
+        started.append(payload["n"])
+        await release.wait()
+
+    scheduler = make_scheduler(concurrency=2, batch_size=10)
+    scheduler.register("test.job", slow)
+    for n in range(5):
+        await JobScheduler.schedule("test.job", {"n": n})
+
+    running = asyncio.create_task(scheduler.run())
+    await asyncio.sleep(0.05)
+    assert len(started) == 2
+    assert statuses(fake_db).count("leased") == 2
+
+    release.set()
+    await asyncio.sleep(0.1)
+    scheduler.stop()
+    await asyncio.wait_for(running, timeout=1)
+    assert statuses(fake_db) == ["done"] * 5
+
+
+@pytest.mark.asyncio
+async def test_stop_hands_back_jobs_that_never_started(fake_db):
+    scheduler = make_scheduler()
+    await JobScheduler.schedule("test.job", {}, delay=2)
+
+    running = asyncio.create_task(scheduler.run())
+    await asyncio.sleep(0.05)
+    assert statuses(fake_db) == ["leased"]
+
+    scheduler.stop()
+    await asyncio.wait_for(running, timeout=1)
+    [stored] = fake_db.scheduled_jobs.documents
+    assert stored["status"] == "pending" and "lease_id" not in stored
+
+
+@pytest.mark.asyncio
+async def test_running_job_keeps_its_lease_past_lease_seconds(fake_db):
+    async def slow(payload):
+        await asyncio.sleep(0.5)
+
+    scheduler = make_scheduler(lookahead=0, lease_seconds=0.2)
+    scheduler.register("test.job", slow)
+    await JobScheduler.schedule("test.job", {})
+    [job] = await scheduler._claim(1)
+
+    running = asyncio.create_task(scheduler._execute(job))
+    await asyncio.sleep(0.35)
+    assert await JobScheduler.reclaim_expired() == 0
+
+    await running
+    assert statuses(fake_db) == ["done"]
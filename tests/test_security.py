@@ -0,0 +1,58 @@
+import asyncio
+import threading
+import pytest
+from app.core.security import PasswordHasher, PasswordHasherBusy
+
+
+def make_hasher(rounds=1000, **kwargs):
+    # pbkdf2 keeps the tests fast; the executor doesn't care which scheme runs in it
+    return PasswordHasher(rounds=rounds, scheme="pbkdf2_sha256", **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_hashing_runs_off_the_event_loop():
+    hasher = make_hasher(workers=2, max_pending=2)
+    loop_thread = threading.get_ident()
+    threads = []
+    context_hash = hasher.context.hash
+    hasher.context.hash = lambda password: threads.append(threading.get_ident()) or context_hash(password)
+
+    hashed = await hasher.hash("s3cret")
+
+    assert threads and threads[0] != loop_thread
+    assert await hasher.verify("s3cret", hashed)
+    assert not await hasher.verify("wrong", hashed)
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_calls_beyond_the_queue_are_rejected():
+    hasher = make_hasher(workers=1, max_pending=1)
+    release = threading.Event()
+    hasher.context.hash = lambda password: release.wait(5) and "hashed"
+
+    first = asyncio.ensure_future(hasher.hash("a"))
+    second = asyncio.ensure_future(hasher.hash("b"))
+    await asyncio.sleep(0)
+    with pytest.raises(PasswordHasherBusy):
+        await hasher.hash("c")
+
+    release.set()
+    assert await asyncio.gather(first, second) == ["hashed", "hashed"]
+    assert hasher.stats() == {"in_flight": 0, "rejected": 1}
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_changed_cost_is_rehashed_on_verify():
+    old = make_hasher(rounds=1000)
+    hashed = await old.hash("s3cret")
+
+    assert await old.verify_and_update("s3cret", hashed) == (True, None)
+
+    new = make_hasher(rounds=2000)
+    valid, replacement = await new.verify_and_update("s3cret", hashed)
+    assert valid and replacement and "$2000$" in replacement
+    assert await new.verify_and_update("wrong", hashed) == (False, None)
+    old.shutdown()
+    new.shutdown()
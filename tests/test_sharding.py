@@ -0,0 +1,40 @@
+import pytest
+from app.core.sharding import HashRing, ShardCoordinator, shard_of
+
+
+def test_shard_of_is_stable_and_case_insensitive():
+    assert shard_of("Seed@Example.com", 64) == shard_of("seed@example.com", 64)
+    assert 0 <= shard_of("seed@example.com", 64) < 64
+
+
+def test_ring_only_moves_shards_to_the_new_worker():
+    shards = [str(shard) for shard in range(1024)]
+    before = HashRing(["w1", "w2", "w3"])
+    after = HashRing(["w1", "w2", "w3", "w4"])
+
+    moved = [s for s in shards if before.owner(s) != after.owner(s)]
+    assert all(after.owner(s) == "w4" for s in moved)
+    assert 0.1 < len(moved) / len(shards) < 0.4
+
+
+@pytest.mark.asyncio
+async def test_shards_are_handed_over_without_overlap(fake_db):
+    first = ShardCoordinator("w1", shard_count=32)
+    second = ShardCoordinator("w2", shard_count=32)
+    await first._seed_shards()
+    await second._seed_shards()
+
+    assert await first.rebalance() == set(range(32))
+
+    # The newcomer can't take anything until the current owner lets go
+    assert await second.rebalance() == set()
+    held_by_first = await first.rebalance()
+    held_by_second = await second.rebalance()
+
+    assert held_by_first and held_by_second
+    assert held_by_first.isdisjoint(held_by_second)
+    assert held_by_first | held_by_second == set(range(32))
+
+    await second.leave()
+    assert not second.owns_shard(next(iter(held_by_second)))
+    assert await first.rebalance() == set(range(32))
@@ -0,0 +1,107 @@
+import pytest
+import aiosmtplib
+from app.core.smtp_pool import SMTPConnectionPool
+from app.models.email import EmailAccount
+
+
+class FakeSMTP:
+    instances = []
+
+    def __init__(self, hostname, port, use_tls):
+        self.is_connected = False
+        self.logins = 0
+        self.sent = []
+        self.drop_next_send = False
+        FakeSMTP.instances.append(self)
+
+    async def connect(self):
+        self.is_connected = True
+
+    async def login(self, username, password):
+        self.logins += 1
+
+    async def noop(self):
+        if not self.is_connected:
+            raise aiosmtplib.SMTPServerDisconnected("gone")
+
+    async def send_message(self, message):
+        if self.drop_next_send:
+            self.is_connected = False
+            raise aiosmtplib.SMTPServerDisconnected("gone")
+        self.sent.append(message)
+
+    async def sendmail(self, sender, recipients, data):
+        self.sent.append((sender, recipients, data))
+
+    async def quit(self):
+        self.is_connected = False
+
+    def close(self):
+        self.is_connected = False
+
+
+def make_account(username="test@example.com"):
+    return EmailAccount(
+        email=username,
+        smtp_server="smtp.example.com",
+        smtp_port=465,
+        imap_server="imap.example.com",
+        imap_port=993,
+        username=username,
+        password="test_password"
+    )
+
+
+@pytest.fixture(autouse=True)
+def reset_fake_smtp():
+    FakeSMTP.instances = []
+
+
+@pytest.mark.asyncio
+async def test_session_is_reused_across_sends():
+    pool = SMTPConnectionPool(smtp_factory=FakeSMTP)
+    account = make_account()
+
+    for _ in range(3):
+        await pool.send_message(account, "message")
+
+    assert len(FakeSMTP.instances) == 1
+    assert FakeSMTP.instances[0].logins == 1
+    assert len(FakeSMTP.instances[0].sent) == 3
+
+
+@pytest.mark.asyncio
+async def test_dropped_session_is_transparently_reconnected():
+    pool = SMTPConnectionPool(smtp_factory=FakeSMTP)
+    account = make_account()
+
+    await pool.send_message(account, "first")
+    FakeSMTP.instances[0].drop_next_send = True
+    await pool.send_message(account, "second")
+
+    assert len(FakeSMTP.instances) == 2
+    assert FakeSMTP.instances[1].sent == ["second"]
+
+
+@pytest.mark.asyncio
+async def test_idle_sessions_are_evicted():
+    pool = SMTPConnectionPool(idle_timeout=0, smtp_factory=FakeSMTP)
+    account = make_account()
+
+    await pool.send_message(account, "message")
+    await pool.evict_idle()
+
+    assert pool.stats()["idle_connections"] == 0
+    assert not FakeSMTP.instances[0].is_connected
+
+
+@pytest.mark.asyncio
+async def test_sendmail_sends_raw_bytes_on_pooled_session():
+    pool = SMTPConnectionPool(smtp_factory=FakeSMTP)
+    account = make_account()
+
+    await pool.send_message(account, "message")
+    await pool.sendmail(account, account.email, ["to@example.com"], b"Subject: hi\r\n\r\nbody\r\n")
+
+    assert len(FakeSMTP.instances) == 1
+    assert FakeSMTP.instances[0].sent[1] == (account.email, ["to@example.com"], b"Subject: hi\r\n\r\nbody\r\n")
@@ -0,0 +1,79 @@
+import email
+from email import policy
+import pytest
+from app.core.templates import CompiledTemplate, TemplateLibrary, compile_text
+from app.models.email_account import EmailTemplate
+
+
+def parse(data: bytes):
+    return email.message_from_bytes(data, policy=policy.default)
+
+
+def test_render_produces_parseable_crlf_message():
+    template = CompiledTemplate(EmailTemplate(
+        subject="Hello {{ recipient_name }}",
+        body="Hi {{recipient_name}},\n\nAbout {{topic}}.\n\n{{ sender_name }}",
+        category="warmup",
+        variables=["topic"]
+    ))
+
+    message = template.render("jane.doe@example.com", "bob@example.org", {"topic": "the launch"})
+
+    assert b"\r\n\r\n" in message.data and b"\n" not in message.data.replace(b"\r\n", b"")
+    parsed = parse(message.data)
+    assert parsed["Subject"] == "Hello Bob"
+    assert parsed["From"] == "jane.doe@example.com"
+    assert parsed["Message-ID"] == message.message_id
+    assert parsed.get_content() == "Hi Bob,\r\n\r\nAbout the launch.\r\n\r\nJane Doe\r\n"
+
+
+def test_message_ids_are_unique_per_render():
+    template = compile_text("Checking in", "Hope all is well.")
+
+    ids = {template.render("a@example.com", "b@example.com").message_id for _ in range(1000)}
+
+    assert len(ids) == 1000
+    assert all(i.endswith("@example.com>") for i in ids)
+    assert compile_text("Checking in", "Hope all is well.") is template
+
+
+def test_non_ascii_content_is_encoded():
+    message = compile_text("Grüße aus Köln", "Schöne Grüße, {{sender_name}}").render(
+        "anna@example.de", "ben@example.com"
+    )
+
+    assert message.data.isascii()
+    assert b"Content-Transfer-Encoding: quoted-printable" in message.data
+    parsed = parse(message.data)
+    assert parsed["Subject"] == "Grüße aus Köln"
+    assert parsed.get_content() == "Schöne Grüße, Anna\r\n"
+
+
+def test_long_non_ascii_subject_is_folded_with_crlf():
+    subject = "Привет, " + "как дела на этой неделе? " * 3
+    message = compile_text(subject.strip(), "Hi").render("a@example.com", "b@example.com")
+
+    head = message.data.split(b"\r\n\r\n", 1)[0]
+    assert b"?=\r\n =?utf-8?" in head
+    assert b"\n" not in message.data.replace(b"\r\n", b"")
+    assert parse(message.data)["Subject"] == subject.strip()
+
+
+def test_undeclared_variables_are_rejected():
+    with pytest.raises(ValueError):
+        CompiledTemplate(EmailTemplate(subject="{{ coupon }}", body="", category="promo"))
+
+    library = TemplateLibrary([EmailTemplate(subject="{{ coupon }}", body="", category="promo")])
+    assert library.get("promo") == []
+    assert len(TemplateLibrary().get("warmup")) == 5
+
+
+def test_multiline_values_are_normalised():
+    message = TemplateLibrary().get("warmup")[0].render(
+        "a@example.com", "b@example.com", {"subject": "Line one\nBcc: x@evil.test", "body": "First.\n\nSecond."}
+    )
+
+    head, body = message.data.split(b"\r\n\r\n", 1)
+    assert b"Subject: Line one Bcc: x@evil.test\r\n" in head
+    assert b"First.\r\n\r\nSecond." in body
+    assert b"\n" not in message.data.replace(b"\r\n", b"")
@@ -0,0 +1,120 @@
+import asyncio
+import time
+import pytest
+import aiosmtplib
+from app.core.validation import AccountValidator
+from app.models.email_account import EmailAccount, WarmupStatus
+
+
+class FakeSMTP:
+    delay = 0.0
+    reject_login = False
+
+    def __init__(self, hostname, port, use_tls, timeout):
+        self.closed = False
+
+    async def connect(self):
+        await asyncio.sleep(self.delay)
+
+    async def ehlo(self):
+        pass
+
+    async def login(self, username, password):
+        if self.reject_login:
+            raise aiosmtplib.SMTPAuthenticationError(535, "bad credentials")
+
+    async def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+class FakeIMAPClient:
+    async def logout(self):
+        pass
+
+
+class FakeIMAPPool:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    async def open_dedicated(self, account):
+        await asyncio.sleep(self.delay)
+        return FakeIMAPClient()
+
+
+def make_account(email="test@example.com"):
+    return EmailAccount(
+        email=email,
+        smtp_server="smtp.example.com",
+        smtp_port=465,
+        imap_server="imap.example.com",
+        imap_port=993,
+        username=email,
+        password="test_password"
+    )
+
+
+@pytest.fixture(autouse=True)
+def reset_fake_smtp():
+    FakeSMTP.delay = 0.0
+    FakeSMTP.reject_login = False
+
+
+@pytest.mark.asyncio
+async def test_smtp_and_imap_are_probed_concurrently():
+    FakeSMTP.delay = 0.1
+    validator = AccountValidator(pool=FakeIMAPPool(delay=0.1), smtp_factory=FakeSMTP)
+
+    started = time.monotonic()
+    result = await validator.validate(make_account())
+
+    assert result["valid"] is True
+    assert time.monotonic() - started < 0.18
+
+
+@pytest.mark.asyncio
+async def test_failures_are_reported_per_protocol():
+    FakeSMTP.reject_login = True
+    validator = AccountValidator(timeout=0.05, pool=FakeIMAPPool(delay=1), smtp_factory=FakeSMTP)
+
+    result = await validator.validate(make_account())
+
+    assert result["valid"] is False
+    assert result["smtp_error"] == "Authentication failed: bad credentials"
+    assert result["imap_error"] == "Timed out after 0.05s"
+
+
+@pytest.mark.asyncio
+async def test_validate_many_bounds_concurrency():
+    FakeSMTP.delay = 0.05
+    validator = AccountValidator(concurrency=2, pool=FakeIMAPPool(), smtp_factory=FakeSMTP)
+    accounts = [make_account(f"user{i}@example.com") for i in range(4)]
+
+    started = time.monotonic()
+    results = await validator.validate_many(accounts)
+
+    assert sorted(results) == sorted(a.email for a in accounts)
+    assert time.monotonic() - started >= 0.1
+
+
+@pytest.mark.asyncio
+async def test_record_activates_pending_accounts_that_pass(fake_db):
+    fake_db.email_accounts.documents.extend([
+        {"email": "new@example.com", "status": WarmupStatus.PENDING},
+        {"email": "paused@example.com", "status": WarmupStatus.PAUSED},
+        {"email": "broken@example.com", "status": WarmupStatus.PENDING},
+    ])
+    passed = {"valid": True, "smtp_error": None, "imap_error": None}
+
+    await AccountValidator.record({
+        "new@example.com": passed,
+        "paused@example.com": passed,
+        "broken@example.com": {**passed, "valid": False, "smtp_error": "535 denied"},
+    })
+
+    assert [d["status"] for d in fake_db.email_accounts.documents] == [
+        WarmupStatus.ACTIVE, WarmupStatus.PAUSED, WarmupStatus.FAILED
+    ]
+    assert all(d["validation"] for d in fake_db.email_accounts.documents)
@@ -0,0 +1,129 @@
+from collections import Counter
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+from app.core import warmup_engine
+from app.core.network_sync import NetworkSync
+from app.core.warmup_engine import WarmupEngine
+
+
+def account(email, **fields):
+    return {"email": email, "smtp_server": "smtp.example.com", "status": "active", "warmup_stage": 1, **fields}
+
+
+@pytest.fixture
+def engine(fake_db):
+    engine = WarmupEngine()
+    for i in range(8):
+        document = account(f"peer{i}@example.org")
+        fake_db.email_accounts.documents.append(document)
+        engine.upsert_account(document)
+    return engine
+
+
+@pytest.mark.asyncio
+async def test_cycle_jobs_run_once_per_day(engine, fake_db):
+    first = await engine._run_cycle_job({"email": "peer0@example.org"})
+    again = await engine._run_cycle_job({"email": "peer0@example.org"})
+
+    assert first and again == []
+    assert len(fake_db.scheduled_jobs.documents) == len(first)
+
+
+class Stop(Exception):
+    pass
+
+
+@pytest.mark.asyncio
+async def test_cycle_sweep_claims_only_accounts_still_due_today(engine, fake_db, monkeypatch):
+    for document in fake_db.email_accounts.documents[:6]:
+        document["last_warmup"] = datetime.utcnow()
+    fake_db.email_accounts.documents[6]["status"] = "paused"
+    cycles = []
+
+    async def process(entry):
+        cycles.append(entry.email)
+        return []
+
+    async def stop(interval):
+        raise Stop()
+
+    monkeypatch.setattr(engine, "process_warmup_cycle", process)
+    monkeypatch.setattr(warmup_engine.asyncio, "sleep", stop)
+    monkeypatch.setattr(warmup_engine.settings, "NETWORK_LOAD_BATCH_SIZE", 3)
+
+    with pytest.raises(Stop):
+        await engine.run_cycles(SimpleNamespace(owns=lambda email: True))
+
+    assert cycles == ["peer7@example.org"]
+    assert len(fake_db.email_accounts.calls_to("find")) == 3
+    assert len(fake_db.email_accounts.calls_to("find_one_and_update")) == 1
+
+
+@pytest.mark.asyncio
+async def test_placement_poll_checks_only_owned_accounts(engine, monkeypatch):
+    checked = []
+
+    async def check_many(accounts):
+        checked.extend(account.email for account in accounts)
+        return {}
+
+    async def get_many(emails):
+        return {email: SimpleNamespace(email=email) for email in emails}
+
+    async def stop(interval):
+        raise Stop()
+
+    monkeypatch.setattr(warmup_engine.placement_checker, "check_many", check_many)
+    monkeypatch.setattr(engine.credentials, "get_many", get_many)
+    monkeypatch.setattr(warmup_engine.asyncio, "sleep", stop)
+
+    with pytest.raises(Stop):
+        await engine.run_placement_checks(SimpleNamespace(owns=lambda email: email < "peer3"))
+
+    assert sorted(checked) == ["peer0@example.org", "peer1@example.org", "peer2@example.org"]
+
+
+@pytest.mark.asyncio
+async def test_roster_is_left_alone_by_updates_that_dont_move_the_member(engine, fake_db):
+    document = fake_db.email_accounts.documents[0]
+    await engine.network_pool.select("someone@other.com", 3)
+    tables = engine.network_pool._provider_table
+
+    engine.upsert_account({**document, "last_warmup": datetime.utcnow()})
+    assert engine.network_pool._provider_table is tables
+
+    engine.upsert_account({**document, "warmup_stage": 2})
+    assert engine.network_pool._provider_table is None
+    assert engine.active_accounts[document["email"]].warmup_stage == 2
+
+
+@pytest.mark.asyncio
+async def test_cached_credentials_survive_updates_that_dont_change_them(engine, fake_db):
+    document = {**fake_db.email_accounts.documents[0], "smtp_port": 465, "imap_server": "imap.example.com",
+                "imap_port": 993, "username": "peer0", "password": "secret"}
+    fake_db.email_accounts.documents[0] = document
+    await engine.credentials.get(document["email"])
+
+    engine.upsert_account({**document, "last_warmup": datetime.utcnow()})
+    assert document["email"] in engine.credentials._accounts
+
+    engine.upsert_account({**document, "password": "rotated"})
+    assert document["email"] not in engine.credentials._accounts
+
+
+@pytest.mark.asyncio
+async def test_members_whose_mail_lands_in_spam_are_drawn_less(engine, fake_db):
+    fake_db.account_counters.documents.append({
+        "email": "peer0@example.org", "granularity": "day",
+        "bucket": datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0),
+        "delivered": 2, "spam": 18
+    })
+
+    assert await NetworkSync(engine).refresh_reputation() == 1
+    assert engine.active_accounts["peer0@example.org"].reputation == 0.15
+
+    pool = engine.network_pool
+    draws = Counter(pool._draw_provider().draw(pool._rng).email for _ in range(7000))
+    others = [draws[f"peer{i}@example.org"] for i in range(1, 8)]
+    assert draws["peer0@example.org"] < min(others) / 4
@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from app.core.retention import LogRollup
+from app.database.mongodb import MongoDB
+from app.worker import Worker
+
+
+async def noop(*args, **kwargs):
+    pass
+
+
+@pytest.fixture
+def worker(fake_db, monkeypatch):
+    monkeypatch.setattr(MongoDB, "connect_to_database", noop)
+    monkeypatch.setattr(MongoDB, "close_database_connection", noop)
+    worker = Worker()
+    worker.started = []
+    worker.left = []
+
+    def forever(name):
+        async def run(*args, **kwargs):
+            worker.started.append(name)
+            await asyncio.Event().wait()
+        return run
+
+    async def leave():
+        worker.left.append(True)
+
+    worker.engine.initialize_network = noop
+    worker.engine.start_network_sync = lambda: asyncio.create_task(forever("network_sync")())
+    worker.engine.run_cycles = forever("cycles")
+    worker.engine.run_placement_checks = forever("placement")
+    worker.coordinator.run = forever("shards")
+    worker.coordinator.leave = leave
+    worker.scheduler.poll_interval = 0.01
+    monkeypatch.setattr(LogRollup, "run_forever", forever("rollup"))
+    return worker
+
+
+@pytest.mark.asyncio
+async def test_worker_starts_its_loops_and_shuts_down_cleanly(worker, fake_db):
+    running = asyncio.create_task(worker.run())
+    await asyncio.sleep(0.05)
+
+    assert sorted(worker.started) == ["cycles", "network_sync", "placement", "rollup", "shards"]
+    assert set(worker.scheduler._handlers) >= {"warmup.send", "warmup.engage", "warmup.cycle", "account.validate"}
+
+    worker.stop()
+    await asyncio.wait_for(running, timeout=2)
+    assert worker.left == [True]
+
+
+class FakeListener:
+    def __init__(self):
+        self.watched = {}
+
+    def watch(self, account):
+        self.watched.setdefault(account.email, account)
+
+    def unwatch(self, email):
+        self.watched.pop(email, None)
+
+
+@pytest.mark.asyncio
+async def test_idle_watchers_follow_accounts_between_rebalances(worker, fake_db, monkeypatch):
+    worker.listener = FakeListener()
+    monkeypatch.setattr(worker.coordinator, "owns", lambda email: email.startswith("mine"))
+    documents = [
+        {"email": email, "smtp_server": "smtp.example.com", "smtp_port": 465, "imap_server": "imap.example.com",
+         "imap_port": 993, "username": "u", "password": "x", "status": "active"}
+        for email in ("mine@example.com", "theirs@example.com")
+    ]
+    fake_db.email_accounts.documents.extend(documents)
+
+    for document in documents:
+        worker.engine.upsert_account(document)
+    await asyncio.gather(*worker._watch_tasks)
+    assert list(worker.listener.watched) == ["mine@example.com"]
+
+    rotated = {**documents[0], "password": "rotated"}
+    fake_db.email_accounts.documents[0] = rotated
+    worker.engine.upsert_account(rotated)
+    await asyncio.gather(*worker._watch_tasks)
+    assert worker.listener.watched["mine@example.com"].password == "rotated"
+
+    worker.engine.remove_account("mine@example.com")
+    assert worker.listener.watched == {}